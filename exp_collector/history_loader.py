@@ -0,0 +1,78 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def load_traffic_light_history(header_file: str) -> tuple:
+    """
+    Open the history persisted by a traffic light as a memory-mapped array, without copying it into memory. The number
+    of windows is taken from the data file size, so the history of an interrupted run is also loaded.
+
+    :param header_file: JSON header file of the traffic light history
+    :type header_file: str
+    :return: header and read-only array of temporal windows by metrics by lanes
+    :rtype: tuple
+    """
+    with open(header_file) as header:
+        history_header = json.load(header)
+
+    data_file = os.path.join(os.path.dirname(header_file), history_header['data_file'])
+    window_shape = (len(history_header['metrics']), len(history_header['lanes']))
+
+    # Number of complete windows on the data file
+    window_size = np.dtype(history_header['dtype']).itemsize * window_shape[0] * window_shape[1]
+    num_windows = os.path.getsize(data_file) // window_size if window_size else 0
+    history_header['num_windows'] = num_windows
+
+    # Empty files can not be memory-mapped
+    if not num_windows:
+        return history_header, np.zeros((0, *window_shape), dtype=history_header['dtype'])
+
+    return history_header, np.memmap(data_file, dtype=history_header['dtype'], mode='r',
+                                     shape=(num_windows, *window_shape))
+
+
+def load_history(history_dir: str) -> dict:
+    """
+    Open the history persisted by all the traffic lights on a directory
+
+    :param history_dir: directory with the traffic lights history files
+    :type history_dir: str
+    :return: header and array of temporal windows by metrics by lanes per traffic light identifier
+    :rtype: dict
+    """
+    history = {}
+    for header_file in sorted(glob.glob(os.path.join(history_dir, '*.json'))):
+        history_header, values = load_traffic_light_history(header_file=header_file)
+        history[history_header['tl_id']] = (history_header, values)
+
+    return history
+
+
+def history_to_dataframe(history: dict) -> pd.DataFrame:
+    """
+    Flatten the traffic lights history into a DataFrame with a row per traffic light, temporal window and lane
+
+    :param history: header and array of temporal windows by metrics by lanes per traffic light identifier
+    :type history: dict
+    :return: traffic lights history with the junction, temporal window, lane and metrics columns
+    :rtype: pd.DataFrame
+    """
+    frames = []
+    for tl_id, (history_header, values) in history.items():
+        num_windows, num_metrics, num_lanes = values.shape
+
+        # Windows by lanes rows, with the metrics as columns
+        rows = np.asarray(values).transpose(0, 2, 1).reshape(num_windows * num_lanes, num_metrics)
+        frame = pd.DataFrame(rows, columns=history_header['metrics'])
+
+        frame.insert(0, 'junction', tl_id)
+        frame.insert(1, 'temporal_window', np.repeat(np.arange(num_windows) + history_header['first_window'],
+                                                     num_lanes))
+        frame.insert(2, 'lane', np.tile(history_header['lanes'], num_windows))
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -1,5 +1,6 @@
 import argparse
 import subprocess
+import sys
 import time
 import warnings
 
@@ -7,6 +8,8 @@ import numpy as np
 import pandas as pd
 from influxdb_client import InfluxDBClient
 
+from history_loader import load_history, history_to_dataframe
+
 # Define constants values related to data retrieval and InfluxDB variables
 NUM_ITEMS_PER_DAY = 288
 TEMPORAL_WINDOW_MINUTES = 5
@@ -40,6 +43,11 @@ def get_options():
     arg_parser.add_argument("-w", "--waiting-time", dest="waiting_time", action='store', default=0,
                             help="waiting seconds to deploy. Use only when deploying Docker container. Default to 0")
 
+    arg_parser.add_argument("--history-dir", dest="history_dir", action="store", type=str, default='',
+                            help="directory with the history persisted by the traffic lights (--history-persist). "
+                                 "If defined, the output file stores it per traffic light, temporal window and lane "
+                                 "instead of querying the database. Default to ''")
+
     arg_parser.add_argument("--local", dest="local", action="store_true", default=False,
                             help="run the component locally. It will not connect to middleware.")
 
@@ -58,6 +66,12 @@ if __name__ == '__main__':
     # Sleep process specified waiting time
     time.sleep(int(exec_options.waiting_time))
 
+    # Store the history persisted by the traffic lights, without any database
+    if exec_options.history_dir:
+        history_to_dataframe(load_history(history_dir=exec_options.history_dir)).to_excel(exec_options.output_file,
+                                                                                         index=False, header=True)
+        sys.exit(0)
+
     db_url = exec_options.db_host + ':' + str(exec_options.db_port)
 
     # Define connection to InfluxDB database
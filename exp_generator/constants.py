@@ -1,15 +1,5 @@
 CALENDAR_PATTERN_FILE = '../sumo-utils/time_patterns/generated_calendar.csv'
 
-ADAPTATION_APPROACHES = {
-    'no_adaptation': '',
-    'analyzer_no_turn_adaptation': ';traffic-analyzer#all',
-    'analyzer_turn_adaptation': ';traffic-analyzer#all;turn-predictor#all',
-    'traffic_predictor_no_turn_adaptation': ';traffic-predictor#all',
-    'traffic_predictor_turn_adaptation': ';traffic-predictor#all;turn-predictor#all',
-    'traffic_predictor_analyzer_no_turn_adaptation': ';traffic-predictor#all;traffic-analyzer#all',
-    'traffic_predictor_analyzer_turn_adaptation': ';traffic-predictor#all;turn-predictor#all;traffic-analyzer#all',
-}
-
 ADAPTATION_FILE_SCHEMA = '#!/bin/sh \n\
 \n\
 cwd=$(pwd)/config/flows.rou.xml\n\
@@ -5,7 +5,7 @@ import platform
 from pathlib import Path
 
 from sumo_generators.static.constants import DEFAULT_NODES_FILENAME, DEFAULT_EDGES_FILENAME, DEFAULT_NET_FILENAME, \
-    DEFAULT_DET_FILENAME, DEFAULT_TLL_FILENAME, DEFAULT_ROUTE_FILENAME, DEFAULT_CONFIG_FILENAME
+    DEFAULT_DET_FILENAME, DEFAULT_TLL_FILENAME, DEFAULT_ROUTE_FILENAME, DEFAULT_CONFIG_FILENAME, ADAPTATION_APPROACHES
 
 from argparse_types import check_file, check_dimension, check_valid_format
 from constants import *
@@ -140,10 +140,14 @@ if __name__ == '__main__':
     file_extension = '.bat' if os_experiment == 'Windows' else '.sh'
 
     # 2. Create sh file per each adaptation
-    for adaptation, tl_components in ADAPTATION_APPROACHES.items():
+    for adaptation, components in ADAPTATION_APPROACHES.items():
         # Retrieve file schema, set the adaptation name and initialize the TLC pattern
         file_str, adaptation_name, tlc_pattern = ADAPTATION_FILE_SCHEMA, 'example_' + adaptation, ''
 
+        # Traffic light components of the docker generator, such as ';traffic-analyzer#all'
+        tl_components = ''.join(f";{component.replace('_', '-')}#{traffic_lights}"
+                                for component, traffic_lights in components.items())
+
         # Windows
         if os_experiment == "Windows":
             # Replace comments, cur directory variable, variable call and file beginning
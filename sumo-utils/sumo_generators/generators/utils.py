@@ -108,13 +108,12 @@ def generate_flow_file(flows_path: str, time_pattern_path: str = '', dates: str
     outer_junctions = pd.DataFrame(outer_junctions).drop_duplicates(subset=['from', 'to']) \
         .reset_index(drop=True).to_dict(orient='records')
 
-    # Iter over the time pattern rows
-    for index, row in enumerate(time_pattern.pattern.itertuples(index=False)):
+    # Iter over the time pattern compiled traffic types
+    for index, traffic_type in enumerate(time_pattern.traffic_types):
         # Calculate flows values such as begin and end timesteps and its related traffic type
         begin = index * TIMESTEPS_PER_HOUR
         end = TIMESTEPS_PER_HOUR * (index + 1)
-        # Index 1 is the traffic type
-        traffic_type_name = list(FLOWS_VALUES.keys())[row[1]]
+        traffic_type_name = list(FLOWS_VALUES.keys())[traffic_type]
 
         # Generate the row traffic flow
         # Initialize the flows list
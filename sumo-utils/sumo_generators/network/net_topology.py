@@ -1,3 +1,5 @@
+from collections import deque
+
 import numpy as np
 import pandas as pd
 import traci
@@ -7,6 +9,7 @@ from traci._trafficlight import Logic
 
 from sumo_generators.network.models import TrafficLight, Junction, LaneRelation, AdjacentTLRelation, E1Detector, \
     SensorToJunctionRelation
+from sumo_generators.static.constants import ADJACENCY_MAX_DEPTH
 
 
 def create_outer_junction_info(info: list) -> dict:
@@ -27,6 +30,67 @@ def create_outer_junction_info(info: list) -> dict:
     return outer_junction_info
 
 
+def compute_adjacent_traffic_lights(lanes: list, traffic_lights: set, max_depth: int = ADJACENCY_MAX_DEPTH) -> list:
+    """
+    Compute the adjacent traffic lights with a breadth-first search over the roads graph from each traffic light, which
+    does not cross the traffic lights reached, so they are the adjacent ones. The roads of each relation are those on
+    the shortest (fewest junctions) paths between both traffic lights.
+
+    :param lanes: lanes as (source junction, target junction, lane name, lane length) tuples
+    :type lanes: list
+    :param traffic_lights: traffic lights names
+    :type traffic_lights: set
+    :param max_depth: maximum number of roads between adjacent traffic lights. Default to 100.
+    :type max_depth: int
+    :return: adjacent traffic lights relations, with its source and target names, the number of outbound roads from the
+        source, the number of inbound roads to the target and the distance between both
+    :rtype: list
+    """
+    # Outbound roads per junction, as the lane name without its "_X" index, with the length of its shortest lane
+    junction_roads = {}
+    for source, target, lane_name, lane_length in lanes:
+        roads = junction_roads.setdefault(source, {})
+        road = (target, '_'.join(lane_name.split('_')[:-1]))
+        roads[road] = min(roads.get(road, lane_length), lane_length)
+
+    adjacent_relations = []
+    for source_tl in sorted(traffic_lights):
+        # Number of roads, distance, outbound roads from the source and inbound roads of the junctions reached
+        depths, distances, out_roads, in_roads = {source_tl: 0}, {source_tl: 0.0}, {source_tl: set()}, {}
+
+        # Junctions are expanded on the depth order, so all the junctions of a depth are reached beforehand
+        queue = deque([source_tl])
+        while queue:
+            junction = queue.popleft()
+
+            # The traffic lights reached are not crossed, neither the junctions on the maximum depth
+            if (junction != source_tl and junction in traffic_lights) or depths[junction] >= max_depth:
+                continue
+
+            for (target, road), road_length in junction_roads.get(junction, {}).items():
+                if target == source_tl:
+                    continue
+
+                if target not in depths:
+                    depths[target], distances[target] = depths[junction] + 1, distances[junction] + road_length
+                    out_roads[target], in_roads[target] = set(), set()
+                    queue.append(target)
+                elif depths[target] == depths[junction] + 1:
+                    distances[target] = min(distances[target], distances[junction] + road_length)
+                else:
+                    # Only the roads on the shortest paths are gathered
+                    continue
+
+                out_roads[target].update(out_roads[junction] if junction != source_tl else {road})
+                in_roads[target].add(road)
+
+        adjacent_relations.extend({'source': source_tl, 'target': target_tl, 'num_out_edges': len(out_roads[target_tl]),
+                                   'num_in_edges': len(in_roads[target_tl]), 'distance': distances[target_tl]}
+                                  for target_tl in depths if target_tl != source_tl and target_tl in traffic_lights)
+
+    return adjacent_relations
+
+
 class NetworkTopology:
     """
     Network Topology class connection to Neo4J database
@@ -159,47 +223,29 @@ class NetworkTopology:
 
     def create_adjacent_tl_relation(self):
         """
-        Create the "adjacent_to" relation of all the traffic lights of the network
+        Create the "adjacent_to" relation of all the traffic lights of the network. The roads graph is retrieved with a
+        single query, the adjacency is computed in memory and the relations are created with a single batched query.
 
         :return: None
         """
-
         # Get all traffic lights nodes' name
-        traffic_lights = [traffic_light.name for traffic_light in TrafficLight.nodes.all()]
-
-        # Iterate over the traffic lights to generate adjacency
-        for source_tl in traffic_lights:
-            for target_tl in traffic_lights:
-                # If source and destination are not the same
-                if source_tl != target_tl:
-                    # Create the shortest path between two traffic lights query
-                    # Limited to 100 as it is required to define and upper limit
-                    query = "MATCH p = shortestPath((n:TrafficLight {name: '" + source_tl + \
-                            "'})-[:LANE_TO*..100]->(m:TrafficLight {name: '" + target_tl \
-                            + "'})) RETURN nodes(p) as nodes"
-
-                    # Perform the query
-                    results, _ = self._db.cypher_query(query)
-
-                    # Retrieve the junction names of the path between two traffic lights.
-                    # Iterating over the list of results and getting each possible value
-                    path = [Junction.inflate(node).name for result in [result[0] for result in results] for node in
-                            result]
-
-                    # If there exists a path between the traffic lights
-                    if path:
-                        # Remove first and last items from the connected nodes as they are source and target
-                        inner_nodes = path[1:-1]
-
-                        # If there are not any traffic lights on the inner path, both traffic lights are adjacent
-                        if not any(inner_node in traffic_lights for inner_node in inner_nodes):
-                            # Retrieve source and destination nodes
-                            source_node = Junction.nodes.get(name=source_tl)
-                            target_node = Junction.nodes.get(name=target_tl)
-
-                            # Create the relation between adjacent traffic lights -> Store the dict representation
-                            # of the object
-                            source_node.adjacent_to.connect(target_node, AdjacentTLRelation().__dict__).save()
+        results, _ = self._db.cypher_query("MATCH (n:TrafficLight) RETURN n.name")
+        traffic_lights = {result[0] for result in results}
+
+        # Get all the lanes between junctions
+        lanes, _ = self._db.cypher_query("MATCH (n:Junction)-[r:LANE_TO]->(m:Junction) "
+                                         "RETURN n.name, m.name, r.name, toFloat(r.distance)")
+
+        # Compute the adjacent traffic lights along with its roads and distance
+        adjacent_relations = compute_adjacent_traffic_lights(lanes=lanes, traffic_lights=traffic_lights)
+
+        # Create the relations between adjacent traffic lights, with the default values of the remaining properties
+        self._db.cypher_query("UNWIND $relations AS relation "
+                              "MATCH (n:TrafficLight {name: relation.source}), (m:TrafficLight {name: relation.target}) "
+                              "CREATE (n)-[:ADJACENT_TO {num_out_edges: relation.num_out_edges, "
+                              "num_in_edges: relation.num_in_edges, distance: relation.distance, "
+                              "slope: $slope}]->(m)",
+                              {'relations': adjacent_relations, 'slope': AdjacentTLRelation.slope.default})
 
     def create_detector_node_relation(self, detector_info: dict) -> None:
         """
@@ -7,6 +7,8 @@ JUNCTION_TYPE = "traffic_light"
 TL_TYPE = "static"
 TL_LAYOUT = "opposites"
 DEFAULT_TIME_PATTERN_FILE = '../time_patterns/generated_calendar.csv'
+# Maximum number of roads between adjacent traffic lights
+ADJACENCY_MAX_DEPTH = 100
 
 # File path constants
 DEFAULT_DIR = "../config/"
@@ -94,7 +96,14 @@ TRAFFIC_INFO_TOPIC = 'traffic_info'
 TRAFFIC_PREDICTION_TOPIC = 'traffic_prediction'
 TURN_PREDICTION_TOPIC = 'turn_prediction'
 TRAFFIC_ANALYSIS_TOPIC = 'traffic_analysis'
+PROFILING_TOPIC = 'profiling'
+PUBLISHER_TOPIC = 'publisher'
 DEFAULT_QOS = 0
+# Middleware payloads codec: JSON by default, or MessagePack prefixed by a header byte, which is never used by
+# MessagePack and is not valid UTF-8, so the consumers detect the encoding of each payload
+PAYLOAD_ENCODINGS = ['json', 'msgpack']
+DEFAULT_PAYLOAD_ENCODING = 'json'
+MSGPACK_PAYLOAD_HEADER = b'\xc1'
 
 # Topology database constants
 DB_IP_ADDRESS = '172.20.0.9:7687'
@@ -117,6 +126,19 @@ DEFAULT_TOPICS = ['#']
 # Default turn dictionary
 DEFAULT_TURN_DICT = {'turn_prob_right': 0.20, 'turn_prob_left': 0.20, 'turn_prob_forward': 0.60}
 
+# Adaptation approaches and the traffic light components installed on all the traffic lights, shared by the experiments
+# generator and the digital twin runner
+ADAPTATION_APPROACHES = {
+    'no_adaptation': {},
+    'analyzer_no_turn_adaptation': {'traffic_analyzer': 'all'},
+    'analyzer_turn_adaptation': {'traffic_analyzer': 'all', 'turn_predictor': 'all'},
+    'traffic_predictor_no_turn_adaptation': {'traffic_predictor': 'all'},
+    'traffic_predictor_turn_adaptation': {'traffic_predictor': 'all', 'turn_predictor': 'all'},
+    'traffic_predictor_analyzer_no_turn_adaptation': {'traffic_predictor': 'all', 'traffic_analyzer': 'all'},
+    'traffic_predictor_analyzer_turn_adaptation': {'traffic_predictor': 'all', 'turn_predictor': 'all',
+                                                   'traffic_analyzer': 'all'},
+}
+
 # Edge relation properties
 LANE_ATTRIBUTES = ['distance', 'slope', 'max_speed', 'avg_lane_occupancy', 'avg_CO2_emission', 'avg_CO_emission',
                    'avg_HC_emission', 'avg_PMx_emission', 'avg_NOx_emission', 'avg_noise_emission']
\ No newline at end of file
@@ -1,6 +1,7 @@
 import pandas as pd
 
-from sumo_generators.static.constants import DEFAULT_TIME_PATTERN_FILE
+from sumo_generators.static.constants import DEFAULT_TIME_PATTERN_FILE, DATE_FIELDS, DEFAULT_DAY, DEFAULT_DATE_DAY, \
+    DEFAULT_DATE_MONTH, DEFAULT_DATE_YEAR
 
 
 class TimePattern:
@@ -17,6 +18,36 @@ class TimePattern:
         """
         self._pattern = pd.read_csv(file_dir)
 
+        # Compile the calendar, so the date info and traffic type lookups do not access the dataframe
+        self._calendar, self._traffic_types = self.compile_calendar(pattern=self._pattern)
+
+    @staticmethod
+    def compile_calendar(pattern: pd.DataFrame) -> tuple:
+        """
+        Compile the time pattern into a calendar: a tuple with the date record of each hour, with the default values
+        already filled in for the missing date fields, and a tuple with the traffic type of each hour.
+
+        :param pattern: time pattern dataset
+        :type pattern: pd.DataFrame
+        :return: date records and traffic types per hour
+        :rtype: tuple
+        """
+        # Default values of the date fields
+        default_date_info = {'day': DEFAULT_DAY, 'date_day': DEFAULT_DATE_DAY, 'date_month': DEFAULT_DATE_MONTH,
+                             'date_year': DEFAULT_DATE_YEAR}
+
+        # Retrieve the date fields available on the pattern
+        pattern_fields = [field for field in DATE_FIELDS if field in pattern.columns]
+
+        # Create the date records, with native types, overwriting the default values
+        calendar = tuple({**default_date_info, **record}
+                         for record in pattern[pattern_fields].to_dict(orient='records'))
+
+        # Retrieve the traffic types
+        traffic_types = tuple(pattern['traffic_type'].tolist()) if 'traffic_type' in pattern.columns else ()
+
+        return calendar, traffic_types
+
     def retrieve_traffic_type(self, time_pattern_id: int) -> int:
         """
         Retrieve the traffic type given a time_pattern_id.
@@ -26,8 +57,23 @@ class TimePattern:
         :return: traffic type represented as an int
         :rtype int
         """
-        if time_pattern_id < len(self._pattern):
-            return self._pattern.loc[time_pattern_id]['traffic_type']
+        if time_pattern_id < len(self._traffic_types):
+            return self._traffic_types[time_pattern_id]
+
+    def get_date_info(self, simulation_timestep: int) -> dict:
+        """
+        Retrieve the date info given a simulation time step (hour of the pattern) from the compiled calendar, with the
+        default values for the date fields not defined on the pattern.
+
+        :param simulation_timestep: current simulation time step
+        :type simulation_timestep: int
+        :return: date information, empty if the time step is not in the pattern
+        :rtype: dict
+        """
+        if simulation_timestep < len(self._calendar):
+            # Copy the record, so it is not modified by the callers
+            return dict(self._calendar[simulation_timestep])
+        return dict()
 
     def get_pattern_info(self, simulation_timestep: int, fields: list) -> dict:
         """
@@ -77,6 +123,9 @@ class TimePattern:
         # Reset index dataframe, dropping and replacing inplace
         self._pattern.reset_index(drop=True, inplace=True)
 
+        # Compile the calendar of the selected days
+        self._calendar, self._traffic_types = self.compile_calendar(pattern=self._pattern)
+
         return self._pattern
 
     @property
@@ -99,3 +148,24 @@ class TimePattern:
         :return: None
         """
         self._pattern = pattern
+        self._calendar, self._traffic_types = self.compile_calendar(pattern=self._pattern)
+
+    @property
+    def calendar(self) -> tuple:
+        """
+        Compiled calendar getter
+
+        :return: date record of each hour of the time pattern
+        :rtype: tuple
+        """
+        return self._calendar
+
+    @property
+    def traffic_types(self) -> tuple:
+        """
+        Compiled traffic types getter
+
+        :return: traffic type of each hour of the time pattern
+        :rtype: tuple
+        """
+        return self._traffic_types
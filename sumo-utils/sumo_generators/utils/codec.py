@@ -0,0 +1,67 @@
+import json
+
+from sumo_generators.static.constants import PAYLOAD_ENCODINGS, DEFAULT_PAYLOAD_ENCODING, MSGPACK_PAYLOAD_HEADER
+
+# MessagePack is optional, it is only required to encode and decode the MessagePack payloads
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def to_serializable(value):
+    """
+    Convert the values not supported by the encoders, such as NumPy scalars and arrays, to built-in types
+
+    :param value: value to convert
+    :return: built-in value
+    """
+    # NumPy scalars and arrays
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    # Sets
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def encode_payload(payload, encoding: str = DEFAULT_PAYLOAD_ENCODING) -> bytes:
+    """
+    Encode a payload to publish into the middleware
+
+    :param payload: payload, composed of dicts, lists, strings and numbers
+    :param encoding: payload encoding, either 'json' or 'msgpack', which requires the msgpack package. Default to
+        'json'.
+    :type encoding: str
+    :return: encoded payload
+    :rtype: bytes
+    """
+    if encoding not in PAYLOAD_ENCODINGS:
+        raise Exception(f"Payload encoding is not valid. It should be one of {PAYLOAD_ENCODINGS}")
+
+    if encoding == 'msgpack':
+        if msgpack is None:
+            raise Exception("MessagePack payload encoding requested but the msgpack package is not installed")
+        return MSGPACK_PAYLOAD_HEADER + msgpack.packb(payload, default=to_serializable, use_bin_type=True)
+
+    return json.dumps(payload, separators=(',', ':'), default=to_serializable).encode('utf-8')
+
+
+def decode_payload(payload: bytes):
+    """
+    Decode a payload received from the middleware, detecting its encoding by its first byte. The payloads not
+    serialized, such as those delivered by an in-process bus, are returned as they are.
+
+    :param payload: encoded payload
+    :type payload: bytes
+    :return: decoded payload
+    """
+    if not isinstance(payload, (bytes, bytearray)):
+        return payload
+
+    if payload[:1] == MSGPACK_PAYLOAD_HEADER:
+        if msgpack is None:
+            raise Exception("MessagePack payload received but the msgpack package is not installed")
+        return msgpack.unpackb(payload[1:], raw=False, strict_map_key=False)
+
+    return json.loads(payload)
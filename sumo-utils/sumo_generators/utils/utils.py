@@ -23,3 +23,21 @@ def parse_traffic_light_logic_to_str(tl_program: Logic) -> str:
     :rtype: str
     """
     return ';'.join([f"{phase.state},{phase.duration}" for phase in tl_program.getPhases()])
+
+
+def get_traffic_light_logic_digest(tl_program: Logic) -> int:
+    """
+    Get a digest of a traffic light Logic from its program identifier, type and phases (state, durations and next
+    phases), so two programs can be compared without a deep comparison. The current phase index is not included, as
+    it changes along the simulation.
+
+    :param tl_program: traffic light program Logic
+    :type tl_program: Logic
+
+    :return: traffic light program digest
+    :rtype: int
+    """
+    return hash((tl_program.programID, tl_program.type,
+                 tuple((phase.state, phase.duration, phase.minDur, phase.maxDur,
+                        tuple(phase.next) if isinstance(phase.next, (list, tuple)) else phase.next)
+                       for phase in tl_program.getPhases())))
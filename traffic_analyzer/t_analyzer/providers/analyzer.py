@@ -1,10 +1,8 @@
-import ast
-
 import paho.mqtt.client as mqtt
 
 from sumo_generators.static.constants import MQTT_PORT, MQTT_URL, TRAFFIC_ANALYSIS_TOPIC, \
     DEFAULT_TEMPORAL_WINDOW, FLOWS_VALUES, DEFAULT_TOPICS, DEFAULT_QOS, TRAFFIC_TYPES
-from sumo_generators.utils.utils import parse_to_valid_schema
+from sumo_generators.utils.codec import encode_payload, decode_payload
 
 
 def calculate_proportion_value(temporal_window: float) -> float:
@@ -96,7 +94,7 @@ class TrafficAnalyzer:
         :return: None
         """
         # Parse message to dict
-        contextual_lanes_info = ast.literal_eval(msg.payload.decode('utf-8'))['info']
+        contextual_lanes_info = decode_payload(msg.payload)['info']
 
         # Iterate over the contextual lanes info
         for lane_info in contextual_lanes_info:
@@ -104,7 +102,7 @@ class TrafficAnalyzer:
             payload = {lane_info['lane']: self.analyze_current_traffic_flow(passing_veh=lane_info['num_passing_veh'])}
             # Publish the payload
             self._mqtt_client.publish(topic=TRAFFIC_ANALYSIS_TOPIC+'/'+lane_info['tl_id'],
-                                      payload=parse_to_valid_schema(payload))
+                                      payload=encode_payload(payload))
 
     def analyze_current_traffic_flow(self, passing_veh: int) -> int:
         """
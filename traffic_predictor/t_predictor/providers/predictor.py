@@ -1,10 +1,8 @@
-import ast
-
 import paho.mqtt.client as mqtt
 import pandas as pd
 
 from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, TRAFFIC_PREDICTION_TOPIC, DEFAULT_TOPICS, DEFAULT_QOS
-from sumo_generators.utils.utils import parse_to_valid_schema
+from sumo_generators.utils.codec import encode_payload, decode_payload
 from t_predictor.ml.model_predictor import ModelPredictor
 from t_predictor.static.constants import DEFAULT_NUM_MODELS, MODEL_PARSED_VALUES_FILE, COLUMNS_PREDICTOR
 
@@ -81,7 +79,7 @@ class TrafficPredictor:
         """
 
         # Parse message to dict
-        contextual_lanes_info = ast.literal_eval(msg.payload.decode('utf-8'))['info']
+        contextual_lanes_info = decode_payload(msg.payload)['info']
 
         # Iterate over the contextual lanes info
         for lane_info in contextual_lanes_info:
@@ -90,7 +88,7 @@ class TrafficPredictor:
                 lane_info['lane']: self.predict_traffic_type(lane_info=lane_info)}
             # Publish the payload
             self._mqtt_client.publish(topic=TRAFFIC_PREDICTION_TOPIC + '/' + lane_info['tl_id'],
-                                      payload=parse_to_valid_schema(payload))
+                                      payload=encode_payload(payload))
 
     def predict_traffic_type(self, lane_info: dict) -> int:
         """
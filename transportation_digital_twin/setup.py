@@ -1,3 +1,3 @@
 from setuptools import setup, find_packages
 
-setup(name='tdt', version='1.0', packages=find_packages())
+setup(name='tdt', version='1.0', packages=find_packages(), extras_require={'libsumo': ['libsumo==1.15.0']})
@@ -1,16 +1,19 @@
-import ast
+import copy
 
-import paho.mqtt.client as mqtt
-import traci
+import numpy as np
 from traci._trafficlight import Logic
 
 from sumo_generators.network.net_topology import NetworkTopology
-from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, TRAFFIC_INFO_TOPIC, \
-    TRAFFIC_ANALYSIS_TOPIC, TURN_PREDICTION_TOPIC, TRAFFIC_PREDICTION_TOPIC, DEFAULT_QOS
-from sumo_generators.utils.utils import parse_to_valid_schema, parse_traffic_light_logic_to_str
+from sumo_generators.static.constants import TRAFFIC_INFO_TOPIC, TRAFFIC_ANALYSIS_TOPIC, TURN_PREDICTION_TOPIC, \
+    TRAFFIC_PREDICTION_TOPIC
+from sumo_generators.utils.codec import decode_payload
+from sumo_generators.utils.utils import parse_traffic_light_logic_to_str, get_traffic_light_logic_digest
 from t_analyzer.providers.analyzer import TrafficAnalyzer
 from t_predictor.providers.predictor import TrafficPredictor
 from tdt.adaptation.strategy import AdaptationStrategy
+from tdt.static.constants import LANE_METRICS_VARIABLES, DEFAULT_STORAGE_ENGINE
+from tdt.storage.array_storage import ArrayTrafficLightInfoStorage
+from tdt.storage.spill import HistorySpillLog
 from tdt.storage.storage import TrafficLightInfoStorage
 from turns_predictor.providers.predictor import TurnPredictor
 
@@ -21,7 +24,9 @@ class TrafficLightAdapter:
     """
 
     def __init__(self, adaptation_strategy: AdaptationStrategy, net_topology: NetworkTopology, traci, tl_id: str,
-                 mqtt_url: str = MQTT_URL, mqtt_port: int = MQTT_PORT, local: bool = False) -> None:
+                 multiplexer=None, local: bool = False, history_retention: int = None,
+                 history_spill_log: HistorySpillLog = None, storage_engine: str = DEFAULT_STORAGE_ENGINE,
+                 history_persist_dir: str = '') -> None:
         """
         Traffic Light Adapter initializer.
 
@@ -29,15 +34,27 @@ class TrafficLightAdapter:
         :type adaptation_strategy: AdaptationStrategy
         :param net_topology: network topology
         :type net_topology: NetworkTopology
-        :param traci: TraCI instance
+        :param traci: simulation backend instance (TraCI module or connection, or libsumo module)
         :param tl_id: traffic light junction identifier
         :type tl_id: str
-        :param mqtt_url: MQTT middleware broker url. Default to '172.20.0.2'.
-        :type mqtt_url: str
-        :param mqtt_port: MQTT middleware broker port. Default to 1883.
-        :type mqtt_port: int
+        :param multiplexer: MQTT connection shared by the simulator, or local bus on the local mode, routing the
+            adjacent traffic lights information. Default to None, not connected.
+        :type multiplexer: MQTTMultiplexer or LocalBus
         :param local: flag to execute locally the component. It will not connect to the middleware.
         :type local: bool
+        :param history_retention: number of temporal windows kept in memory by the traffic lights storages. Default
+            to None, all of them.
+        :type history_retention: int
+        :param history_spill_log: log where the storages spill the temporal windows evicted from memory. Default to
+            None, they are discarded.
+        :type history_spill_log: HistorySpillLog
+        :param storage_engine: storage engine of the traffic light lanes information, either 'dict' or 'array'. The
+            adjacent traffic lights information is always stored on dicts, as its lanes are not known beforehand.
+            Default to 'dict'.
+        :type storage_engine: str
+        :param history_persist_dir: directory where the traffic light persists the metrics of each closed temporal
+            window, only of its own storage. Default to '', they are not persisted.
+        :type history_persist_dir: str
         """
         # Store the adaptation strategy
         self._adaptation_strategy = adaptation_strategy
@@ -67,49 +84,97 @@ class TrafficLightAdapter:
         self._adjacent_traffic_lights_ids = [tl.name for tl in net_topology.get_adjacent_tls(self._tl_id)]
 
         # Define adjacent traffic light topics to subscribe
-        self._adjacent_traffic_info_topics = [(str(TRAFFIC_INFO_TOPIC + '/' + adjacent_tl_id), DEFAULT_QOS)
+        self._adjacent_traffic_info_topics = [str(TRAFFIC_INFO_TOPIC + '/' + adjacent_tl_id)
                                               for adjacent_tl_id in self._adjacent_traffic_lights_ids]
 
+        # Store the spill log shared by the storages, attached again to those restored from a checkpoint
+        self._history_spill_log = history_spill_log
+
         # Create a traffic light info dict with adjacent TL info
-        self._traffic_light_info = {adjacent_tl_id: TrafficLightInfoStorage(tl_id=adjacent_tl_id)
+        self._traffic_light_info = {adjacent_tl_id: TrafficLightInfoStorage(tl_id=adjacent_tl_id,
+                                                                            retention=history_retention,
+                                                                            spill_log=history_spill_log)
                                     for adjacent_tl_id in self._adjacent_traffic_lights_ids}
 
-        # Append local TL info
-        self._traffic_light_info.update({self._tl_id: TrafficLightInfoStorage(tl_id=self._tl_id,
-                                                                              lanes=self._inbound_lanes_names)})
-
-        # Get the waiting time per inbound lane when the traffic light is created
-        self._prev_waiting_time = {lane: 0 for lane in self._inbound_lanes_names}
+        # Append local TL info, stored on the given storage engine
+        storage_class = ArrayTrafficLightInfoStorage if storage_engine == 'array' else TrafficLightInfoStorage
+        self._traffic_light_info.update({self._tl_id: storage_class(tl_id=self._tl_id,
+                                                                    lanes=self._inbound_lanes_names,
+                                                                    retention=history_retention,
+                                                                    spill_log=history_spill_log,
+                                                                    persist_dir=history_persist_dir)})
 
         # Get traffic light related detectors
         self._traffic_light_detectors = net_topology.get_junction_detectors(junction_name=self._tl_id)
 
-        if self._local:
-            self._mqtt_client = None
+        # Traffic light programs and its digests by program identifier, only updated by this adapter programs changes
+        self._programs, self._programs_digests = {}, {}
+
+        # Initialize the simulation sampler and the sampled lanes, detectors and metrics, set once it is attached
+        self._sampler, self._sampled_lanes, self._sampled_detectors, self._sampled_metrics = None, [], [], []
+
+        if multiplexer is None:
+            self._multiplexer = None
         else:
-            # Create the MQTT client, its callbacks and its connection to the broker
-            self._mqtt_client = mqtt.Client()
-            self._mqtt_client.on_connect = self.on_connect
-            self._mqtt_client.on_message = self.on_message
-            self._mqtt_client.connect(mqtt_url, mqtt_port)
-            self._mqtt_client.loop_start()
+            # Route the adjacent traffic lights information through the shared connection or the local bus
+            self._multiplexer = multiplexer
+            self._multiplexer.register(topics=self._adjacent_traffic_info_topics, callback=self.on_message)
 
     """ TRAFFIC LIGHT UTILS """
 
     def get_tl_program(self) -> Logic:
         """
-        Get actual traffic light program from TraCI
+        Get actual traffic light program, retrieving its current program ID from TraCI and the program information from
+        the programs cache
 
         :return: actual traffic light program logic
         :rtype: Logic
         """
-        # Retrieve Traffic Light program from TraCI, first retrieving the current program ID and then the
-        # program information
+        # Retrieve Traffic Light current program ID from TraCI
         tl_program_id = self._traci.trafficlight.getProgram(self._tl_id)
-        # Get the first and unique TL Logic
-        tl_program = [program for program in traci.trafficlight.getAllProgramLogics(self._tl_id)
-                      if program.getSubID() == tl_program_id][0]
-        return tl_program
+
+        # Load all the program logics from TraCI only if the program is not cached
+        if tl_program_id not in self._programs:
+            for program in self._traci.trafficlight.getAllProgramLogics(self._tl_id):
+                self.cache_tl_program(tl_program=program)
+
+        return self._programs[tl_program_id]
+
+    def set_tl_program(self, tl_program: Logic) -> None:
+        """
+        Set a traffic light program on TraCI, which also switches to it, and store it into the programs cache
+
+        :param tl_program: traffic light program logic
+        :type tl_program: Logic
+        :return: None
+        """
+        self._traci.trafficlight.setProgramLogic(self._tl_id, tl_program)
+        self.cache_tl_program(tl_program=tl_program)
+
+    def cache_tl_program(self, tl_program: Logic) -> None:
+        """
+        Store a traffic light program and its digest into the programs cache
+
+        :param tl_program: traffic light program logic
+        :type tl_program: Logic
+        :return: None
+        """
+        self._programs[tl_program.getSubID()] = tl_program
+        self._programs_digests[tl_program.getSubID()] = get_traffic_light_logic_digest(tl_program)
+
+    def get_tl_program_digest(self, tl_program: Logic) -> int:
+        """
+        Get the digest of a traffic light program, from the programs cache if it is the cached one
+
+        :param tl_program: traffic light program logic
+        :type tl_program: Logic
+        :return: traffic light program digest
+        :rtype: int
+        """
+        if self._programs.get(tl_program.getSubID()) is tl_program:
+            return self._programs_digests[tl_program.getSubID()]
+        else:
+            return get_traffic_light_logic_digest(tl_program)
 
     def update_tl_program(self, timestep: int) -> None:
         """
@@ -124,39 +189,59 @@ class TrafficLightAdapter:
                                                                       timestep=timestep,
                                                                       temporal_window=self._cur_temporal_window)
 
-        # Check if the new program is valid and it is not the same as the actual one
-        if new_tl_program and new_tl_program != self._traffic_light_info[self._tl_id].get_traffic_light_program():
+        # Retrieve the actual program
+        actual_tl_program = self._traffic_light_info[self._tl_id].get_traffic_light_program()
+
+        # Check if the new program is valid and it is not the same as the actual one, comparing its digests
+        if new_tl_program and (actual_tl_program is None or (
+                new_tl_program is not actual_tl_program and
+                self.get_tl_program_digest(new_tl_program) != self.get_tl_program_digest(actual_tl_program))):
             # Update new program
-            self._traci.trafficlight.setProgramLogic(self._tl_id, new_tl_program)
+            self.set_tl_program(tl_program=new_tl_program)
 
     """ VEHICLE UTILS """
 
-    def count_passing_vehicles(self) -> None:
+    def attach_sampler(self, sampler) -> None:
         """
-        Update the counters of vehicles passing on each lane, appending them to the list
-        
+        Attach the simulation sampler, storing the indices of the traffic light lanes and detectors on it
+
+        :param sampler: simulation sampler
+        :type sampler: SimulationSampler
         :return: None
         """
+        self._sampler = sampler
 
-        # Iterate over the traffic light detectors
-        for detector in self._traffic_light_detectors:
-            # Road where the detector is placed
-            lane = str(detector).replace('e1detector_', '')
+        # Pairs of lane name and index, and of detector lane name and index
+        self._sampled_lanes = list(zip(self._inbound_lanes_names,
+                                       sampler.retrieve_lanes_indices(self._inbound_lanes_names)))
+        self._sampled_detectors = [(str(detector).replace('e1detector_', ''), index) for detector, index in
+                                   zip(self._traffic_light_detectors,
+                                       sampler.retrieve_detectors_indices(self._traffic_light_detectors))]
 
-            # Get the current passing vehicles
-            cur_veh = set(self._traci.inductionloop.getLastStepVehicleIDs(detector))
+        # Pairs of lane metric name and its row on the sampler lane values
+        self._sampled_metrics = [(name, sampler.variables_rows[variable])
+                                 for name, variable in LANE_METRICS_VARIABLES.items()]
 
-            # Calculate the difference between the sets
-            not_counted_veh = cur_veh - self._traffic_light_info[self._tl_id].vehicles_passed
+        # Rows of the lane metrics and columns of the lanes, so the metrics of all the lanes are retrieved at once
+        self._metrics_rows = np.array([row for _, row in self._sampled_metrics], dtype=np.intp)[:, np.newaxis]
+        self._lanes_columns = np.array([index for _, index in self._sampled_lanes], dtype=np.intp)
 
-            # If there are no counted vehicles
-            if not_counted_veh:
-                # Append the not counted vehicles
-                self._traffic_light_info[self._tl_id].update_passing_vehicles(passing_veh=not_counted_veh)
+    def count_passing_vehicles(self) -> None:
+        """
+        Update the counters of vehicles passing on each lane with the vehicles entering its detectors on the current
+        step, so only the vehicles of the previous step are kept per detector
 
-                # Add the number of non-counted vehicles
-                self._traffic_light_info[self._tl_id].increase_passing_vehicles(lane=lane,
-                                                                                num_veh=len(not_counted_veh))
+        :return: None
+        """
+        # Retrieve the sampled number of vehicles entering each detector
+        detector_new_vehicles = self._sampler.detector_new_vehicles
+
+        # Iterate over the traffic light detectors, along with the road where the detector is placed
+        for lane, index in self._sampled_detectors:
+            # If there are new vehicles, add them to the lane
+            if detector_new_vehicles[index]:
+                self._traffic_light_info[self._tl_id].increase_passing_vehicles(
+                    lane=lane, num_veh=int(detector_new_vehicles[index]))
 
     def calculate_waiting_time_per_lane(self) -> None:
         """
@@ -164,56 +249,45 @@ class TrafficLightAdapter:
 
         :return: None
         """
-        # Calculate current waiting time
-        current_waiting_time = {lane: self._traci.lane.getWaitingTime(lane) for lane in self._inbound_lanes_names}
+        # Retrieve the sampled waiting time released per lane, calculated with the previous step waiting time
+        released_waiting_time = self._sampler.released_waiting_time
 
         # Iterate over the lanes
-        for lane, waiting_time in current_waiting_time.items():
+        for lane, index in self._sampled_lanes:
             # If the information is valid (there are no more vehicles waiting)
-            if self._prev_waiting_time[lane] > waiting_time:
+            if released_waiting_time[index] > 0:
                 # Append to lane
-                self._traffic_light_info[self._tl_id].increase_waiting_time(lane=lane,
-                                                                            waiting_time=self._prev_waiting_time[lane])
-
-        # Update the previous waiting time to the current waiting time
-        self._prev_waiting_time = current_waiting_time
+                self._traffic_light_info[self._tl_id].increase_waiting_time(
+                    lane=lane, waiting_time=float(released_waiting_time[index]))
 
     def calculate_emissions_per_lane(self) -> None:
         """
-        Calculate the emissions per lane.
+        Calculate the emissions per lane, updating its running statistics on the historical info.
 
-        :return: dict
+        :return: None
         """
-        # Iterate over the lanes
-        for lane in self._inbound_lanes_names:
-
-            # Store lane info dict
-            lane_dict = {'occupancy': self._traci.lane.getLastStepOccupancy(lane),
-                         'CO2_emission': self._traci.lane.getCO2Emission(lane),
-                         'CO_emission': self._traci.lane.getCOEmission(lane),
-                         'HC_emission': self._traci.lane.getHCEmission(lane),
-                         'PMx_emission': self._traci.lane.getPMxEmission(lane),
-                         'NOx_emission': self._traci.lane.getNOxEmission(lane),
-                         'noise_emission': self._traci.lane.getNoiseEmission(lane)}
-
-            # Insert into the historical info
-            for k, v in lane_dict.items():
-                self._traffic_light_info[self._tl_id].append_item_on_list_lane(lane=lane, name=k, value=v)
+        # Update the statistics with the sampled metrics of all the lanes at once
+        self._traffic_light_info[self._tl_id].update_lane_metrics(
+            values=self._sampler.lane_values[self._metrics_rows, self._lanes_columns])
 
     def remove_passing_vehicles(self) -> None:
         """
-        Remove those vehicles that have passed on a edge close to the junction but it is not anymore close
+        Remove those vehicles that have passed on a edge close to the junction but it is not anymore close. Their roads
+        are retrieved by the simulation sampler once per step for all the traffic lights, and those without road (not
+        tracked on a replayed recording) are kept.
 
         :return: None
         """
         # Define a set to remove afterwards
         deleted_vehicles = set()
+        # Retrieve the sampled roads of the tracked vehicles
+        vehicles_roads = self._sampler.vehicles_roads
         # Iterate over the turning vehicles
         for vehicle in self._traffic_light_info[self._tl_id].turning_vehicles_passed:
             # Get vehicle edge
-            cur_edge = self._traci.vehicle.getRoadID(vehicle)
+            cur_edge = vehicles_roads.get(vehicle)
             # Check if the vehicle has passed and it is not in the junction edges
-            if self._traffic_light_info[self._tl_id].is_vehicle_turning_counted(vehicle) and \
+            if cur_edge is not None and self._traffic_light_info[self._tl_id].is_vehicle_turning_counted(vehicle) and \
                     cur_edge not in self._traffic_light_info[self._tl_id].lanes:
                 # Append to deleted vehicles list
                 deleted_vehicles.add(vehicle)
@@ -264,18 +338,6 @@ class TrafficLightAdapter:
         """
         self._traffic_analyzer = traffic_analyzer
 
-    def publish_analyzer_info(self):
-        """
-        Publish the analyzed traffic info into the topic related to the traffic light.
-
-        :return: None
-        """
-        if self._traffic_analyzer:
-            # Parsed dict to str to use the valid schema
-            self._mqtt_client.publish(topic=TRAFFIC_ANALYSIS_TOPIC + '/' + self._tl_id,
-                                      payload=parse_to_valid_schema(
-                                          str({self._tl_id: self._traffic_analyzer.traffic_type})))
-
     def enable_turn_predictor(self, turn_predictor: TurnPredictor) -> None:
         """
         Enable the turn predictor in the traffic light
@@ -286,18 +348,6 @@ class TrafficLightAdapter:
         """
         self._turn_predictor = turn_predictor
 
-    def publish_turn_predictions(self) -> None:
-        """
-        Publish the turn predictions of each road
-
-        :return: None
-        """
-        if self._turn_predictor:
-            # Parsed dict to str to use the valid schema
-            self._mqtt_client.publish(topic=TURN_PREDICTION_TOPIC + '/' + self._tl_id,
-                                      payload=parse_to_valid_schema(
-                                          str({self._tl_id: self._turn_predictor.turn_probabilities})))
-
     def enable_traffic_predictor(self, traffic_predictor: TrafficPredictor) -> None:
         """
         Enable the turn predictor in the traffic light
@@ -308,18 +358,6 @@ class TrafficLightAdapter:
         """
         self._traffic_predictor = traffic_predictor
 
-    def publish_traffic_type_prediction(self) -> None:
-        """
-        Publish the traffic prediction
-
-        :return: None
-        """
-        if self._traffic_predictor:
-            # Parsed dict to str to use the valid schema
-            self._mqtt_client.publish(topic=TRAFFIC_PREDICTION_TOPIC + '/' + self._tl_id,
-                                      payload=parse_to_valid_schema(
-                                          str({self._tl_id: self._traffic_predictor.traffic_type})))
-
     """ TRAFFIC INFO """
 
     def insert_date_info(self, temporal_window: int, date_info: dict) -> None:
@@ -342,19 +380,36 @@ class TrafficLightAdapter:
         self._cur_temporal_window += 1
         self._traffic_light_info[self._tl_id].increase_temporal_window()
 
-    def publish_contextual_info(self, contextual_tl_info: dict) -> None:
+    def retrieve_publish_messages(self, contextual_tl_info: dict) -> list:
         """
-        Publish the traffic light contextual information into the middleware and store it into the db
+        Retrieve the messages to publish into the middleware at the current temporal window: the traffic light
+        contextual information and the information of its enabled components. The payloads are copied, so they can be
+        published once the simulation continues.
 
         :param contextual_tl_info: contextual traffic light info
         :type contextual_tl_info: dict
-        :return: None
+        :return: list of (topic, payload) tuples
+        :rtype: list
         """
-        # If it is deployed
-        if not self._local:
-            # Publish info appending tag 'info' for Telegraf
-            self._mqtt_client.publish(topic=TRAFFIC_INFO_TOPIC + '/' + self._tl_id,
-                                      payload=parse_to_valid_schema(contextual_tl_info))
+        # Contextual info, which has the tag 'info' for Telegraf
+        messages = [(TRAFFIC_INFO_TOPIC + '/' + self._tl_id, contextual_tl_info)]
+
+        # Analyzed traffic info
+        if self._traffic_analyzer:
+            messages.append((TRAFFIC_ANALYSIS_TOPIC + '/' + self._tl_id,
+                             {self._tl_id: self._traffic_analyzer.traffic_type}))
+
+        # Turn predictions of each road
+        if self._turn_predictor:
+            messages.append((TURN_PREDICTION_TOPIC + '/' + self._tl_id,
+                             {self._tl_id: copy.deepcopy(self._turn_predictor.turn_probabilities)}))
+
+        # Traffic type prediction
+        if self._traffic_predictor:
+            messages.append((TRAFFIC_PREDICTION_TOPIC + '/' + self._tl_id,
+                             {self._tl_id: self._traffic_predictor.traffic_type}))
+
+        return messages
 
     def get_traffic_info_by_temporal_window(self, temporal_window: int):
         """
@@ -370,6 +425,31 @@ class TrafficLightAdapter:
         return self._traffic_light_info[self._tl_id].get_processed_contextual_info(temporal_window=
                                                                                    self._cur_temporal_window)
 
+    def get_lanes_columns(self) -> dict:
+        """
+        Get the lanes information of the current temporal window by columns, indexed by lane in inbound lanes order.
+        With the array storage engine, they are views of its arrays.
+
+        :return: passing vehicles and waiting time arrays per lane by field name
+        :rtype: dict
+        """
+        return self._traffic_light_info[self._tl_id].get_lanes_columns(temporal_window=self._cur_temporal_window)
+
+    def get_lanes_totals(self) -> dict:
+        """
+        Get the waiting time and the vehicles passed of the current temporal window added up over the lanes
+        """
+        return self._traffic_light_info[self._tl_id].get_lanes_totals(temporal_window=self._cur_temporal_window)
+
+    def get_lane_metrics_totals(self) -> dict:
+        """
+        Get the lane metrics of the current temporal window added up over the lanes and the steps
+
+        :return: total of each lane metric by name
+        :rtype: dict
+        """
+        return self._traffic_light_info[self._tl_id].get_lane_metrics_totals(temporal_window=self._cur_temporal_window)
+
     def create_historical_traffic_info(self, temporal_window: int, lane_info: dict = None,
                                        actual_program: Logic = None) -> None:
         """
@@ -388,32 +468,51 @@ class TrafficLightAdapter:
                                                                              lane_info=lane_info,
                                                                              actual_program=actual_program)
 
-    """ MIDDLEWARE """
+    """ CHECKPOINTS """
 
-    def on_connect(self, client, userdata, flags, rc):
+    def retrieve_checkpoint_info(self) -> dict:
         """
-        Callback called when the client connects to the broker.
+        Retrieve the traffic light information required to resume the simulation from a checkpoint
 
-        :param client: MQTT client
-        :param userdata: MQTT client data
-        :param flags: MQTT connection flags
-        :param rc: MQTT connection response code
+        :return: traffic light info storages and current temporal window
+        :rtype: dict
+        """
+        return {'traffic_light_info': self._traffic_light_info, 'temporal_window': self._cur_temporal_window}
+
+    def restore_checkpoint_info(self, checkpoint_info: dict) -> None:
+        """
+        Restore the traffic light information from a checkpoint and apply its traffic light program, as the custom
+        programs are not stored in the SUMO simulation state
+
+        :param checkpoint_info: traffic light checkpoint information
+        :type checkpoint_info: dict
         :return: None
         """
-        if rc == 0:  # Connection established
-            # Subscribe to the traffic information of adjacent TL neighbors
-            self._mqtt_client.subscribe(self._adjacent_traffic_info_topics)
+        # Restore traffic info and temporal window
+        self._traffic_light_info = checkpoint_info['traffic_light_info']
+        self._cur_temporal_window = checkpoint_info['temporal_window']
+
+        # Attach the simulator spill log to the restored storages, so all of them share the same log file handle
+        for traffic_light_info in self._traffic_light_info.values():
+            traffic_light_info.attach_spill_log(spill_log=self._history_spill_log)
+
+        # Apply the traffic light program of the current temporal window
+        actual_program = self._traffic_light_info[self._tl_id].get_traffic_light_program()
+        if actual_program:
+            self.set_tl_program(tl_program=actual_program)
+
+    """ MIDDLEWARE """
 
     def on_message(self, client, userdata, msg):
         """
-        Callback called when the client receives a message from to the broker.
+        Callback called by the multiplexer when it receives a message on the adjacent traffic lights topics.
         :param client: MQTT client
         :param userdata: MQTT client data
         :param msg: message received from the middleware
         :return: None
         """
         # Parse message to dict
-        adjacent_contextual_lanes_info = ast.literal_eval(msg.payload.decode('utf-8'))['info']
+        adjacent_contextual_lanes_info = decode_payload(msg.payload)['info']
 
         # Only retrieve those lanes that are connected to the TL
         for adjacent_info in adjacent_contextual_lanes_info:
@@ -429,9 +528,16 @@ class TrafficLightAdapter:
 
     def close_connection(self):
         """
-        Close MQTT client connection
+        Remove the adapter routes from the shared MQTT connection
         """
-        self._mqtt_client.loop_stop()
+        if self._multiplexer:
+            self._multiplexer.unregister(callback=self.on_message)
+
+    def close_history(self):
+        """
+        Close the traffic light storage, persisting its last temporal window if the persistence is enabled
+        """
+        self._traffic_light_info[self._tl_id].close()
 
     """ SETTERS AND GETTERS """
 
@@ -504,6 +610,16 @@ class TrafficLightAdapter:
         """
         return self._traffic_light_info
 
+    @property
+    def window_aggregates(self):
+        """
+        Traffic Light range-aggregate queries over its closed temporal windows getter, such as the passing vehicles per
+        lane over the last windows
+
+        :return: window aggregates instance
+        """
+        return self._traffic_light_info[self._tl_id].window_aggregates
+
     @property
     def temporal_window(self):
         """
@@ -531,3 +647,33 @@ class TrafficLightAdapter:
         :return: traffic light id
         """
         return self._tl_id
+
+    @property
+    def inbound_lanes_names(self) -> list:
+        """
+        Traffic Light inbound lanes names getter
+
+        :return: inbound lanes names
+        :rtype: list
+        """
+        return self._inbound_lanes_names
+
+    @property
+    def traffic_light_detectors(self) -> list:
+        """
+        Traffic Light detectors getter
+
+        :return: detectors identifiers
+        :rtype: list
+        """
+        return self._traffic_light_detectors
+
+    @property
+    def turning_vehicles_passed(self) -> set:
+        """
+        Traffic Light counted turning vehicles getter, whose roads are sampled on each step
+
+        :return: vehicles identifiers
+        :rtype: set
+        """
+        return self._traffic_light_info[self._tl_id].turning_vehicles_passed
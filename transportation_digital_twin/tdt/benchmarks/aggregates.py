@@ -0,0 +1,116 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from tdt.static.constants import DEFAULT_AGGREGATES_NUM_WINDOWS, DEFAULT_AGGREGATES_NUM_LANES, \
+    DEFAULT_AGGREGATES_RANGE, DEFAULT_AGGREGATES_QUERIES
+from tdt.storage.storage import TrafficLightInfoStorage
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the windows range sums per lane of a traffic '
+                                                     'light storage with the prefix sums and scanning the historical '
+                                                     'info dicts.')
+
+    arg_parser.add_argument("--num-windows", dest="num_windows", action="store", type=int,
+                            default=DEFAULT_AGGREGATES_NUM_WINDOWS,
+                            help=f"number of closed temporal windows. Default to {DEFAULT_AGGREGATES_NUM_WINDOWS}")
+    arg_parser.add_argument("--num-lanes", dest="num_lanes", action="store", type=int,
+                            default=DEFAULT_AGGREGATES_NUM_LANES,
+                            help=f"number of lanes of the traffic light. Default to {DEFAULT_AGGREGATES_NUM_LANES}")
+    arg_parser.add_argument("--range", dest="range", action="store", type=int, default=DEFAULT_AGGREGATES_RANGE,
+                            help=f"number of temporal windows of each range query. Default to "
+                                 f"{DEFAULT_AGGREGATES_RANGE}")
+    arg_parser.add_argument("--queries", dest="queries", action="store", type=int, default=DEFAULT_AGGREGATES_QUERIES,
+                            help=f"number of range queries. Default to {DEFAULT_AGGREGATES_QUERIES}")
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+def fill_storage(num_windows: int, num_lanes: int) -> TrafficLightInfoStorage:
+    """
+    Fill a traffic light storage with random passing vehicles and waiting time per lane on each temporal window
+
+    :param num_windows: number of closed temporal windows
+    :type num_windows: int
+    :param num_lanes: number of lanes
+    :type num_lanes: int
+    :return: traffic light storage
+    :rtype: TrafficLightInfoStorage
+    """
+    lanes = [f'c0_l{index}_0' for index in range(num_lanes)]
+    storage = TrafficLightInfoStorage(tl_id='c0', lanes=lanes)
+
+    for _ in range(num_windows):
+        for lane in lanes:
+            storage.increase_passing_vehicles(lane=lane, num_veh=random.randint(0, 50))
+            storage.increase_waiting_time(lane=lane, waiting_time=random.uniform(0.0, 500.0))
+
+        # Close the temporal window and create the next one
+        storage.increase_temporal_window()
+        storage.create_historical_traffic_info(temporal_window=storage.cur_temporal_window)
+
+    return storage
+
+
+def scan_sum(storage: TrafficLightInfoStorage, start_window: int, end_window: int) -> np.ndarray:
+    """
+    Sum the passing vehicles per lane over a windows range scanning the historical info dicts
+
+    :param storage: traffic light storage
+    :type storage: TrafficLightInfoStorage
+    :param start_window: first temporal window of the range
+    :type start_window: int
+    :param end_window: temporal window following the last one of the range
+    :type end_window: int
+    :return: passing vehicles per lane (in lanes order)
+    :rtype: np.ndarray
+    """
+    lanes_sums = dict.fromkeys(storage.lanes, 0)
+    for temporal_window in range(start_window, end_window):
+        contextual_info = storage.get_traffic_info_by_temporal_window(temporal_window)['contextual_info']
+        for lane, lane_info in contextual_info.items():
+            lanes_sums[lane] += lane_info['num_passing_veh']
+
+    return np.array([lanes_sums[lane] for lane in storage.lanes])
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    random.seed(0)
+    storage = fill_storage(num_windows=exec_options.num_windows, num_lanes=exec_options.num_lanes)
+
+    # Random windows ranges, the same for both methods
+    ranges = [(start_window, start_window + exec_options.range) for start_window in
+              (random.randint(0, max(exec_options.num_windows - exec_options.range, 0))
+               for _ in range(exec_options.queries))]
+
+    start_time = time.perf_counter()
+    prefix_sums = [storage.window_aggregates.sum('num_passing_veh', start_window=start_window, end_window=end_window)
+                   for start_window, end_window in ranges]
+    prefix_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    scan_sums = [scan_sum(storage=storage, start_window=start_window, end_window=end_window)
+                 for start_window, end_window in ranges]
+    scan_time = time.perf_counter() - start_time
+
+    # Both methods must give the same sums
+    equal = all(np.array_equal(prefix_sum, scan_sum_) for prefix_sum, scan_sum_ in zip(prefix_sums, scan_sums))
+
+    print(f"prefix sums | queries/s: {exec_options.queries / prefix_time if prefix_time else 0.0:>12.2f}")
+    print(f"dicts scan  | queries/s: {exec_options.queries / scan_time if scan_time else 0.0:>12.2f}")
+    print(f"speedup: {scan_time / prefix_time if prefix_time else 0.0:.2f} | same sums: {equal}")
@@ -0,0 +1,99 @@
+import argparse
+import ast
+import time
+
+from sumo_generators.utils.codec import encode_payload, decode_payload, msgpack
+from sumo_generators.utils.utils import parse_to_valid_schema
+from tdt.static.constants import DEFAULT_CODEC_NUM_LANES, DEFAULT_CODEC_ITERATIONS
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the encode and decode throughput of the '
+                                                     'middleware payloads with the previous string schema, JSON and '
+                                                     'MessagePack.')
+
+    arg_parser.add_argument("--num-lanes", dest="num_lanes", action="store", type=int,
+                            default=DEFAULT_CODEC_NUM_LANES,
+                            help=f"number of lanes of the traffic information payload. Default to "
+                                 f"{DEFAULT_CODEC_NUM_LANES}")
+    arg_parser.add_argument("-n", "--iterations", dest="iterations", action="store", type=int,
+                            default=DEFAULT_CODEC_ITERATIONS,
+                            help=f"number of encode and decode iterations. Default to {DEFAULT_CODEC_ITERATIONS}")
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+def generate_payload(num_lanes: int) -> dict:
+    """
+    Generate a traffic information payload with the same schema as the published by the traffic lights
+
+    :param num_lanes: number of lanes
+    :type num_lanes: int
+    :return: traffic information payload
+    :rtype: dict
+    """
+    return {'info': [{'tl_id': f'c{index // 4}', 'lane': f'c{index // 4}_n{index % 4}_0', 'num_passing_veh': index,
+                      'waiting_time_veh': index * 1.5, 'avg_occupancy': 0.25, 'avg_CO2_emission': 1234.5,
+                      'avg_noise_emission': 60.0, 'date_day': 1, 'date_month': 1, 'date_year': 2023,
+                      'day_of_week': 0, 'hour': 8, 'minute': 30} for index in range(num_lanes)]}
+
+
+def measure_codec(encode_function, decode_function, payload: dict, iterations: int) -> dict:
+    """
+    Measure the encode and decode throughput of a codec
+
+    :param encode_function: function encoding the payload
+    :type encode_function: function
+    :param decode_function: function decoding the encoded payload
+    :type decode_function: function
+    :param payload: payload to encode
+    :type payload: dict
+    :param iterations: number of encode and decode iterations
+    :type iterations: int
+    :return: encoded size in bytes and encoded and decoded payloads per second
+    :rtype: dict
+    """
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        encoded_payload = encode_function(payload)
+    encode_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        decode_function(encoded_payload)
+    decode_time = time.perf_counter() - start_time
+
+    return {'size': len(encoded_payload), 'encode_per_second': iterations / encode_time if encode_time else 0.0,
+            'decode_per_second': iterations / decode_time if decode_time else 0.0}
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    payload = generate_payload(num_lanes=exec_options.num_lanes)
+
+    # Previous string schema, literal evaluated by the consumers, and the codec encodings
+    codecs = {'string': (lambda value: parse_to_valid_schema(value).encode('utf-8'),
+                         lambda value: ast.literal_eval(value.decode('utf-8'))),
+              'json': (lambda value: encode_payload(value, encoding='json'), decode_payload)}
+
+    # MessagePack is optional
+    if msgpack is not None:
+        codecs['msgpack'] = (lambda value: encode_payload(value, encoding='msgpack'), decode_payload)
+
+    for name, (encode_function, decode_function) in codecs.items():
+        results = measure_codec(encode_function=encode_function, decode_function=decode_function, payload=payload,
+                                iterations=exec_options.iterations)
+
+        print(f"{name:<8} | size: {results['size']:>8} B | encode/s: {results['encode_per_second']:>10.2f} | "
+              f"decode/s: {results['decode_per_second']:>10.2f}")
@@ -0,0 +1,50 @@
+import argparse
+
+from tdt.benchmarks.utils import add_simulation_arguments, get_topology_database_params, run_simulation
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the steps per second of the microscopic and '
+                                                     'the mesoscopic simulations of the same network, such as a large '
+                                                     'OSM network.')
+
+    # Add simulation and topology database arguments
+    add_simulation_arguments(arg_parser)
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    # Run the same simulation on the microscopic and the mesoscopic modes
+    microscopic_results = None
+    for mesoscopic in [False, True]:
+        results = run_simulation(config_file=exec_options.config_file, time_pattern_file=exec_options.time_pattern,
+                                 topology_database_params=get_topology_database_params(exec_options),
+                                 load_vehicles_dir=exec_options.load_vehicles_dir, mesoscopic=mesoscopic)
+
+        # Speedup over the microscopic simulation
+        microscopic_results = microscopic_results or results
+        speedup = results['steps_per_second'] / microscopic_results['steps_per_second'] \
+            if microscopic_results['steps_per_second'] else 0.0
+
+        # Summary information, to compare the monitoring of both modes
+        summary_info = results['summary_info']
+        waiting_time_per_veh = summary_info['waiting_time'] / summary_info['veh_passed'] \
+            if summary_info['veh_passed'] else 0.0
+
+        print(f"{'mesoscopic' if mesoscopic else 'microscopic':<12} | traffic lights: "
+              f"{results['num_traffic_lights']:>4} | steps: {results['steps']:>7} | "
+              f"steps/s: {results['steps_per_second']:>9.2f} | speedup: {speedup:>5.2f} | "
+              f"vehicles passed: {summary_info['veh_passed']:>7} | waiting time/veh: {waiting_time_per_veh:>8.2f}")
@@ -0,0 +1,38 @@
+import argparse
+import tempfile
+
+from tdt.benchmarks.utils import add_simulation_arguments, get_topology_database_params, run_simulation
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the steps per second of a live simulation '
+                                                     'recording its observations and of the replay of the recording.')
+
+    # Add simulation and topology database arguments
+    add_simulation_arguments(arg_parser)
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    with tempfile.TemporaryDirectory() as record_dir:
+        # Run the live simulation recording its observations and then replay them
+        for name, simulator_params in [('live', {'record_dir': record_dir}), ('replay', {'replay_dir': record_dir})]:
+            results = run_simulation(config_file=exec_options.config_file, time_pattern_file=exec_options.time_pattern,
+                                     topology_database_params=get_topology_database_params(exec_options),
+                                     load_vehicles_dir=exec_options.load_vehicles_dir, **simulator_params)
+
+            print(f"{name:<7} | traffic lights: {results['num_traffic_lights']:>4} | steps: {results['steps']:>7} | "
+                  f"steps/s: {results['steps_per_second']:>9.2f}")
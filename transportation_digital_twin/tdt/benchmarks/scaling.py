@@ -0,0 +1,201 @@
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sumo_generators.generators.utils import generate_network_file, generate_sumo_config_file, generate_flow_file
+from sumo_generators.network.net_topology import NetworkTopology
+from sumo_generators.static.constants import DEFAULT_NODES_FILENAME, DEFAULT_EDGES_FILENAME, DEFAULT_NET_FILENAME, \
+    DEFAULT_ROUTE_FILENAME, DEFAULT_CONFIG_FILENAME
+from tdt.benchmarks.utils import add_topology_database_arguments, get_topology_database_params, run_simulation
+from tdt.static.argparse_types import check_file
+from tdt.static.constants import DEFAULT_SCALING_MIN_SIZE, DEFAULT_SCALING_MAX_SIZE, DEFAULT_SCALING_SEED, \
+    DEFAULT_SCALING_OUTPUT_DIR, DEFAULT_SCALING_OUTPUT_FILE
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark measuring how the digital twin scales with the grid '
+                                                     'network size: steps per second, initialization time and peak '
+                                                     'memory per grid size.')
+
+    # Add topology database arguments
+    add_topology_database_arguments(arg_parser)
+
+    # Scaling group params
+    scaling_group = arg_parser.add_argument_group("Scaling options", description="Parameters related to the grid "
+                                                                                 "sizes and the results")
+    scaling_group.add_argument("-t", "--time-pattern", dest="time_pattern", metavar='FILE', action="store",
+                               type=check_file, required=True,
+                               help="time pattern input file used to generate the flows of all the grids. Short "
+                                    "patterns (a few hours) are recommended.")
+    scaling_group.add_argument("--min-size", dest="min_size", action="store", type=int,
+                               default=DEFAULT_SCALING_MIN_SIZE,
+                               help=f"smallest grid size (rows and cols). Default to {DEFAULT_SCALING_MIN_SIZE}")
+    scaling_group.add_argument("--max-size", dest="max_size", action="store", type=int,
+                               default=DEFAULT_SCALING_MAX_SIZE,
+                               help=f"largest grid size (rows and cols). Default to {DEFAULT_SCALING_MAX_SIZE}")
+    scaling_group.add_argument("--seed", dest="seed", action="store", type=int, default=DEFAULT_SCALING_SEED,
+                               help=f"random seed of the flows, routes and SUMO. Default to {DEFAULT_SCALING_SEED}")
+    scaling_group.add_argument("--output-dir", dest="output_dir", action="store", default=DEFAULT_SCALING_OUTPUT_DIR,
+                               help="directory where the grid networks are generated. Default to "
+                                    f"{DEFAULT_SCALING_OUTPUT_DIR}")
+    scaling_group.add_argument("-o", "--output-file", dest="output_file", action="store",
+                               default=DEFAULT_SCALING_OUTPUT_FILE,
+                               help=f"results output JSON file. Default to {DEFAULT_SCALING_OUTPUT_FILE}")
+    scaling_group.add_argument("--baseline", dest="baseline", action="store", type=check_file, default='',
+                               help="results JSON file of a previous execution to compare with.")
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+
+    # Check the grid sizes are valid
+    if not 0 < args.min_size <= args.max_size:
+        arg_parser.error("grid sizes must be greater than 0 and --min-size must not be greater than --max-size")
+
+    return args
+
+
+def generate_grid_scenario(size: int, output_dir: str, time_pattern_file: str, topology_database_params: dict,
+                           seed: int) -> str:
+    """
+    Generate a grid network of the given size, load its topology into the database and generate its routes
+
+    :param size: number of rows and cols of the grid, without the outer edges
+    :type size: int
+    :param output_dir: directory where the grid files are generated
+    :type output_dir: str
+    :param time_pattern_file: time pattern input file used to generate the flows
+    :type time_pattern_file: str
+    :param topology_database_params: topology database connection parameters
+    :type topology_database_params: dict
+    :param seed: random seed of the flows and the routes
+    :type seed: int
+    :return: SUMO configuration file of the grid
+    :rtype: str
+    """
+    # Create the grid directory
+    grid_dir = f"{output_dir.rstrip('/')}/grid_{size}x{size}/"
+    Path(grid_dir).mkdir(parents=True, exist_ok=True)
+
+    config_file, network_file, routes_file = grid_dir + DEFAULT_CONFIG_FILENAME, grid_dir + DEFAULT_NET_FILENAME, \
+        grid_dir + DEFAULT_ROUTE_FILENAME
+
+    # Generate the network file -> Added 2 to the network columns, as on the grid topology generator
+    generate_network_file(rows=size + 2, cols=size + 2, nodes_path=grid_dir + DEFAULT_NODES_FILENAME,
+                          edges_path=grid_dir + DEFAULT_EDGES_FILENAME, network_path=network_file)
+
+    # Generate the SUMO config file
+    generate_sumo_config_file(sumo_config_path=config_file, network_path=network_file)
+
+    # Load the topology into the database and generate the detectors
+    subprocess.run([sys.executable, '-m', 'sumo_generators.topology_loader', '--nogui', '-c', config_file,
+                    '--topology-db-ip', topology_database_params['ip_address'],
+                    '--topology-db-user', topology_database_params['user'],
+                    '--topology-db-password', topology_database_params['password']], check=True)
+
+    # Generate the flows with a fixed seed
+    net_topology = NetworkTopology(ip_address=topology_database_params['ip_address'],
+                                   user=topology_database_params['user'],
+                                   password=topology_database_params['password'], traci=None)
+    random.seed(seed)
+    generate_flow_file(flows_path=routes_file, time_pattern_path=time_pattern_file, net_topology=net_topology)
+    net_topology.close()
+
+    # Generate the routes from the flows with the default turn ratios and the same seed
+    subprocess.run(['jtrrouter', f'--route-files={routes_file}.flows', f'--net-file={network_file}',
+                    f'--output-file={routes_file}', '--accept-all-destinations', '--seed', str(seed)], check=True)
+
+    return config_file
+
+
+def measure_grid_scenario(config_file: str, routes_file: str, time_pattern_file: str, topology_database_params: dict,
+                          seed: int) -> dict:
+    """
+    Run the simulation of a grid scenario and retrieve its measurements along with the peak memory. It is executed on a
+    new process so the peak memory is not shared between grid sizes.
+
+    :param config_file: SUMO configuration file of the grid
+    :type config_file: str
+    :param routes_file: routes file of the grid
+    :type routes_file: str
+    :param time_pattern_file: time pattern input file
+    :type time_pattern_file: str
+    :param topology_database_params: topology database connection parameters
+    :type topology_database_params: dict
+    :param seed: SUMO random seed
+    :type seed: int
+    :return: benchmark measurements
+    :rtype: dict
+    """
+    # Set the seed so all the random decisions of the digital twin are the same between executions
+    random.seed(seed)
+
+    results = run_simulation(config_file=config_file, time_pattern_file=time_pattern_file,
+                             topology_database_params=topology_database_params, load_vehicles_dir=routes_file,
+                             seed=seed)
+
+    # Peak resident set size in KB of the digital twin process and of the SUMO process (on Linux)
+    results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['sumo_peak_rss_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return results
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    topology_database_params = get_topology_database_params(exec_options)
+
+    # Retrieve the baseline results by grid size
+    if exec_options.baseline:
+        with open(exec_options.baseline, 'r') as baseline_file:
+            baseline = {result['size']: result for result in json.load(baseline_file)['results']}
+    else:
+        baseline = {}
+
+    results = []
+    for size in range(exec_options.min_size, exec_options.max_size + 1):
+        # Generate the grid scenario. Sizes are executed sequentially as all of them share the topology database
+        config_file = generate_grid_scenario(size=size, output_dir=exec_options.output_dir,
+                                             time_pattern_file=exec_options.time_pattern,
+                                             topology_database_params=topology_database_params, seed=exec_options.seed)
+
+        # Measure the grid scenario on a new process
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(measure_grid_scenario, config_file=config_file,
+                                     routes_file=config_file.replace(DEFAULT_CONFIG_FILENAME, DEFAULT_ROUTE_FILENAME),
+                                     time_pattern_file=exec_options.time_pattern,
+                                     topology_database_params=topology_database_params,
+                                     seed=exec_options.seed).result()
+
+        result['size'] = size
+        results.append(result)
+
+        # Compare the steps per second with the baseline
+        if size in baseline and baseline[size]['steps_per_second']:
+            comparison = f" | vs baseline: " \
+                         f"{result['steps_per_second'] / baseline[size]['steps_per_second'] - 1:>+7.1%}"
+        else:
+            comparison = ''
+
+        print(f"grid {size:>2}x{size:<2} | traffic lights: {result['num_traffic_lights']:>4} | "
+              f"steps/s: {result['steps_per_second']:>9.2f} | init: {result['initialization_time']:>7.2f} s | "
+              f"peak RSS: {result['peak_rss_kb'] / 1024:>8.1f} MB | "
+              f"SUMO peak RSS: {result['sumo_peak_rss_kb'] / 1024:>8.1f} MB{comparison}")
+
+    # Store the results
+    with open(exec_options.output_file, 'w') as output_file:
+        json.dump({'seed': exec_options.seed, 'time_pattern': exec_options.time_pattern, 'results': results},
+                  output_file, indent=4)
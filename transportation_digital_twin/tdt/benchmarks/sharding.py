@@ -0,0 +1,67 @@
+import argparse
+import json
+
+from sumolib import checkBinary
+
+from tdt.benchmarks.utils import add_simulation_arguments, get_topology_database_params
+from tdt.providers.sharding import run_sharded_simulation
+from tdt.static.constants import DEFAULT_SHARDING_MAX_CLIENTS, DEFAULT_SHARDING_OUTPUT_FILE
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the steps per second of a simulation whose '
+                                                     'traffic lights control is sharded across 1 to N TraCI clients.')
+
+    # Add simulation and topology database arguments
+    add_simulation_arguments(arg_parser)
+
+    # Sharding group params
+    sharding_group = arg_parser.add_argument_group("Sharding options", description="Parameters related to the "
+                                                                                   "number of clients")
+    sharding_group.add_argument("--max-clients", dest="max_clients", action="store", type=int,
+                                default=DEFAULT_SHARDING_MAX_CLIENTS,
+                                help=f"maximum number of TraCI clients. Default to {DEFAULT_SHARDING_MAX_CLIENTS}")
+    sharding_group.add_argument("--subscriptions", action="store_true", default=False, dest="subscriptions",
+                                help="monitor the traffic lights using TraCI variable subscriptions.")
+    sharding_group.add_argument("-o", "--output-file", dest="output_file", action="store",
+                                default=DEFAULT_SHARDING_OUTPUT_FILE,
+                                help=f"results output JSON file. Default to {DEFAULT_SHARDING_OUTPUT_FILE}")
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    results = []
+    for num_clients in range(1, exec_options.max_clients + 1):
+        # Run the simulation sharded across the given number of clients
+        result = run_sharded_simulation(sumo_conf={'config_file': exec_options.config_file,
+                                                   'sumo_binary': checkBinary('sumo')},
+                                        topology_database_params=get_topology_database_params(exec_options),
+                                        num_clients=num_clients, time_pattern_file=exec_options.time_pattern,
+                                        load_vehicles_dir=exec_options.load_vehicles_dir,
+                                        subscriptions=exec_options.subscriptions)
+        results.append(result)
+
+        # Speedup over a single client, along with the waiting time per vehicle to check the results match
+        speedup = result['steps_per_second'] / results[0]['steps_per_second'] \
+            if results[0]['steps_per_second'] else 0.0
+
+        print(f"clients: {num_clients:>2} | traffic lights: {result['num_traffic_lights']:>4} | "
+              f"steps/s: {result['steps_per_second']:>9.2f} | speedup: {speedup:>5.2f} | "
+              f"waiting time/veh: {result['waiting_time_per_veh']:>8.2f}")
+
+    # Store the results
+    with open(exec_options.output_file, 'w') as output_file:
+        json.dump({'time_pattern': exec_options.time_pattern, 'results': results}, output_file, indent=4)
@@ -0,0 +1,37 @@
+import argparse
+
+from tdt.benchmarks.utils import add_simulation_arguments, get_topology_database_params, run_simulation
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Benchmark comparing the steps per second of the traffic lights '
+                                                     'monitoring with TraCI getters and with TraCI subscriptions.')
+
+    # Add simulation and topology database arguments
+    add_simulation_arguments(arg_parser)
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    # Run the same simulation monitoring with getters and with subscriptions
+    for subscriptions in [False, True]:
+        results = run_simulation(config_file=exec_options.config_file, time_pattern_file=exec_options.time_pattern,
+                                 topology_database_params=get_topology_database_params(exec_options),
+                                 load_vehicles_dir=exec_options.load_vehicles_dir, subscriptions=subscriptions)
+
+        print(f"{'subscriptions' if subscriptions else 'getters':<14} | traffic lights: "
+              f"{results['num_traffic_lights']:>4} | steps: {results['steps']:>7} | "
+              f"steps/s: {results['steps_per_second']:>9.2f}")
@@ -0,0 +1,113 @@
+import argparse
+import time
+
+from sumolib import checkBinary
+
+from sumo_generators.static.constants import DB_USER, DB_PASSWORD, DB_IP_ADDRESS
+from tdt.providers.traci_sim import TraCISimulator
+from tdt.static.argparse_types import check_file
+from tdt.static.constants import DEFAULT_CONFIG_FILE
+
+
+def add_simulation_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the simulation and topology database arguments shared by the benchmarks over a given network
+
+    :param arg_parser: benchmark argument parser
+    :type arg_parser: argparse.ArgumentParser
+    :return: None
+    """
+    # Simulation group params
+    simulation_group = arg_parser.add_argument_group("Simulation options", description="Parameters related to the "
+                                                                                       "simulation")
+    simulation_group.add_argument("-c", "--config", dest="config_file", action='store', default=DEFAULT_CONFIG_FILE,
+                                  type=check_file, help=f"sumo configuration file location. Default is "
+                                                        f"{DEFAULT_CONFIG_FILE}")
+    simulation_group.add_argument("-t", "--time-pattern", dest="time_pattern", metavar='FILE', action="store",
+                                  type=check_file, required=True,
+                                  help="time pattern input file. Short patterns (a few hours) are recommended.")
+    simulation_group.add_argument("-l", "--load-vehicles", action="store", default='', dest="load_vehicles_dir",
+                                  type=check_file, help="directory from where the vehicles routes will be load.")
+
+    # Add topology database arguments
+    add_topology_database_arguments(arg_parser)
+
+
+def add_topology_database_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the topology database arguments shared by all the benchmarks
+
+    :param arg_parser: benchmark argument parser
+    :type arg_parser: argparse.ArgumentParser
+    :return: None
+    """
+    # Network topology database params
+    network_topology_group = arg_parser.add_argument_group("Network topology database options",
+                                                           description="Parameters related to the network topology "
+                                                                       "database connection")
+    network_topology_group.add_argument("--topology-db-ip", action="store", dest="topology_db_ip",
+                                        type=str, default=DB_IP_ADDRESS,
+                                        help=f"topology database ip address with port. Default to {DB_IP_ADDRESS}")
+    network_topology_group.add_argument("--topology-db-user", action="store", dest="topology_db_user",
+                                        type=str, default=DB_USER, help=f"topology database user. Default to {DB_USER}")
+    network_topology_group.add_argument("--topology-db-password", action="store", dest="topology_db_password",
+                                        type=str, default=DB_PASSWORD,
+                                        help=f"topology database user password. Default to {DB_PASSWORD}")
+
+
+def get_topology_database_params(exec_options: argparse.Namespace) -> dict:
+    """
+    Create the topology database connection parameters from the benchmark options
+
+    :param exec_options: benchmark execution options
+    :type exec_options: argparse.Namespace
+    :return: topology database connection parameters
+    :rtype: dict
+    """
+    return {'ip_address': exec_options.topology_db_ip, 'user': exec_options.topology_db_user,
+            'password': exec_options.topology_db_password}
+
+
+def run_simulation(config_file: str, time_pattern_file: str, topology_database_params: dict,
+                   load_vehicles_dir: str = '', seed: int = None, **simulator_params) -> dict:
+    """
+    Run a headless and local simulation measuring its initialization and simulation wall times
+
+    :param config_file: SUMO configuration file
+    :type config_file: str
+    :param time_pattern_file: time pattern input file
+    :type time_pattern_file: str
+    :param topology_database_params: topology database connection parameters
+    :type topology_database_params: dict
+    :param load_vehicles_dir: directory to load the vehicles flows. Default to ''.
+    :type load_vehicles_dir: str
+    :param seed: SUMO random number generator seed. Default to None, using the SUMO default seed.
+    :type seed: int
+    :param simulator_params: additional TraCISimulator parameters
+    :return: benchmark measurements
+    :rtype: dict
+    """
+    # Create the simulator without GUI and without middleware connection
+    traci_sim = TraCISimulator(sumo_conf={'config_file': config_file, 'sumo_binary': checkBinary('sumo')},
+                               time_pattern_file=time_pattern_file, local=True, **simulator_params)
+
+    # Get simulation params
+    simulation_params = traci_sim.retrieve_simulation_params(load_vehicles_dir=load_vehicles_dir, seed=seed)
+
+    # Measure the topology initialization (database connection and adapters creation)
+    start_time = time.perf_counter()
+    traci_sim.initialize_simulation_topology(simulation_params=simulation_params,
+                                             topology_database_params=topology_database_params)
+    initialization_time = time.perf_counter() - start_time
+
+    # Measure the simulation loop
+    start_time = time.perf_counter()
+    traci_sim.simulate()
+    simulation_time = time.perf_counter() - start_time
+
+    return {'num_traffic_lights': len(traci_sim.traffic_lights),
+            'steps': traci_sim.cur_timestep,
+            'summary_info': traci_sim.summary_info,
+            'initialization_time': initialization_time,
+            'simulation_time': simulation_time,
+            'steps_per_second': traci_sim.cur_timestep / simulation_time if simulation_time else 0.0}
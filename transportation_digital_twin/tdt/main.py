@@ -6,8 +6,11 @@ import tdt.static.constants as cnt
 from sumolib import checkBinary
 
 from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, DB_USER, DB_PASSWORD, DB_IP_ADDRESS, \
-    DEFAULT_TEMPORAL_WINDOW
+    DEFAULT_TEMPORAL_WINDOW, PROFILING_TOPIC, PAYLOAD_ENCODINGS, DEFAULT_PAYLOAD_ENCODING
+from sumo_generators.utils.codec import msgpack
+from tdt.providers.sharding import run_sharded_simulation
 from tdt.providers.traci_sim import TraCISimulator
+from tdt.providers.utils import find_latest_checkpoint
 from tdt.static.argparse_types import check_file, check_valid_format
 
 
@@ -56,6 +59,107 @@ def get_options():
                                                                "and adaptation process. It is represented as number of "
                                                                "traffic lights cycles. Default to "
                                                                f"{DEFAULT_TEMPORAL_WINDOW}")
+    simulation_group.add_argument("--subscriptions", action="store_true", default=False, dest="subscriptions",
+                                  help="monitor the traffic lights using TraCI variable subscriptions, retrieving all "
+                                       "the lanes and detectors information in bulk on each step. Default to False.")
+    simulation_group.add_argument("--mesosim", action="store_true", default=False, dest="mesoscopic",
+                                  help="run the mesoscopic simulation, faster but less accurate. The lanes variables are "
+                                       "retrieved from its edges, keeping the published information schema. Default "
+                                       "to False.")
+    simulation_group.add_argument("--backend", action="store", default=cnt.DEFAULT_SIMULATION_BACKEND, dest="backend",
+                                  choices=cnt.SIMULATION_BACKENDS,
+                                  help="simulation backend. 'traci' connects to SUMO through a socket and 'libsumo' "
+                                       "runs SUMO in the same process, only available with --nogui. Default to "
+                                       f"{cnt.DEFAULT_SIMULATION_BACKEND}")
+
+    # Adaptation group params
+    adaptation_group = arg_parser.add_argument_group("Adaptation options", description="Parameters related to when "
+                                                                                       "the traffic lights are adapted")
+    adaptation_group.add_argument("--adaptation-mode", action="store", default=cnt.DEFAULT_ADAPTATION_MODE,
+                                  dest="adaptation_mode", choices=cnt.ADAPTATION_MODES,
+                                  help="adapt and publish all the traffic lights each temporal window (periodic) or "
+                                       "each traffic light when the smoothed occupancy of its lanes changes or its "
+                                       f"information is stale (event). Default to {cnt.DEFAULT_ADAPTATION_MODE}")
+    adaptation_group.add_argument("--event-threshold", action="store", default=cnt.DEFAULT_EVENT_THRESHOLD,
+                                  dest="event_threshold", type=float,
+                                  help="relative change of the smoothed occupancy since the last adaptation that "
+                                       f"triggers a new one on the event mode. Default to {cnt.DEFAULT_EVENT_THRESHOLD}")
+    adaptation_group.add_argument("--event-min-cycles", action="store", default=cnt.DEFAULT_EVENT_MIN_CYCLES,
+                                  dest="event_min_cycles", type=int,
+                                  help="minimum number of traffic light cycles between the adaptations of a traffic "
+                                       f"light on the event mode. Default to {cnt.DEFAULT_EVENT_MIN_CYCLES}")
+    adaptation_group.add_argument("--event-max-cycles", action="store", default=cnt.DEFAULT_EVENT_MAX_CYCLES,
+                                  dest="event_max_cycles", type=int,
+                                  help="maximum number of traffic light cycles between the adaptations of a traffic "
+                                       f"light on the event mode. Default to {cnt.DEFAULT_EVENT_MAX_CYCLES}")
+
+    # Checkpoints group params
+    checkpoints_group = arg_parser.add_argument_group("Checkpoints options", description="Parameters related to the "
+                                                                                         "simulation checkpoints")
+    checkpoints_group.add_argument("--checkpoint-dir", action="store", default='', dest="checkpoint_dir", type=str,
+                                   help="directory where the simulation checkpoints are stored. Default to '', "
+                                        "meaning that checkpoints are disabled.")
+    checkpoints_group.add_argument("--checkpoint-period", action="store", default=cnt.DEFAULT_CHECKPOINT_PERIOD,
+                                   dest="checkpoint_period", type=int,
+                                   help="number of temporal windows between checkpoints. Default to "
+                                        f"{cnt.DEFAULT_CHECKPOINT_PERIOD}")
+    checkpoints_group.add_argument("--resume", action="store_true", default=False, dest="resume",
+                                   help="resume the simulation from the latest checkpoint of the checkpoint directory.")
+    checkpoints_group.add_argument("--resume-from", action="store", default='', dest="resume_from", type=check_file,
+                                   help="resume the simulation from the given checkpoint file, for example a shared "
+                                        "warm-up state.")
+
+    # Profiling group params
+    profiling_group = arg_parser.add_argument_group("Profiling options", description="Parameters related to the "
+                                                                                     "simulation phases timings")
+    profiling_group.add_argument("--profile", action="store", default='', dest="profile_file", type=str,
+                                 help="JSON file where the cumulative and per temporal window timings of each "
+                                      "simulation phase are dumped at the end. Default to '', meaning that the "
+                                      "profiler is disabled.")
+    profiling_group.add_argument("--profile-publish", action="store_true", default=False, dest="profile_publish",
+                                 help="publish the timings of each temporal window into the middleware "
+                                      f"'{PROFILING_TOPIC}' topic. It also enables the profiler.")
+
+    # Record and replay group params
+    record_group = arg_parser.add_argument_group("Record and replay options", description="Parameters related to the "
+                                                                                         "observations recordings")
+    record_group.add_argument("--record", action="store", default='', dest="record_dir", type=str,
+                              help="directory where the lanes and detectors observations read from TraCI on each step "
+                                   "are recorded, by compressed chunks. Default to '', disabled.")
+    record_group.add_argument("--replay", action="store", default='', dest="replay_dir", type=check_file,
+                              help="directory of an observations recording to replay instead of running SUMO. The "
+                                   "evaluation is open-loop: the adaptation does not change the observations. "
+                                   "Default to '', disabled.")
+
+    # History group params
+    history_group = arg_parser.add_argument_group("History options", description="Parameters related to the traffic "
+                                                                                 "lights historical information")
+    history_group.add_argument("--history-retention", action="store", default=cnt.DEFAULT_HISTORY_RETENTION,
+                               dest="history_retention", type=int,
+                               help="number of temporal windows of historical information kept in memory by each "
+                                    "traffic light, evicting the oldest ones. Default to "
+                                    f"{cnt.DEFAULT_HISTORY_RETENTION}, meaning that all of them are kept.")
+    history_group.add_argument("--history-spill", action="store", default='', dest="history_spill_file", type=str,
+                               help="append-only log file where the evicted temporal windows are spilled, so they can "
+                                    "still be retrieved. Default to '', meaning that they are discarded.")
+    history_group.add_argument("--storage-engine", action="store", default=cnt.DEFAULT_STORAGE_ENGINE,
+                               dest="storage_engine", choices=cnt.STORAGE_ENGINES,
+                               help="storage engine of the traffic lights lanes information: nested dicts (dict) or "
+                                    "NumPy arrays of temporal windows by lanes (array). Default to "
+                                    f"{cnt.DEFAULT_STORAGE_ENGINE}")
+    history_group.add_argument("--history-persist", action="store", default='', dest="history_persist_dir", type=str,
+                               help="directory where each traffic light persists the metrics of its temporal windows "
+                                    "into a binary file with a JSON header, readable as memory-mapped arrays after "
+                                    "the run. Default to '', meaning that they are not persisted.")
+
+    # Sharding group params
+    sharding_group = arg_parser.add_argument_group("Sharding options", description="Parameters related to the traffic "
+                                                                                   "lights control across processes")
+    sharding_group.add_argument("--num-clients", action="store", default=cnt.DEFAULT_NUM_CLIENTS, dest="num_clients",
+                                type=int, help="number of TraCI clients, one per process, connected to SUMO. Each one "
+                                               "monitors and adapts a partition of the traffic lights, keeping the "
+                                               "adjacent ones together. It requires the --local flag and the 'traci' "
+                                               f"backend. Default to {cnt.DEFAULT_NUM_CLIENTS}")
 
     # Middleware group params
     middleware_group = arg_parser.add_argument_group("Middleware options", description="Parameters related to the "
@@ -66,6 +170,20 @@ def get_options():
                                   help=f"middleware broker port. Default is {MQTT_PORT}", default=MQTT_PORT)
     middleware_group.add_argument("--local", dest="local", action="store_true", default=False,
                                   help="run the component locally. It will not connect to middleware.")
+    middleware_group.add_argument("--publisher-policy", dest="publisher_policy", action="store",
+                                  default=cnt.DEFAULT_PUBLISHER_POLICY, choices=cnt.PUBLISHER_POLICIES,
+                                  help="backpressure policy of the asynchronous publisher when its queue is full: "
+                                       "wait for a free slot (block), discard the oldest temporal window "
+                                       "(drop_oldest) or merge it with the newest queued one (coalesce). Default to "
+                                       f"{cnt.DEFAULT_PUBLISHER_POLICY}")
+    middleware_group.add_argument("--publisher-queue-size", dest="publisher_queue_size", action="store", type=int,
+                                  default=cnt.DEFAULT_PUBLISHER_QUEUE_SIZE,
+                                  help="maximum number of temporal windows queued on the asynchronous publisher. "
+                                       f"Default to {cnt.DEFAULT_PUBLISHER_QUEUE_SIZE}")
+    middleware_group.add_argument("--payload-encoding", dest="payload_encoding", action="store",
+                                  default=DEFAULT_PAYLOAD_ENCODING, choices=PAYLOAD_ENCODINGS,
+                                  help="encoding of the published payloads. 'msgpack' requires the msgpack package and "
+                                       f"is not readable by Telegraf. Default to {DEFAULT_PAYLOAD_ENCODING}")
 
     # Traffic light additional components
     tl_components_group = arg_parser.add_argument_group("Traffic Light additional component options",
@@ -98,6 +216,38 @@ def get_options():
 
     # Retrieve the arguments parsed
     args = arg_parser.parse_args()
+
+    # libsumo can not be used along with the SUMO GUI
+    if args.backend == 'libsumo' and not args.nogui:
+        arg_parser.error("libsumo backend requires the --nogui flag")
+
+    # The latest checkpoint is searched on the checkpoints directory
+    if args.resume and not args.checkpoint_dir:
+        arg_parser.error("--resume requires the --checkpoint-dir parameter")
+
+    # A recording is replayed from its beginning, so it can not be recorded from a checkpoint
+    if args.record_dir and (args.replay_dir or args.resume or args.resume_from):
+        arg_parser.error("--record can not be used along with --replay, --resume or --resume-from")
+
+    # The staleness deadline can not be lower than the minimum interval between adaptations
+    if args.event_min_cycles < 1 or args.event_max_cycles < args.event_min_cycles:
+        arg_parser.error("--event-min-cycles must be at least 1 and not greater than --event-max-cycles")
+
+    # The history retention keeps at least the current temporal window
+    if args.history_retention < 0:
+        arg_parser.error("--history-retention must be 0 (all the temporal windows) or greater")
+
+    # The MessagePack payloads can not be encoded without the msgpack package
+    if args.payload_encoding == 'msgpack' and msgpack is None:
+        arg_parser.error("--payload-encoding msgpack requires the msgpack package, install it with 'pip install "
+                         "msgpack'")
+
+    # The traffic lights are sharded across local processes connected to the same SUMO instance
+    if args.num_clients > 1 and (not args.local or args.backend != 'traci' or args.replay_dir or args.record_dir or
+                                 args.checkpoint_dir or args.resume_from or args.history_spill_file):
+        arg_parser.error("--num-clients requires the --local flag and the 'traci' backend, and it can not be used "
+                         "along with the record, replay, checkpoints and history spill parameters")
+
     return args
 
 
@@ -122,26 +272,73 @@ if __name__ == "__main__":
         'sumo_binary': sumo_binary
     }
 
+    # Create a dict with the simulator arguments
+    simulator_args = {
+        'local': exec_options.local,
+        'mqtt_url': exec_options.mqtt_url,
+        'mqtt_port': exec_options.mqtt_port,
+        'subscriptions': exec_options.subscriptions,
+        'mesoscopic': exec_options.mesoscopic,
+        'backend': exec_options.backend,
+        'checkpoint_dir': exec_options.checkpoint_dir,
+        'checkpoint_period': exec_options.checkpoint_period,
+        'profile_file': exec_options.profile_file,
+        'profile_publish': exec_options.profile_publish,
+        'publisher_policy': exec_options.publisher_policy,
+        'publisher_queue_size': exec_options.publisher_queue_size,
+        'payload_encoding': exec_options.payload_encoding,
+        'record_dir': exec_options.record_dir,
+        'replay_dir': exec_options.replay_dir,
+        'adaptation_mode': exec_options.adaptation_mode,
+        'event_threshold': exec_options.event_threshold,
+        'event_min_cycles': exec_options.event_min_cycles,
+        'event_max_cycles': exec_options.event_max_cycles,
+        'history_retention': exec_options.history_retention,
+        'history_spill_file': exec_options.history_spill_file,
+        'storage_engine': exec_options.storage_engine,
+        'history_persist_dir': exec_options.history_persist_dir
+    }
+
+    # Create dict with topology database params
+    topology_database_params = {'ip_address': exec_options.topology_db_ip,
+                                'user': exec_options.topology_db_user,
+                                'password': exec_options.topology_db_password}
+
+    # Shard the traffic lights control across several processes
+    if exec_options.num_clients > 1:
+        summary = run_sharded_simulation(sumo_conf=sim_args, topology_database_params=topology_database_params,
+                                         num_clients=exec_options.num_clients,
+                                         time_pattern_file=exec_options.time_pattern or '',
+                                         dates=exec_options.dates or '',
+                                         load_vehicles_dir=exec_options.load_vehicles_dir or '',
+                                         components={'traffic_analyzer': exec_options.traffic_analyzer,
+                                                     'turn_predictor': exec_options.turn_predictor,
+                                                     'traffic_predictor': exec_options.traffic_predictor},
+                                         subscriptions=exec_options.subscriptions,
+                                         mesoscopic=exec_options.mesoscopic,
+                                         adaptation_mode=exec_options.adaptation_mode,
+                                         event_threshold=exec_options.event_threshold,
+                                         event_min_cycles=exec_options.event_min_cycles,
+                                         event_max_cycles=exec_options.event_max_cycles,
+                                         history_retention=exec_options.history_retention,
+                                         storage_engine=exec_options.storage_engine,
+                                         history_persist_dir=exec_options.history_persist_dir)
+        print(f"Simulated {summary['steps']} steps of {summary['num_traffic_lights']} traffic lights with "
+              f"{summary['num_clients']} clients at {summary['steps_per_second']:.2f} steps/s")
+        sys.exit(0)
+
     # Initialize to None
     traci_sim = None
 
     # Create the TraCI Traffic simulator based on time pattern or dates
     if exec_options.time_pattern:
-        traci_sim = TraCISimulator(sumo_conf=sim_args, time_pattern_file=exec_options.time_pattern,
-                                   local=exec_options.local, mqtt_url=exec_options.mqtt_url,
-                                   mqtt_port=exec_options.mqtt_port)
+        traci_sim = TraCISimulator(sumo_conf=sim_args, time_pattern_file=exec_options.time_pattern, **simulator_args)
     elif exec_options.dates:
-        traci_sim = TraCISimulator(sumo_conf=sim_args, dates=exec_options.dates, local=exec_options.local,
-                                   mqtt_url=exec_options.mqtt_url, mqtt_port=exec_options.mqtt_port)
+        traci_sim = TraCISimulator(sumo_conf=sim_args, dates=exec_options.dates, **simulator_args)
 
     # Get simulation params
     simulation_params = traci_sim.retrieve_simulation_params(load_vehicles_dir=exec_options.load_vehicles_dir)
 
-    # Create dict with topology database params
-    topology_database_params = {'ip_address': exec_options.topology_db_ip,
-                                'user': exec_options.topology_db_user,
-                                'password': exec_options.topology_db_password}
-
     # Initialize the simulation topology
     traci_sim.initialize_simulation_topology(traffic_analyzer=exec_options.traffic_analyzer,
                                              turn_predictor=exec_options.turn_predictor,
@@ -149,5 +346,12 @@ if __name__ == "__main__":
                                              simulation_params=simulation_params,
                                              topology_database_params=topology_database_params)
 
+    # Resume the simulation from the given checkpoint or from the latest one on the checkpoints directory
+    checkpoint_file = exec_options.resume_from if exec_options.resume_from else \
+        find_latest_checkpoint(exec_options.checkpoint_dir) if exec_options.resume else ''
+    if checkpoint_file:
+        print(f"Resuming simulation from checkpoint {checkpoint_file}")
+        traci_sim.load_checkpoint(checkpoint_file=checkpoint_file)
+
     # Start the simulation process
     traci_sim.simulate()
@@ -0,0 +1,213 @@
+import queue
+from collections import namedtuple, deque
+
+from tdt.static.constants import SHARDING_EXCHANGE_TIMEOUT
+
+# Message delivered by the local bus, with the same attributes used from the MQTT messages
+LocalMessage = namedtuple('LocalMessage', ['topic', 'payload'])
+
+
+class LocalBus:
+    """
+    In-process publish/subscribe bus used instead of the MQTT multiplexer on the local mode, with its same interface.
+    The published messages are queued without serialization and delivered in publication order when the bus is
+    flushed, so the traffic lights exchange its adjacent information as on the distributed deployment but
+    deterministically and without a broker.
+    """
+
+    def __init__(self, bridge=None) -> None:
+        """
+        LocalBus initializer
+
+        :param bridge: bridge exchanging the messages with the buses of other shards on each flush. Default to None, the
+            messages are only delivered locally.
+        :type bridge: ShardBridge
+        """
+        # Routing table of the callbacks by topic and queue of the messages pending to be delivered
+        self._routes, self._queue = {}, deque()
+
+        # Bridge with the other shards buses
+        self._bridge = bridge
+
+        # Bus metrics: received, dispatched and unrouted messages, published batches and messages
+        self._metrics = {'received': 0, 'dispatched': 0, 'unrouted': 0, 'batches': 0, 'published': 0}
+
+    def register(self, topics: list, callback) -> None:
+        """
+        Register a callback on the given topics
+
+        :param topics: topics names
+        :type topics: list
+        :param callback: function called with (client, userdata, msg) on each message delivered on the topics
+        :type callback: function
+        :return: None
+        """
+        for topic in topics:
+            self._routes.setdefault(topic, []).append(callback)
+
+    def unregister(self, callback) -> None:
+        """
+        Remove a callback from all its topics
+
+        :param callback: registered function
+        :type callback: function
+        :return: None
+        """
+        for topic in list(self._routes):
+            self._routes[topic] = [route for route in self._routes[topic] if route != callback]
+            if not self._routes[topic]:
+                del self._routes[topic]
+
+    def publish(self, topic: str, payload) -> None:
+        """
+        Queue a message to be delivered on the next flush
+
+        :param topic: topic name
+        :type topic: str
+        :param payload: message payload, delivered as it is
+        :return: None
+        """
+        self.publish_batch(messages=[(topic, payload)])
+
+    def publish_batch(self, messages: list) -> None:
+        """
+        Queue the messages of a temporal window to be delivered on the next flush
+
+        :param messages: list of (topic, payload) messages, whose payloads are delivered as they are
+        :type messages: list
+        :return: None
+        """
+        self._queue.extend(LocalMessage(topic=topic, payload=payload) for topic, payload in messages)
+
+        # Send the messages routed to other shards on the next flush
+        if self._bridge:
+            self._bridge.queue(messages=messages)
+
+        self._metrics['batches'] += 1
+        self._metrics['published'] += len(messages)
+
+    def flush(self) -> None:
+        """
+        Deliver the queued messages, in publication order, to the callbacks routed on its topics. With a bridge, the
+        messages of the other shards published before their flush on the same step are delivered after the local ones.
+
+        :return: None
+        """
+        if self._bridge:
+            self._queue.extend(LocalMessage(topic=topic, payload=payload) for topic, payload in self._bridge.exchange())
+
+        while self._queue:
+            msg = self._queue.popleft()
+
+            callbacks = self._routes.get(msg.topic, ())
+            self._metrics['received'] += 1
+            if not callbacks:
+                self._metrics['unrouted'] += 1
+
+            for callback in callbacks:
+                callback(self, None, msg)
+                self._metrics['dispatched'] += 1
+
+    def close(self) -> None:
+        """
+        Discard the pending messages
+
+        :return: None
+        """
+        self._queue.clear()
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Bus metrics getter
+
+        :return: received, dispatched and unrouted messages, published batches and messages
+        :rtype: dict
+        """
+        return self._metrics
+
+
+class ShardBridge:
+    """
+    Bridge exchanging the local bus messages between the shards of a multi-client simulation, so the traffic lights
+    receive the information of its adjacent traffic lights controlled by other shards. Each shard has an inbox queue,
+    shared by all the processes. On each flush, every shard sends a single batch (empty if there are no messages) to
+    each shard it routes messages to, and waits for the batch of each shard routing messages to it. As SUMO only
+    advances a step once all the clients have requested it, all the shards must flush on the same steps. A failing
+    shard notifies the other ones, which fail too instead of waiting for it, as they do if its batch is not received
+    on time.
+
+    :param client_order: order of the shard client
+    :type client_order: int
+    :param inboxes: inbox queue by client order of all the shards
+    :type inboxes: dict
+    :param routes: client orders of the shards subscribed to each topic published by this shard
+    :type routes: dict
+    :param num_senders: number of shards routing messages to this shard
+    :type num_senders: int
+    :param timeout: seconds waiting for the batch of each shard routing messages to this one. Default to 600.
+    :type timeout: float
+    """
+
+    def __init__(self, client_order: int, inboxes: dict, routes: dict, num_senders: int,
+                 timeout: float = SHARDING_EXCHANGE_TIMEOUT) -> None:
+        """
+        ShardBridge initializer
+        """
+        self._client_order, self._inboxes, self._routes, self._num_senders = client_order, inboxes, routes, num_senders
+        self._timeout = timeout
+
+        # Messages pending to be sent by client order, with an entry for every shard routed to, so they always get a
+        # batch on each flush
+        self._outbox = {order: [] for orders in routes.values() for order in orders}
+
+    def queue(self, messages: list) -> None:
+        """
+        Queue the messages routed to other shards until the next exchange
+
+        :param messages: list of (topic, payload) messages
+        :type messages: list
+        :return: None
+        """
+        for topic, payload in messages:
+            for order in self._routes.get(topic, ()):
+                self._outbox[order].append((topic, payload))
+
+    def exchange(self) -> list:
+        """
+        Send the queued messages to the shards routed to and receive the messages of the shards routing to this one
+
+        :return: list of (topic, payload) messages received
+        :rtype: list
+        """
+        for order, messages in self._outbox.items():
+            self._inboxes[order].put(messages)
+            self._outbox[order] = []
+
+        received = []
+        for _ in range(self._num_senders):
+            try:
+                batch = self._inboxes[self._client_order].get(timeout=self._timeout)
+            except queue.Empty:
+                raise Exception(f"Shard {self._client_order} did not receive the other shards messages in "
+                                f"{self._timeout} seconds")
+
+            # The other shards notify its failure with its client order instead of a batch
+            if not isinstance(batch, list):
+                raise Exception(f"Shard {self._client_order} stopped as shard {batch} failed")
+
+            received.extend(batch)
+
+        return received
+
+    def notify_failure(self) -> None:
+        """
+        Notify all the other shards that this one failed, so they do not wait for its messages
+
+        :return: None
+        """
+        for order, inbox in self._inboxes.items():
+            if order != self._client_order:
+                inbox.put(self._client_order)
@@ -0,0 +1,172 @@
+import threading
+
+import paho.mqtt.client as mqtt
+
+from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, DEFAULT_QOS, DEFAULT_PAYLOAD_ENCODING
+from sumo_generators.utils.codec import encode_payload
+
+
+class MQTTMultiplexer:
+    """
+    Single MQTT connection shared by the simulator and all its traffic light adapters. The received messages are
+    dispatched to the callbacks registered on its topic through a routing table, so each topic is subscribed once
+    regardless of the number of adapters interested on it, and the messages of a temporal window are published at once.
+
+    :param mqtt_url: MQTT middleware broker url. Default to '172.20.0.2'.
+    :type mqtt_url: str
+    :param mqtt_port: MQTT middleware broker port. Default to 1883.
+    :type mqtt_port: int
+    :param encoding: encoding of the published payloads, either 'json' or 'msgpack'. Default to 'json'.
+    :type encoding: str
+    """
+
+    def __init__(self, mqtt_url: str = MQTT_URL, mqtt_port: int = MQTT_PORT,
+                 encoding: str = DEFAULT_PAYLOAD_ENCODING) -> None:
+        """
+        MQTTMultiplexer initializer
+        """
+        # Store the payloads encoding
+        self._encoding = encoding
+
+        # Routing table of the callbacks by topic and lock, as it is read by the network thread
+        self._routes, self._lock = {}, threading.Lock()
+
+        # Flag set once the client is connected, so the topics registered later are subscribed straight away
+        self._connected = False
+
+        # Multiplexer metrics: received, dispatched and unrouted messages, published batches and messages
+        self._metrics = {'received': 0, 'dispatched': 0, 'unrouted': 0, 'batches': 0, 'published': 0}
+
+        # Create the MQTT client, its callbacks and its connection to the broker
+        self._mqtt_client = mqtt.Client()
+        self._mqtt_client.on_connect = self.on_connect
+        self._mqtt_client.on_message = self.on_message
+        self._mqtt_client.connect(mqtt_url, mqtt_port)
+        self._mqtt_client.loop_start()
+
+    def register(self, topics: list, callback) -> None:
+        """
+        Register a callback on the given topics, subscribing those topics without previous routes
+
+        :param topics: topics names
+        :type topics: list
+        :param callback: function called with (client, userdata, msg) on each message received on the topics
+        :type callback: function
+        :return: None
+        """
+        with self._lock:
+            new_topics = [topic for topic in topics if topic not in self._routes]
+            for topic in topics:
+                self._routes.setdefault(topic, []).append(callback)
+            connected = self._connected
+
+        # The remaining topics are subscribed on connection
+        if connected and new_topics:
+            self._mqtt_client.subscribe([(topic, DEFAULT_QOS) for topic in new_topics])
+
+    def unregister(self, callback) -> None:
+        """
+        Remove a callback from all its topics, unsubscribing those topics left without routes
+
+        :param callback: registered function
+        :type callback: function
+        :return: None
+        """
+        with self._lock:
+            for topic in list(self._routes):
+                self._routes[topic] = [route for route in self._routes[topic] if route != callback]
+            empty_topics = [topic for topic, callbacks in self._routes.items() if not callbacks]
+            for topic in empty_topics:
+                del self._routes[topic]
+            connected = self._connected
+
+        if connected and empty_topics:
+            self._mqtt_client.unsubscribe(empty_topics)
+
+    def publish(self, topic: str, payload) -> None:
+        """
+        Publish a message into the middleware
+
+        :param topic: topic name
+        :type topic: str
+        :param payload: message payload, encoded with the multiplexer encoding
+        :return: None
+        """
+        self.publish_batch(messages=[(topic, payload)])
+
+    def publish_batch(self, messages: list) -> None:
+        """
+        Publish the messages of a temporal window into the middleware at once
+
+        :param messages: list of (topic, payload) messages, whose payloads are encoded with the multiplexer encoding
+        :type messages: list
+        :return: None
+        """
+        for topic, payload in messages:
+            self._mqtt_client.publish(topic=topic, payload=encode_payload(payload, encoding=self._encoding))
+
+        self._metrics['batches'] += 1
+        self._metrics['published'] += len(messages)
+
+    def close(self) -> None:
+        """
+        Stop the network thread and close the connection to the broker
+
+        :return: None
+        """
+        self._mqtt_client.loop_stop()
+        self._mqtt_client.disconnect()
+
+    """ MIDDLEWARE """
+
+    def on_connect(self, client, userdata, flags, rc):
+        """
+        Callback called when the client connects to the broker. It subscribes all the routed topics, also on
+        reconnection.
+
+        :param client: MQTT client
+        :param userdata: MQTT client data
+        :param flags: MQTT connection flags
+        :param rc: MQTT connection response code
+        :return: None
+        """
+        if rc == 0:  # Connection established
+            with self._lock:
+                self._connected = True
+                topics = list(self._routes)
+
+            if topics:
+                self._mqtt_client.subscribe([(topic, DEFAULT_QOS) for topic in topics])
+
+    def on_message(self, client, userdata, msg):
+        """
+        Callback called when the client receives a message from to the broker. It is dispatched to the callbacks routed
+        on its topic.
+
+        :param client: MQTT client
+        :param userdata: MQTT client data
+        :param msg: message received from the middleware
+        :return: None
+        """
+        with self._lock:
+            callbacks = tuple(self._routes.get(msg.topic, ()))
+
+        self._metrics['received'] += 1
+        if not callbacks:
+            self._metrics['unrouted'] += 1
+
+        for callback in callbacks:
+            callback(client, userdata, msg)
+            self._metrics['dispatched'] += 1
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Multiplexer metrics getter
+
+        :return: received, dispatched and unrouted messages, published batches and messages
+        :rtype: dict
+        """
+        return self._metrics
@@ -0,0 +1,151 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+from tdt.static.constants import PROFILER_HISTOGRAM_BOUNDS
+
+# Shared context manager used when the profiler is disabled, so no timer is created
+_DISABLED_TIMER = contextlib.nullcontext()
+
+
+class PhaseTimer:
+    """
+    Context manager measuring the wall time of a simulation phase and adding it to the profiler
+    """
+
+    __slots__ = ('_profiler', '_phase', '_start')
+
+    def __init__(self, profiler, phase: str) -> None:
+        """
+        PhaseTimer initializer
+
+        :param profiler: profiler where the measurement is stored
+        :type profiler: SimulationProfiler
+        :param phase: simulation phase name
+        :type phase: str
+        """
+        self._profiler, self._phase, self._start = profiler, phase, 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.add_measurement(phase=self._phase, elapsed_time=time.perf_counter() - self._start)
+        return False
+
+
+class SimulationProfiler:
+    """
+    Simulation profiler gathering the wall time of each simulation phase. It stores the cumulative time and calls per
+    phase and a latency histogram of the time spent on each phase per temporal window. The phases can also be measured
+    from the asynchronous publisher worker, so the measurements are locked, and they are added to the temporal window
+    being simulated when they finish.
+
+    :param enabled: flag to enable the profiler. Default to False.
+    :type enabled: bool
+    :param histogram_bounds: upper bounds in seconds of the histograms buckets
+    :type histogram_bounds: list
+    """
+
+    def __init__(self, enabled: bool = False, histogram_bounds: list = PROFILER_HISTOGRAM_BOUNDS) -> None:
+        """
+        SimulationProfiler initializer
+        """
+        self._enabled, self._histogram_bounds = enabled, histogram_bounds
+
+        # Cumulative time and number of calls per phase
+        self._total_time, self._calls = {}, {}
+
+        # Time per phase on the current temporal window and histogram counts of the window times per phase. The last
+        # bucket gathers the values greater than the last bound
+        self._window_time, self._histograms = {}, {}
+
+        # Number of temporal windows profiled
+        self._num_windows = 0
+
+        # Lock of the measurements, added from both the simulation and the publisher worker threads
+        self._lock = threading.Lock()
+
+    def measure(self, phase: str):
+        """
+        Create a context manager that measures the given phase. When the profiler is disabled, a shared empty
+        context manager is returned
+
+        :param phase: simulation phase name
+        :type phase: str
+        :return: phase timer context manager
+        """
+        return PhaseTimer(self, phase) if self._enabled else _DISABLED_TIMER
+
+    def add_measurement(self, phase: str, elapsed_time: float) -> None:
+        """
+        Add a measurement of a phase to the cumulative and the current temporal window times
+
+        :param phase: simulation phase name
+        :type phase: str
+        :param elapsed_time: elapsed wall time in seconds
+        :type elapsed_time: float
+        :return: None
+        """
+        with self._lock:
+            self._total_time[phase] = self._total_time.get(phase, 0.0) + elapsed_time
+            self._calls[phase] = self._calls.get(phase, 0) + 1
+            self._window_time[phase] = self._window_time.get(phase, 0.0) + elapsed_time
+
+    def end_window(self) -> dict:
+        """
+        Close the current temporal window, adding its time per phase to the histograms
+
+        :return: time per phase on the closed temporal window
+        :rtype: dict
+        """
+        with self._lock:
+            window_time = self._window_time
+
+            # Add each phase window time to its histogram bucket
+            for phase, elapsed_time in window_time.items():
+                histogram = self._histograms.setdefault(phase, [0] * (len(self._histogram_bounds) + 1))
+                histogram[bisect.bisect_left(self._histogram_bounds, elapsed_time)] += 1
+
+            # Initialize the next temporal window
+            self._window_time, self._num_windows = {}, self._num_windows + 1
+
+        return window_time
+
+    def retrieve_timings(self) -> dict:
+        """
+        Retrieve the timings of all the phases
+
+        :return: cumulative time, calls, mean time per window and window time histogram per phase
+        :rtype: dict
+        """
+        with self._lock:
+            return {'num_windows': self._num_windows, 'histogram_bounds': self._histogram_bounds,
+                    'phases': {phase: {'total_time': total_time, 'calls': self._calls[phase],
+                                       'mean_window_time': total_time / self._num_windows if self._num_windows else 0.0,
+                                       'window_histogram': list(self._histograms.get(phase, []))}
+                               for phase, total_time in self._total_time.items()}}
+
+    def dump(self, output_file: str) -> None:
+        """
+        Dump the timings of all the phases into a JSON file
+
+        :param output_file: output JSON file
+        :type output_file: str
+        :return: None
+        """
+        with open(output_file, 'w') as file:
+            json.dump(self.retrieve_timings(), file, indent=4)
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Profiler enabled flag getter
+
+        :return: True if the profiler is enabled, False otherwise
+        :rtype: bool
+        """
+        return self._enabled
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from tdt.static.constants import PUBLISHER_POLICIES, DEFAULT_PUBLISHER_POLICY, DEFAULT_PUBLISHER_QUEUE_SIZE
+
+# Publisher logger, reporting the publishing errors of the worker thread
+logger = logging.getLogger(__name__)
+
+
+class AsyncPublisher:
+    """
+    Asynchronous publisher that hands the items to a bounded queue consumed by a worker thread, so the simulation does
+    not wait on the database and middleware I/O. When the queue is full, the backpressure policy defines the behaviour:
+
+    - block: the simulation waits until there is a free slot.
+    - drop_oldest: the oldest queued item is discarded.
+    - coalesce: the new item is merged into the newest queued one with the coalesce function.
+
+    The publishing errors are logged as they happen and the first one is raised again when the publisher is closed.
+
+    :param publish_function: function called by the worker thread with each item
+    :type publish_function: function
+    :param coalesce_function: function merging two items (oldest, newest) into one. Required by the coalesce policy.
+    :type coalesce_function: function
+    :param max_size: maximum number of queued items. Default to 4.
+    :type max_size: int
+    :param policy: backpressure policy, one of 'block', 'drop_oldest' or 'coalesce'. Default to 'block'.
+    :type policy: str
+    """
+
+    def __init__(self, publish_function, coalesce_function=None, max_size: int = DEFAULT_PUBLISHER_QUEUE_SIZE,
+                 policy: str = DEFAULT_PUBLISHER_POLICY) -> None:
+        """
+        AsyncPublisher initializer
+        """
+        if policy not in PUBLISHER_POLICIES:
+            raise Exception(f"Publisher policy is not valid. It should be one of {PUBLISHER_POLICIES}")
+
+        if policy == 'coalesce' and coalesce_function is None:
+            raise Exception("Publisher coalesce policy requires a coalesce function")
+
+        self._publish_function, self._coalesce_function = publish_function, coalesce_function
+        self._max_size, self._policy = max_size, policy
+
+        # Queued items and condition used to notify both the worker and the blocked producer
+        self._queue, self._condition = deque(), threading.Condition()
+
+        # Flag to stop the worker once the queue is empty and first publishing error, raised again on close
+        self._closed, self._error = False, None
+
+        # Queue metrics: submitted, published, dropped and coalesced items, publishing errors, maximum queue depth and
+        # time the producer has been blocked
+        self._metrics = {'submitted': 0, 'published': 0, 'dropped': 0, 'coalesced': 0, 'errors': 0,
+                         'max_queue_depth': 0, 'blocked_time': 0.0}
+
+        # Start the worker thread, as daemon so it does not keep alive the process if it is not closed
+        self._worker = threading.Thread(target=self._consume, daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> None:
+        """
+        Submit an item to be published, applying the backpressure policy if the queue is full
+
+        :param item: item to publish
+        :return: None
+        """
+        with self._condition:
+            if len(self._queue) >= self._max_size:
+                if self._policy == 'block':
+                    # Wait until the worker frees a slot
+                    start_time = time.perf_counter()
+                    self._condition.wait_for(lambda: len(self._queue) < self._max_size)
+                    self._metrics['blocked_time'] += time.perf_counter() - start_time
+                elif self._policy == 'drop_oldest':
+                    # Discard the oldest item
+                    self._queue.popleft()
+                    self._metrics['dropped'] += 1
+                else:
+                    # Merge the item into the newest one and notify the worker
+                    self._queue[-1] = self._coalesce_function(self._queue[-1], item)
+                    self._metrics['submitted'] += 1
+                    self._metrics['coalesced'] += 1
+                    self._condition.notify_all()
+                    return
+
+            # Queue the item and notify the worker
+            self._queue.append(item)
+            self._metrics['submitted'] += 1
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], len(self._queue))
+            self._condition.notify_all()
+
+    def _consume(self) -> None:
+        """
+        Worker thread loop publishing the queued items until the publisher is closed and the queue is empty
+
+        :return: None
+        """
+        while True:
+            with self._condition:
+                # Wait until there is an item or the publisher is closed
+                self._condition.wait_for(lambda: self._queue or self._closed)
+
+                if not self._queue:
+                    return
+
+                item = self._queue.popleft()
+
+                # Notify the producer blocked on a full queue
+                self._condition.notify_all()
+
+            # Publish the item outside the lock, so the producer can submit meanwhile
+            try:
+                self._publish_function(item)
+            except Exception as error:
+                logger.exception("Error publishing item")
+                with self._condition:
+                    self._metrics['errors'] += 1
+                    self._error = self._error or error
+            else:
+                with self._condition:
+                    self._metrics['published'] += 1
+
+    def close(self) -> None:
+        """
+        Close the publisher, waiting for the queued items to be published, and raise the first publishing error if any
+
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._worker.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def retrieve_metrics(self) -> dict:
+        """
+        Retrieve the publisher metrics along with the current queue depth
+
+        :return: publisher metrics
+        :rtype: dict
+        """
+        with self._condition:
+            return dict(self._metrics, queue_depth=len(self._queue))
@@ -0,0 +1,122 @@
+import json
+import os
+import pickle
+
+import numpy as np
+
+from tdt.static.constants import LANE_SUBSCRIPTION_VARIABLES, DEFAULT_RECORD_CHUNK_SIZE, RECORD_HEADER_FILE, \
+    RECORD_PROGRAMS_FILE, RECORD_CHUNK_FILE
+
+
+class ObservationRecorder:
+    """
+    Recorder of the observations the traffic light adapters read from TraCI on each step: the lanes variables, the
+    detectors passing vehicles and the roads of the tracked turning vehicles. They are stored by columns in compressed
+    chunks of steps, along with a JSON header and the initial traffic lights programs, so the simulation can be
+    replayed without SUMO.
+
+    Each chunk stores the lanes values array (steps, variables, lanes), the number of passing vehicles per step and
+    detector, and the passing vehicles identifiers flattened in the same order. The tracked vehicles are stored in the
+    same way: its number per step and its identifiers and roads flattened.
+
+    :param record_dir: directory where the recording is stored
+    :type record_dir: str
+    :param lanes: sampled lanes names, ordered as the lane values columns
+    :type lanes: tuple
+    :param detectors: sampled detectors names, ordered as the detector vehicles
+    :type detectors: tuple
+    :param chunk_size: number of steps per chunk. Default to 3600.
+    :type chunk_size: int
+    """
+
+    def __init__(self, record_dir: str, lanes: tuple, detectors: tuple,
+                 chunk_size: int = DEFAULT_RECORD_CHUNK_SIZE) -> None:
+        """
+        ObservationRecorder initializer
+        """
+        self._record_dir, self._lanes, self._detectors, self._chunk_size = record_dir, lanes, detectors, chunk_size
+
+        # Create the recording directory if it does not exist
+        os.makedirs(self._record_dir, exist_ok=True)
+
+        # Chunk buffers: lanes values per step, detectors passing vehicles per step and tracked vehicles roads per step
+        self._chunk_values = np.zeros((chunk_size, len(LANE_SUBSCRIPTION_VARIABLES), len(lanes)))
+        self._chunk_vehicles, self._chunk_roads = [], []
+
+        # Number of recorded steps and stored chunks
+        self._num_steps, self._num_chunks = 0, 0
+
+    def record_programs(self, programs: dict) -> None:
+        """
+        Record the initial program of each traffic light, required to replay the adaptation
+
+        :param programs: current program identifier and program logics by traffic light identifier
+        :type programs: dict
+        :return: None
+        """
+        with open(os.path.join(self._record_dir, RECORD_PROGRAMS_FILE), 'wb') as programs_file:
+            pickle.dump(programs, programs_file)
+
+    def record(self, lane_values: np.ndarray, detector_vehicles: list, vehicles_roads: dict) -> None:
+        """
+        Record the observations of the current step, storing the chunk once it is full
+
+        :param lane_values: lanes variables values of the current step
+        :type lane_values: np.ndarray
+        :param detector_vehicles: passing vehicles per detector of the current step
+        :type detector_vehicles: list
+        :param vehicles_roads: road per tracked vehicle of the current step
+        :type vehicles_roads: dict
+        :return: None
+        """
+        # Copy the observations into the chunk buffers
+        self._chunk_values[len(self._chunk_vehicles)] = lane_values
+        self._chunk_vehicles.append(tuple(detector_vehicles))
+        self._chunk_roads.append(tuple(vehicles_roads.items()))
+        self._num_steps += 1
+
+        # Store the chunk once it is full
+        if len(self._chunk_vehicles) == self._chunk_size:
+            self.store_chunk()
+
+    def store_chunk(self) -> None:
+        """
+        Store the buffered steps into a compressed chunk file and clear the buffers
+
+        :return: None
+        """
+        num_chunk_steps = len(self._chunk_vehicles)
+
+        if num_chunk_steps:
+            # Passing vehicles per step and detector, along with the flattened vehicles identifiers
+            vehicle_counts = np.array([[len(vehicles) for vehicles in step_vehicles]
+                                       for step_vehicles in self._chunk_vehicles], dtype=np.int32)
+            vehicles = np.array([vehicle for step_vehicles in self._chunk_vehicles for vehicles in step_vehicles
+                                 for vehicle in vehicles], dtype=str)
+
+            # Tracked vehicles per step, along with the flattened vehicles identifiers and roads
+            road_counts = np.array([len(step_roads) for step_roads in self._chunk_roads], dtype=np.int32)
+            road_vehicles = np.array([vehicle for step_roads in self._chunk_roads for vehicle, _ in step_roads],
+                                     dtype=str)
+            roads = np.array([road for step_roads in self._chunk_roads for _, road in step_roads], dtype=str)
+
+            np.savez_compressed(os.path.join(self._record_dir, RECORD_CHUNK_FILE.format(index=self._num_chunks)),
+                                lane_values=self._chunk_values[:num_chunk_steps],
+                                vehicle_counts=vehicle_counts.reshape(num_chunk_steps, len(self._detectors)),
+                                vehicles=vehicles, road_counts=road_counts, road_vehicles=road_vehicles, roads=roads)
+
+            self._num_chunks += 1
+            self._chunk_vehicles, self._chunk_roads = [], []
+
+    def close(self) -> None:
+        """
+        Store the last chunk and the recording header
+
+        :return: None
+        """
+        self.store_chunk()
+
+        with open(os.path.join(self._record_dir, RECORD_HEADER_FILE), 'w') as header_file:
+            json.dump({'lanes': list(self._lanes), 'detectors': list(self._detectors),
+                       'variables': LANE_SUBSCRIPTION_VARIABLES, 'chunk_size': self._chunk_size,
+                       'num_steps': self._num_steps, 'num_chunks': self._num_chunks}, header_file, indent=4)
@@ -0,0 +1,302 @@
+import json
+import os
+import pickle
+
+import numpy as np
+
+from tdt.providers.sampler import SimulationSampler
+from tdt.static.constants import RECORD_HEADER_FILE, RECORD_PROGRAMS_FILE, RECORD_CHUNK_FILE
+
+
+class ReplayTrafficLightDomain:
+    """
+    Traffic lights domain of the replay backend. The programs are only stored in memory, as the replay is open-loop:
+    the adaptation does not change the recorded observations.
+
+    :param programs: current program identifier and program logics by traffic light identifier
+    :type programs: dict
+    """
+
+    def __init__(self, programs: dict) -> None:
+        """
+        ReplayTrafficLightDomain initializer
+        """
+        # Current program identifier and program logics by identifier, per traffic light
+        self._program_ids = {tl_id: program['program_id'] for tl_id, program in programs.items()}
+        self._logics = {tl_id: {logic.programID: logic for logic in program['logics']}
+                        for tl_id, program in programs.items()}
+
+    def getIDList(self) -> list:
+        """
+        Get the traffic lights identifiers
+        """
+        return list(self._program_ids.keys())
+
+    def getProgram(self, tl_id: str) -> str:
+        """
+        Get the current program identifier of a traffic light
+        """
+        return self._program_ids[tl_id]
+
+    def setProgram(self, tl_id: str, program_id: str) -> None:
+        """
+        Switch a traffic light to the given program identifier
+        """
+        self._program_ids[tl_id] = program_id
+
+    def getAllProgramLogics(self, tl_id: str) -> list:
+        """
+        Get all the program logics of a traffic light
+        """
+        return list(self._logics[tl_id].values())
+
+    def setProgramLogic(self, tl_id: str, logic) -> None:
+        """
+        Store a program logic of a traffic light and switch to it, as SUMO does
+        """
+        self._logics[tl_id][logic.programID] = logic
+        self._program_ids[tl_id] = logic.programID
+
+
+class ReplayVehicleDomain:
+    """
+    Vehicles domain of the replay backend. Only the roads of the tracked turning vehicles are recorded.
+
+    :param backend: replay backend
+    :type backend: ReplayBackend
+    """
+
+    def __init__(self, backend) -> None:
+        """
+        ReplayVehicleDomain initializer
+        """
+        self._backend = backend
+
+    def getRoadID(self, vehicle_id: str) -> str:
+        """
+        Get the recorded road of a tracked vehicle on the current replay step
+        """
+        vehicles_roads = self._backend.retrieve_observations()[2]
+        if vehicle_id not in vehicles_roads:
+            raise Exception(f"Road of vehicle {vehicle_id} is not recorded on step {self._backend.step}")
+
+        return vehicles_roads[vehicle_id]
+
+
+class ReplaySimulationDomain:
+    """
+    Simulation domain of the replay backend, whose state is the replay step
+
+    :param backend: replay backend
+    :type backend: ReplayBackend
+    """
+
+    def __init__(self, backend) -> None:
+        """
+        ReplaySimulationDomain initializer
+        """
+        self._backend = backend
+
+    def saveState(self, state_file: str) -> None:
+        """
+        Save the replay step into the state file
+        """
+        with open(state_file, 'w') as file:
+            file.write(str(self._backend.step))
+
+    def loadState(self, state_file: str) -> None:
+        """
+        Load the replay step from the state file
+        """
+        with open(state_file, 'r') as file:
+            self._backend.step = int(file.read())
+
+
+class ReplayBackend:
+    """
+    Simulation backend that replays a recording of the observations instead of running SUMO. It offers the TraCI call
+    surface used by the simulator and the traffic light adapters (simulationStep, close and the trafficlight, vehicle
+    and simulation domains), while the observations are read by the ReplaySampler.
+
+    :param record_dir: directory where the recording is stored
+    :type record_dir: str
+    """
+
+    def __init__(self, record_dir: str) -> None:
+        """
+        ReplayBackend initializer
+        """
+        self._record_dir = record_dir
+
+        # Load the recording header and the initial traffic lights programs
+        with open(os.path.join(record_dir, RECORD_HEADER_FILE), 'r') as header_file:
+            self._header = json.load(header_file)
+
+        with open(os.path.join(record_dir, RECORD_PROGRAMS_FILE), 'rb') as programs_file:
+            programs = pickle.load(programs_file)
+
+        # Define the domains
+        self.trafficlight = ReplayTrafficLightDomain(programs=programs)
+        self.vehicle = ReplayVehicleDomain(backend=self)
+        self.simulation = ReplaySimulationDomain(backend=self)
+
+        # Current replay step
+        self.step = 0
+
+        # Loaded chunk index, lanes values, vehicle offsets per step and detector and flattened vehicles
+        self._chunk_index, self._chunk_values, self._chunk_offsets, self._chunk_vehicles = None, None, None, None
+
+        # Loaded chunk tracked vehicles offsets per step and flattened tracked vehicles and roads
+        self._chunk_road_offsets, self._chunk_road_vehicles, self._chunk_roads = None, None, None
+
+    def load_chunk(self, chunk_index: int) -> None:
+        """
+        Load a recording chunk into memory
+
+        :param chunk_index: chunk index
+        :type chunk_index: int
+        :return: None
+        """
+        with np.load(os.path.join(self._record_dir, RECORD_CHUNK_FILE.format(index=chunk_index))) as chunk:
+            self._chunk_values = chunk['lane_values']
+            vehicle_counts = chunk['vehicle_counts']
+            self._chunk_vehicles = chunk['vehicles'].tolist()
+
+            # Previous recordings do not store the tracked vehicles roads
+            if 'road_counts' in chunk.files:
+                road_counts = chunk['road_counts']
+                self._chunk_road_vehicles, self._chunk_roads = chunk['road_vehicles'].tolist(), chunk['roads'].tolist()
+            else:
+                road_counts = np.zeros(len(self._chunk_values), dtype=np.int32)
+                self._chunk_road_vehicles, self._chunk_roads = [], []
+
+        # Offsets of the passing vehicles of each step and detector on the flattened vehicles
+        self._chunk_offsets = np.concatenate(([0], np.cumsum(vehicle_counts)))
+
+        # Offsets of the tracked vehicles of each step on the flattened tracked vehicles
+        self._chunk_road_offsets = np.concatenate(([0], np.cumsum(road_counts)))
+        self._chunk_index = chunk_index
+
+    def retrieve_observations(self) -> tuple:
+        """
+        Retrieve the observations of the current replay step
+
+        :return: lanes values (variables, lanes), passing vehicles per detector, ordered as the recording, and road per
+            tracked vehicle
+        :rtype: tuple
+        """
+        chunk_index, chunk_step = divmod(self.step, self._header['chunk_size'])
+
+        # Load the chunk if it is not in memory
+        if chunk_index != self._chunk_index:
+            self.load_chunk(chunk_index=chunk_index)
+
+        # Passing vehicles of each detector, from its offsets on the flattened vehicles
+        num_detectors = len(self._header['detectors'])
+        offsets = self._chunk_offsets[chunk_step * num_detectors:(chunk_step + 1) * num_detectors + 1]
+        detector_vehicles = [self._chunk_vehicles[offsets[index]:offsets[index + 1]] for index in range(num_detectors)]
+
+        # Roads of the tracked vehicles, from its offsets on the flattened tracked vehicles
+        start, end = self._chunk_road_offsets[chunk_step], self._chunk_road_offsets[chunk_step + 1]
+        vehicles_roads = dict(zip(self._chunk_road_vehicles[start:end], self._chunk_roads[start:end]))
+
+        return self._chunk_values[chunk_step], detector_vehicles, vehicles_roads
+
+    def simulationStep(self) -> None:
+        """
+        Advance the replay step
+        """
+        self.step += 1
+
+    def close(self) -> None:
+        """
+        Release the loaded chunk
+        """
+        self._chunk_index, self._chunk_values, self._chunk_offsets, self._chunk_vehicles = None, None, None, None
+        self._chunk_road_offsets, self._chunk_road_vehicles, self._chunk_roads = None, None, None
+
+    @property
+    def header(self) -> dict:
+        """
+        Recording header getter
+
+        :return: recorded lanes, detectors, variables, chunk size and number of steps and chunks
+        :rtype: dict
+        """
+        return self._header
+
+    @property
+    def num_steps(self) -> int:
+        """
+        Number of recorded steps getter
+
+        :return: number of recorded steps
+        :rtype: int
+        """
+        return self._header['num_steps']
+
+
+class ReplaySampler(SimulationSampler):
+    """
+    Simulation sampler that reads the observations from a replay backend instead of TraCI
+
+    :param traci: replay backend
+    :type traci: ReplayBackend
+    :param lanes: monitored lanes, it can have duplicates
+    :type lanes: list
+    :param detectors: monitored detectors, it can have duplicates
+    :type detectors: list
+    """
+
+    def __init__(self, traci: ReplayBackend, lanes: list, detectors: list, **kwargs) -> None:
+        """
+        ReplaySampler initializer
+        """
+        # Initialize as subscriptions, so no TraCI getters are bound
+        super().__init__(traci=traci, lanes=lanes, detectors=detectors, subscriptions=True)
+
+        # Check the recording has the same variables and retrieve the recorded columns of the lanes and detectors
+        if traci.header['variables'] != list(self._variables_rows.keys()):
+            raise Exception("Recording variables do not match the sampled variables")
+
+        recorded_lanes = {lane: index for index, lane in enumerate(traci.header['lanes'])}
+        recorded_detectors = {detector: index for index, detector in enumerate(traci.header['detectors'])}
+        self._recorded_columns = np.array([recorded_lanes[lane] for lane in self._lanes], dtype=np.intp)
+        self._recorded_detectors = [recorded_detectors[detector] for detector in self._detectors]
+
+        # Road per tracked vehicle of the current replay step
+        self._recorded_roads = {}
+
+    def subscribe(self) -> None:
+        """
+        Nothing to subscribe, the observations are recorded
+
+        :return: None
+        """
+        pass
+
+    def retrieve_values(self) -> None:
+        """
+        Retrieve the lanes variables and the detectors passing vehicles of the current step from the recording
+
+        :return: None
+        """
+        lane_values, detector_vehicles, self._recorded_roads = self._traci.retrieve_observations()
+
+        # Copy the recorded lanes columns into the lanes values
+        np.take(lane_values, self._recorded_columns, axis=1, out=self._lane_values)
+
+        for index, recorded_index in enumerate(self._recorded_detectors):
+            self._detector_vehicles[index] = detector_vehicles[recorded_index]
+
+    def sample_vehicles_roads(self, vehicles: set) -> None:
+        """
+        Retrieve the road of each tracked vehicle from the recording. The vehicles that were not tracked on the
+        recording, as with other traffic light components, have no road, so they are not removed.
+
+        :param vehicles: vehicles identifiers tracked by all the traffic lights
+        :type vehicles: set
+        :return: None
+        """
+        self._vehicles_roads = {vehicle: self._recorded_roads[vehicle] for vehicle in vehicles
+                                if vehicle in self._recorded_roads}
@@ -0,0 +1,323 @@
+import numpy as np
+
+from tdt.static.constants import LANE_SUBSCRIPTION_VARIABLES, LANE_WAITING_TIME_VARIABLE, LANE_VARIABLES_GETTERS, \
+    DETECTOR_SUBSCRIPTION_VARIABLES, DETECTOR_VEHICLES_VARIABLE, MESO_ADDITIVE_VARIABLES, VEHICLE_ROAD_VARIABLE, \
+    VEHICLE_SUBSCRIPTION_VARIABLES
+
+
+class SimulationSampler:
+    """
+    Simulation sampler that retrieves, once per simulation step, the variables of the union of the lanes and detectors
+    monitored by all the traffic lights. The lanes variables are stored into a NumPy array with one row per variable
+    and one column per lane, and the traffic light adapters read them by their lanes and detectors indices.
+
+    On the mesoscopic mode the vehicles are not placed on lanes, so the variables are retrieved per edge and expanded
+    into the lanes columns: the sums over the vehicles (waiting time and emissions) are split evenly among the edge
+    lanes and the remaining ones (occupancy and noise) are taken as they are.
+
+    The roads of the vehicles tracked by the traffic lights (its counted turning vehicles) are also retrieved once per
+    step, subscribing to them while they are tracked if the subscriptions are enabled.
+
+    :param traci: simulation backend instance (TraCI module or connection, or libsumo module)
+    :param lanes: monitored lanes, it can have duplicates
+    :type lanes: list
+    :param detectors: monitored detectors, it can have duplicates
+    :type detectors: list
+    :param subscriptions: flag to retrieve the variables using TraCI variable subscriptions. Default to False.
+    :type subscriptions: bool
+    :param mesoscopic: flag to retrieve the lanes variables from its edges, as in the mesoscopic simulation.
+    Default to False.
+    :type mesoscopic: bool
+    """
+
+    def __init__(self, traci, lanes: list, detectors: list, subscriptions: bool = False,
+                 mesoscopic: bool = False) -> None:
+        """
+        SimulationSampler initializer
+        """
+        self._traci, self._subscriptions, self._mesoscopic = traci, subscriptions, mesoscopic
+
+        # Store the union of lanes and detectors, keeping its order, and its indices
+        self._lanes, self._detectors = tuple(dict.fromkeys(lanes)), tuple(dict.fromkeys(detectors))
+        self._lanes_indices = {lane: index for index, lane in enumerate(self._lanes)}
+        self._detectors_indices = {detector: index for index, detector in enumerate(self._detectors)}
+
+        # Row of each lane variable on the lane values array
+        self._variables_rows = {variable: row for row, variable in enumerate(LANE_SUBSCRIPTION_VARIABLES)}
+
+        # Lanes variables values of the current step
+        self._lane_values = np.zeros((len(LANE_SUBSCRIPTION_VARIABLES), len(self._lanes)))
+
+        if mesoscopic:
+            # Retrieve the variables per edge, storing the edge column of each lane and its share of the edge values
+            lanes_edges = [self._traci.lane.getEdgeID(lane) for lane in self._lanes]
+            self._domain_name, self._elements = 'edge', tuple(dict.fromkeys(lanes_edges))
+            edges_indices = {edge: index for index, edge in enumerate(self._elements)}
+            self._lanes_edges = np.array([edges_indices[edge] for edge in lanes_edges], dtype=np.intp)
+
+            self._lanes_shares = np.ones_like(self._lane_values)
+            edge_shares = 1.0 / np.array([self._traci.edge.getLaneNumber(edge) for edge in lanes_edges])
+            for variable in MESO_ADDITIVE_VARIABLES:
+                self._lanes_shares[self._variables_rows[variable]] = edge_shares
+
+            # Edges variables values of the current step
+            self._element_values = np.zeros((len(LANE_SUBSCRIPTION_VARIABLES), len(self._elements)))
+        else:
+            # Retrieve the variables per lane, directly into the lanes values
+            self._domain_name, self._elements, self._element_values = 'lane', self._lanes, self._lane_values
+
+        # Bind the lane or edge getters, ordered as the rows, used when the subscriptions are disabled
+        self._element_getters = [] if subscriptions else \
+            [getattr(getattr(self._traci, self._domain_name), LANE_VARIABLES_GETTERS[variable])
+             for variable in LANE_SUBSCRIPTION_VARIABLES]
+
+        # Waiting time per lane of the previous step and waiting time released on the current step, this is, the
+        # previous waiting time of those lanes whose waiting time has decreased
+        self._prev_waiting_time = np.zeros(len(self._lanes))
+        self._released_waiting_time = np.zeros(len(self._lanes))
+        self._waiting_time_mask = np.zeros(len(self._lanes), dtype=bool)
+
+        # Passing vehicles per detector of the current step, of the previous one and number of vehicles entering each
+        # detector on the current step, this is, those that were not on it on the previous step
+        self._detector_vehicles = [()] * len(self._detectors)
+        self._prev_detector_vehicles = [frozenset()] * len(self._detectors)
+        self._detector_new_vehicles = np.zeros(len(self._detectors), dtype=np.int64)
+
+        # Road per tracked vehicle of the current step and vehicles subscribed to its road
+        self._vehicles_roads, self._subscribed_vehicles = {}, set()
+
+    def subscribe(self) -> None:
+        """
+        Subscribe once to the variables of the lanes (or edges) and detectors
+
+        :return: None
+        """
+        domain = getattr(self._traci, self._domain_name)
+        for element in self._elements:
+            domain.subscribe(element, LANE_SUBSCRIPTION_VARIABLES)
+
+        for detector in self._detectors:
+            self._traci.inductionloop.subscribe(detector, DETECTOR_SUBSCRIPTION_VARIABLES)
+
+    def sample(self) -> None:
+        """
+        Retrieve the lanes and detectors variables of the current simulation step and calculate the waiting time
+        released per lane and the vehicles entering each detector
+
+        :return: None
+        """
+        # Retrieve the values of the current step
+        self.retrieve_values()
+
+        # Calculate the released waiting time: the previous one on those lanes where it has decreased
+        waiting_time = self._lane_values[self._variables_rows[LANE_WAITING_TIME_VARIABLE]]
+        np.greater(self._prev_waiting_time, waiting_time, out=self._waiting_time_mask)
+        np.multiply(self._prev_waiting_time, self._waiting_time_mask, out=self._released_waiting_time)
+
+        # Update the previous waiting time
+        self._prev_waiting_time[:] = waiting_time
+
+        # Count the vehicles entering each detector, only keeping the vehicles of the previous step
+        prev_detector_vehicles, detector_new_vehicles = self._prev_detector_vehicles, self._detector_new_vehicles
+        for index, vehicles in enumerate(self._detector_vehicles):
+            prev_vehicles = prev_detector_vehicles[index]
+            if vehicles or prev_vehicles:
+                detector_new_vehicles[index] = sum(1 for vehicle in vehicles if vehicle not in prev_vehicles)
+                prev_detector_vehicles[index] = frozenset(vehicles)
+            else:
+                detector_new_vehicles[index] = 0
+
+    def retrieve_values(self) -> None:
+        """
+        Retrieve the lanes variables and the detectors passing vehicles of the current simulation step from TraCI
+
+        :return: None
+        """
+        element_values, detector_vehicles = self._element_values, self._detector_vehicles
+
+        if self._subscriptions:
+            # Retrieve all the subscribed variables at once
+            element_results = getattr(self._traci, self._domain_name).getAllSubscriptionResults()
+            detector_results = self._traci.inductionloop.getAllSubscriptionResults()
+
+            for column, element in enumerate(self._elements):
+                results = element_results[element]
+                for row, variable in enumerate(LANE_SUBSCRIPTION_VARIABLES):
+                    element_values[row, column] = results[variable]
+
+            for index, detector in enumerate(self._detectors):
+                detector_vehicles[index] = detector_results[detector][DETECTOR_VEHICLES_VARIABLE]
+        else:
+            # Retrieve each variable once with the TraCI getters
+            for column, element in enumerate(self._elements):
+                for row, getter in enumerate(self._element_getters):
+                    element_values[row, column] = getter(element)
+
+            for index, detector in enumerate(self._detectors):
+                detector_vehicles[index] = self._traci.inductionloop.getLastStepVehicleIDs(detector)
+
+        # Expand the edges values into its lanes columns with the lanes shares
+        if self._mesoscopic:
+            np.take(element_values, self._lanes_edges, axis=1, out=self._lane_values)
+            np.multiply(self._lane_values, self._lanes_shares, out=self._lane_values)
+
+    def sample_vehicles_roads(self, vehicles: set) -> None:
+        """
+        Retrieve the road of each tracked vehicle on the current simulation step, once for all the traffic lights
+
+        :param vehicles: vehicles identifiers tracked by all the traffic lights
+        :type vehicles: set
+        :return: None
+        """
+        if self._subscriptions:
+            # Unsubscribe from the vehicles that are not tracked anymore, unless they have left the simulation
+            untracked_vehicles = self._subscribed_vehicles - vehicles
+            if untracked_vehicles:
+                running_vehicles = set(self._traci.vehicle.getIDList())
+                for vehicle in untracked_vehicles & running_vehicles:
+                    self._traci.vehicle.unsubscribe(vehicle)
+
+            # Subscribe to the new tracked vehicles, whose road is available from the subscription
+            for vehicle in vehicles - self._subscribed_vehicles:
+                self._traci.vehicle.subscribe(vehicle, VEHICLE_SUBSCRIPTION_VARIABLES)
+            self._subscribed_vehicles = set(vehicles)
+
+            # Retrieve all the subscribed roads at once, those vehicles that have left the simulation have no road
+            vehicle_results = self._traci.vehicle.getAllSubscriptionResults()
+            self._vehicles_roads = {vehicle: vehicle_results[vehicle][VEHICLE_ROAD_VARIABLE]
+                                    if vehicle in vehicle_results else '' for vehicle in vehicles}
+        else:
+            # Retrieve each road once, even if the vehicle is tracked by several traffic lights
+            self._vehicles_roads = {vehicle: self._traci.vehicle.getRoadID(vehicle) for vehicle in vehicles}
+
+    def retrieve_lanes_indices(self, lanes: list) -> list:
+        """
+        Retrieve the indices of the given lanes
+
+        :param lanes: lanes names
+        :type lanes: list
+        :return: lanes indices
+        :rtype: list
+        """
+        return [self._lanes_indices[lane] for lane in lanes]
+
+    def retrieve_detectors_indices(self, detectors: list) -> list:
+        """
+        Retrieve the indices of the given detectors
+
+        :param detectors: detectors names
+        :type detectors: list
+        :return: detectors indices
+        :rtype: list
+        """
+        return [self._detectors_indices[detector] for detector in detectors]
+
+    """ CHECKPOINTS """
+
+    def retrieve_checkpoint_info(self) -> dict:
+        """
+        Retrieve the sampler information required to resume the simulation from a checkpoint
+
+        :return: previous waiting time per lane and previous passing vehicles per detector
+        :rtype: dict
+        """
+        return {'prev_waiting_time': dict(zip(self._lanes, self._prev_waiting_time.tolist())),
+                'prev_detector_vehicles': {detector: list(vehicles) for detector, vehicles in
+                                           zip(self._detectors, self._prev_detector_vehicles)}}
+
+    def restore_checkpoint_info(self, checkpoint_info: dict) -> None:
+        """
+        Restore the sampler information from a checkpoint
+
+        :param checkpoint_info: sampler checkpoint information
+        :type checkpoint_info: dict
+        :return: None
+        """
+        for lane, waiting_time in checkpoint_info['prev_waiting_time'].items():
+            self._prev_waiting_time[self._lanes_indices[lane]] = waiting_time
+
+        # Previous checkpoints do not store the detectors vehicles
+        for detector, vehicles in checkpoint_info.get('prev_detector_vehicles', {}).items():
+            self._prev_detector_vehicles[self._detectors_indices[detector]] = frozenset(vehicles)
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def lanes(self) -> tuple:
+        """
+        Sampled lanes getter
+
+        :return: sampled lanes names
+        :rtype: tuple
+        """
+        return self._lanes
+
+    @property
+    def detectors(self) -> tuple:
+        """
+        Sampled detectors getter
+
+        :return: sampled detectors names
+        :rtype: tuple
+        """
+        return self._detectors
+
+    @property
+    def variables_rows(self) -> dict:
+        """
+        Lanes variables rows getter
+
+        :return: row of each TraCI lane variable on the lane values array
+        :rtype: dict
+        """
+        return self._variables_rows
+
+    @property
+    def lane_values(self) -> np.ndarray:
+        """
+        Lanes variables values of the current step getter
+
+        :return: array with one row per variable and one column per lane
+        :rtype: np.ndarray
+        """
+        return self._lane_values
+
+    @property
+    def released_waiting_time(self) -> np.ndarray:
+        """
+        Waiting time released per lane on the current step getter
+
+        :return: previous waiting time on the lanes where it has decreased, 0 otherwise
+        :rtype: np.ndarray
+        """
+        return self._released_waiting_time
+
+    @property
+    def detector_vehicles(self) -> list:
+        """
+        Passing vehicles per detector of the current step getter
+
+        :return: vehicles identifiers per detector
+        :rtype: list
+        """
+        return self._detector_vehicles
+
+    @property
+    def vehicles_roads(self) -> dict:
+        """
+        Road per tracked vehicle of the current step getter
+
+        :return: road identifier per vehicle identifier
+        :rtype: dict
+        """
+        return self._vehicles_roads
+
+    @property
+    def detector_new_vehicles(self) -> np.ndarray:
+        """
+        Number of vehicles entering each detector on the current step getter
+
+        :return: number of vehicles per detector that were not on it on the previous step
+        :rtype: np.ndarray
+        """
+        return self._detector_new_vehicles
@@ -0,0 +1,188 @@
+import heapq
+
+import numpy as np
+
+from tdt.static.constants import LANE_METRICS_VARIABLES, DEFAULT_EVENT_THRESHOLD, DEFAULT_EVENT_SMOOTHING, \
+    EVENT_OCCUPANCY_FLOOR
+
+
+class AdaptationScheduler:
+    """
+    Event-driven scheduler of the traffic lights adaptation. Each traffic light keeps the exponentially smoothed
+    occupancy of its inbound lanes, updated on each step from the simulation sampler, and it is due when the smoothed
+    occupancy changes more than a threshold since its last adaptation or when its information reaches the maximum
+    staleness. The next due traffic lights are stored on a priority queue by due timestep.
+
+    :param sampler: simulation sampler
+    :type sampler: SimulationSampler
+    :param traffic_lights: traffic light adapters by traffic light identifier
+    :type traffic_lights: dict
+    :param min_interval: minimum number of steps between the adaptations of a traffic light
+    :type min_interval: int
+    :param max_staleness: maximum number of steps between the adaptations of a traffic light
+    :type max_staleness: int
+    :param threshold: relative change of the smoothed occupancy triggering the adaptation. Default to 0.5.
+    :type threshold: float
+    :param smoothing: smoothing factor of the occupancy per step. Default to 0.01.
+    :type smoothing: float
+    """
+
+    def __init__(self, sampler, traffic_lights: dict, min_interval: int, max_staleness: int,
+                 threshold: float = DEFAULT_EVENT_THRESHOLD, smoothing: float = DEFAULT_EVENT_SMOOTHING) -> None:
+        """
+        AdaptationScheduler initializer
+        """
+        self._sampler, self._min_interval, self._max_staleness = sampler, min_interval, max_staleness
+        self._threshold, self._smoothing = threshold, smoothing
+
+        # Traffic lights identifiers and its indices
+        self._traffic_lights_ids = tuple(traffic_lights.keys())
+        self._traffic_lights_indices = {tl_id: index for index, tl_id in enumerate(self._traffic_lights_ids)}
+        num_traffic_lights = len(self._traffic_lights_ids)
+
+        # Sampler column of each inbound lane along with the index of its traffic light, so the occupancy per traffic
+        # light is aggregated at once
+        lanes_columns, lanes_traffic_lights = [], []
+        for index, traffic_light in enumerate(traffic_lights.values()):
+            columns = sampler.retrieve_lanes_indices(traffic_light.inbound_lanes_names)
+            lanes_columns.extend(columns)
+            lanes_traffic_lights.extend([index] * len(columns))
+
+        self._lanes_columns = np.array(lanes_columns, dtype=np.intp)
+        self._lanes_traffic_lights = np.array(lanes_traffic_lights, dtype=np.intp)
+        self._num_lanes = np.maximum(np.bincount(self._lanes_traffic_lights, minlength=num_traffic_lights), 1)
+        self._occupancy_row = sampler.variables_rows[LANE_METRICS_VARIABLES['occupancy']]
+
+        # Smoothed occupancy per traffic light and its value at the last adaptation
+        self._smoothed_occupancy = np.zeros(num_traffic_lights)
+        self._baseline_occupancy = np.zeros(num_traffic_lights)
+
+        # Last adaptation and due timesteps per traffic light, the due one is -1 once it is retrieved
+        self._last_timestep = np.zeros(num_traffic_lights, dtype=np.int64)
+        self._due_timestep = np.full(num_traffic_lights, max_staleness, dtype=np.int64)
+
+        # Priority queue of (due timestep, traffic light index), the outdated entries are discarded once popped
+        self._queue = [(max_staleness, index) for index in range(num_traffic_lights)]
+        heapq.heapify(self._queue)
+
+        # Number of adaptations triggered by a traffic change and by the staleness deadline
+        self._metrics = {'triggered': 0, 'deadline': 0}
+
+    def update(self, timestep: int) -> None:
+        """
+        Update the smoothed occupancy of each traffic light with the current step and schedule those whose occupancy
+        has changed more than the threshold since its last adaptation
+
+        :param timestep: simulation timestep
+        :type timestep: int
+        :return: None
+        """
+        # Mean occupancy of the inbound lanes per traffic light
+        occupancy = np.bincount(self._lanes_traffic_lights,
+                                weights=self._sampler.lane_values[self._occupancy_row, self._lanes_columns],
+                                minlength=len(self._traffic_lights_ids)) / self._num_lanes
+
+        # Update the smoothed occupancy
+        self._smoothed_occupancy += self._smoothing * (occupancy - self._smoothed_occupancy)
+
+        # Relative change since the last adaptation, with a floor so the almost empty lanes do not trigger on noise
+        changed = np.abs(self._smoothed_occupancy - self._baseline_occupancy) > \
+            self._threshold * np.maximum(self._baseline_occupancy, EVENT_OCCUPANCY_FLOOR)
+
+        # Only those traffic lights adapted at least the minimum interval ago and not already due are scheduled
+        ready = (timestep - self._last_timestep >= self._min_interval) & (self._due_timestep > timestep)
+
+        for index in np.flatnonzero(changed & ready):
+            self._due_timestep[index] = timestep
+            heapq.heappush(self._queue, (timestep, int(index)))
+            self._metrics['triggered'] += 1
+
+    def retrieve_due_traffic_lights(self, timestep: int) -> list:
+        """
+        Retrieve the traffic lights due at the given timestep, removing them from the queue. They must be rescheduled
+        once they are adapted.
+
+        :param timestep: simulation timestep
+        :type timestep: int
+        :return: due traffic lights identifiers
+        :rtype: list
+        """
+        due_traffic_lights = []
+        while self._queue and self._queue[0][0] <= timestep:
+            due_timestep, index = heapq.heappop(self._queue)
+
+            # Discard the outdated entries, whose traffic light has been rescheduled
+            if due_timestep != self._due_timestep[index]:
+                continue
+
+            # Count the adaptations due to the staleness deadline
+            if due_timestep == self._last_timestep[index] + self._max_staleness:
+                self._metrics['deadline'] += 1
+
+            self._due_timestep[index] = -1
+            due_traffic_lights.append(self._traffic_lights_ids[index])
+
+        return due_traffic_lights
+
+    def reschedule(self, traffic_lights_ids: list, timestep: int) -> None:
+        """
+        Reschedule the adapted traffic lights at its staleness deadline, storing its current smoothed occupancy as the
+        reference of the next changes
+
+        :param traffic_lights_ids: adapted traffic lights identifiers
+        :type traffic_lights_ids: list
+        :param timestep: simulation timestep
+        :type timestep: int
+        :return: None
+        """
+        for tl_id in traffic_lights_ids:
+            index = self._traffic_lights_indices[tl_id]
+            self._last_timestep[index] = timestep
+            self._baseline_occupancy[index] = self._smoothed_occupancy[index]
+            self._due_timestep[index] = timestep + self._max_staleness
+            heapq.heappush(self._queue, (timestep + self._max_staleness, index))
+
+    """ CHECKPOINTS """
+
+    def retrieve_checkpoint_info(self) -> dict:
+        """
+        Retrieve the scheduler information required to resume the simulation from a checkpoint
+
+        :return: smoothed and baseline occupancy, last adaptation and due timesteps per traffic light
+        :rtype: dict
+        """
+        return {tl_id: {'smoothed_occupancy': float(self._smoothed_occupancy[index]),
+                        'baseline_occupancy': float(self._baseline_occupancy[index]),
+                        'last_timestep': int(self._last_timestep[index]),
+                        'due_timestep': int(self._due_timestep[index])}
+                for tl_id, index in self._traffic_lights_indices.items()}
+
+    def restore_checkpoint_info(self, checkpoint_info: dict) -> None:
+        """
+        Restore the scheduler information from a checkpoint, rebuilding the priority queue
+
+        :param checkpoint_info: scheduler checkpoint information
+        :type checkpoint_info: dict
+        :return: None
+        """
+        for tl_id, tl_checkpoint_info in checkpoint_info.items():
+            index = self._traffic_lights_indices[tl_id]
+            self._smoothed_occupancy[index] = tl_checkpoint_info['smoothed_occupancy']
+            self._baseline_occupancy[index] = tl_checkpoint_info['baseline_occupancy']
+            self._last_timestep[index] = tl_checkpoint_info['last_timestep']
+            self._due_timestep[index] = tl_checkpoint_info['due_timestep']
+
+        self._queue = [(int(due_timestep), index) for index, due_timestep in enumerate(self._due_timestep)]
+        heapq.heapify(self._queue)
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Scheduler metrics getter
+
+        :return: number of adaptations triggered by a traffic change and by the staleness deadline
+        :rtype: dict
+        """
+        return self._metrics
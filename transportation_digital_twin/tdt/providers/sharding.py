@@ -0,0 +1,225 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+from sumolib.miscutils import getFreeSocketPort
+
+from sumo_generators.network.net_topology import NetworkTopology
+from sumo_generators.static.constants import TRAFFIC_INFO_TOPIC
+from tdt.providers.local_bus import ShardBridge
+from tdt.providers.traci_sim import TraCISimulator
+from tdt.providers.utils import retrieve_network_traffic_lights
+
+
+def partition_traffic_lights(adjacent_tls: dict, num_partitions: int) -> list:
+    """
+    Partition the traffic lights into balanced partitions growing them by breadth-first search over the adjacency
+    graph, so adjacent traffic lights stay together where possible. The search frontier is shared between consecutive
+    partitions, so each partition starts next to the previous one.
+
+    :param adjacent_tls: adjacent traffic lights identifiers by traffic light identifier
+    :type adjacent_tls: dict
+    :param num_partitions: number of partitions
+    :type num_partitions: int
+    :return: traffic lights identifiers per partition
+    :rtype: list
+    """
+    # Sort the traffic lights so the partitions are deterministic
+    traffic_lights = sorted(adjacent_tls)
+
+    # Undirected adjacency graph, ignoring the traffic lights not present on the given ones
+    neighbours = {traffic_light: set() for traffic_light in traffic_lights}
+    for traffic_light, adjacent_ids in adjacent_tls.items():
+        for adjacent_id in adjacent_ids:
+            if adjacent_id in neighbours and adjacent_id != traffic_light:
+                neighbours[traffic_light].add(adjacent_id)
+                neighbours[adjacent_id].add(traffic_light)
+
+    # Partitions sizes, as balanced as possible
+    num_traffic_lights = len(traffic_lights)
+    sizes = [num_traffic_lights // num_partitions + (1 if index < num_traffic_lights % num_partitions else 0)
+             for index in range(num_partitions)]
+
+    # Assigned traffic lights, search frontier and iterator over the seeds of the disconnected components
+    assigned, frontier, seeds = set(), deque(), iter(traffic_lights)
+
+    partitions = []
+    for size in sizes:
+        partition = []
+        while len(partition) < size:
+            # Discard the frontier traffic lights already assigned
+            while frontier and frontier[0] in assigned:
+                frontier.popleft()
+
+            # Start from a new seed when the frontier is empty, this is, a new connected component
+            if not frontier:
+                frontier.append(next(traffic_light for traffic_light in seeds if traffic_light not in assigned))
+
+            # Assign the traffic light and extend the frontier with its adjacent ones
+            traffic_light = frontier.popleft()
+            assigned.add(traffic_light)
+            partition.append(traffic_light)
+            frontier.extend(sorted(neighbours[traffic_light] - assigned))
+
+        partitions.append(partition)
+
+    return partitions
+
+
+def retrieve_shards_routes(adjacent_tls: dict, partitions: list) -> dict:
+    """
+    Retrieve the routes of the adjacent traffic lights information between shards: each traffic light subscribes to the
+    information topics of its adjacent traffic lights, so those controlled by other shards must be routed to it
+
+    :param adjacent_tls: adjacent traffic lights identifiers by traffic light identifier
+    :type adjacent_tls: dict
+    :param partitions: traffic lights identifiers per partition, whose client order starts at 1
+    :type partitions: list
+    :return: client orders of the shards subscribed to each topic by the client order of the shard publishing it
+    :rtype: dict
+    """
+    # Client order of each traffic light
+    shards = {traffic_light: client_order for client_order, partition in enumerate(partitions, start=1)
+              for traffic_light in partition}
+
+    routes = {client_order: {} for client_order in range(1, len(partitions) + 1)}
+    for traffic_light, adjacent_ids in adjacent_tls.items():
+        for adjacent_id in adjacent_ids:
+            if traffic_light in shards and adjacent_id in shards and shards[traffic_light] != shards[adjacent_id]:
+                routes[shards[adjacent_id]].setdefault(TRAFFIC_INFO_TOPIC + '/' + adjacent_id, set()).add(
+                    shards[traffic_light])
+
+    return {client_order: {topic: sorted(orders) for topic, orders in shard_routes.items()}
+            for client_order, shard_routes in routes.items()}
+
+
+def run_shard(shard: dict) -> dict:
+    """
+    Run a TraCI client of a multi-client simulation in the current process, monitoring and adapting only the traffic
+    lights of its partition. The first client starts SUMO and the remaining ones connect to it.
+
+    :param shard: shard parameters: client order, partition, sumo configuration, simulation and database params
+    :type shard: dict
+    :return: shard summary
+    :rtype: dict
+    """
+    # Bridge exchanging the adjacent traffic lights information with the other shards
+    shard_bridge = ShardBridge(client_order=shard['client_order'], inboxes=shard['inboxes'], routes=shard['routes'],
+                               num_senders=shard['num_senders'])
+
+    # Create the local simulator of the shard traffic lights
+    traci_sim = TraCISimulator(sumo_conf=shard['sumo_conf'], time_pattern_file=shard['time_pattern'],
+                               dates=shard['dates'], local=True, num_clients=shard['num_clients'],
+                               client_order=shard['client_order'], port=shard['port'],
+                               traffic_lights_ids=shard['traffic_lights_ids'], shard_bridge=shard_bridge,
+                               **shard['simulator_params'])
+
+    # Get simulation params
+    simulation_params = traci_sim.retrieve_simulation_params(load_vehicles_dir=shard['load_vehicles_dir'],
+                                                             seed=shard['seed'])
+
+    try:
+        # Measure the topology initialization, including the wait for the remaining clients
+        start_time = time.perf_counter()
+        traci_sim.initialize_simulation_topology(simulation_params=simulation_params,
+                                                 topology_database_params=shard['topology_database_params'],
+                                                 **shard['components'])
+        initialization_time = time.perf_counter() - start_time
+
+        # Measure the simulation loop
+        start_time = time.perf_counter()
+        traci_sim.simulate()
+        simulation_time = time.perf_counter() - start_time
+    except Exception:
+        # Stop the other shards, which would wait for the messages of this one on its next exchange
+        shard_bridge.notify_failure()
+        raise
+
+    return {'client_order': shard['client_order'], 'num_traffic_lights': len(traci_sim.traffic_lights),
+            'steps': traci_sim.cur_timestep, 'summary_info': traci_sim.summary_info,
+            'initialization_time': initialization_time, 'simulation_time': simulation_time}
+
+
+def run_sharded_simulation(sumo_conf: dict, topology_database_params: dict, num_clients: int,
+                           time_pattern_file: str = '', dates: str = '', load_vehicles_dir: str = '',
+                           seed: int = None, components: dict = None, **simulator_params) -> dict:
+    """
+    Run a local simulation sharding the traffic lights control across several processes. SUMO is started with
+    several TraCI clients, one per process, and each one monitors and adapts the traffic lights of one partition of
+    the topology graph. SUMO only advances a step once all the clients have requested it. The adjacent traffic lights
+    information published by a shard is routed to the shards of its subscribers through shared queues, so the traffic
+    lights on the partitions boundaries receive it as on a single process. All the network traffic lights must be on
+    the topology database, otherwise no shard would control them.
+
+    :param sumo_conf: SUMO configuration
+    :type sumo_conf: dict
+    :param topology_database_params: topology database connection parameters
+    :type topology_database_params: dict
+    :param num_clients: number of TraCI clients (processes)
+    :type num_clients: int
+    :param time_pattern_file: time pattern input file. Default is ''.
+    :type time_pattern_file: str
+    :param dates: calendar dates from start to end to simulate. Default is ''.
+    :type dates: str
+    :param load_vehicles_dir: directory to load the vehicles flows. Default to ''.
+    :type load_vehicles_dir: str
+    :param seed: SUMO random number generator seed. Default to None, using the SUMO default seed.
+    :type seed: int
+    :param components: traffic light components installed on each shard. Default to None, no components.
+    :type components: dict
+    :param simulator_params: additional TraCISimulator parameters
+    :return: simulation summary, aggregated over the shards, and the summary per shard
+    :rtype: dict
+    """
+    # Retrieve the topology graph and partition its traffic lights
+    NetworkTopology(ip_address=topology_database_params['ip_address'], user=topology_database_params['user'],
+                    password=topology_database_params['password'], traci=None)
+    adjacent_tls = NetworkTopology.get_all_adjacent_tl_ids()
+
+    # Each shard must control at least one traffic light
+    if num_clients > len(adjacent_tls):
+        raise Exception(f"The number of clients ({num_clients}) can not be greater than the number of traffic lights "
+                        f"({len(adjacent_tls)})")
+
+    # The shards only control the traffic lights of the topology database
+    missing_traffic_lights = retrieve_network_traffic_lights(config_file=sumo_conf['config_file']) - set(adjacent_tls)
+    if missing_traffic_lights:
+        raise Exception(f"Traffic lights {sorted(missing_traffic_lights)} are not on the topology database, so they "
+                        f"would not be controlled by any shard. Load the network topology into the database.")
+
+    partitions = partition_traffic_lights(adjacent_tls=adjacent_tls, num_partitions=num_clients)
+    routes = retrieve_shards_routes(adjacent_tls=adjacent_tls, partitions=partitions)
+
+    # Port where SUMO listens to the clients
+    port = getFreeSocketPort()
+
+    # Run all the clients at the same time, as SUMO waits for all of them, with an inbox queue per shard
+    start_time = time.perf_counter()
+    with Manager() as manager, ProcessPoolExecutor(max_workers=num_clients) as executor:
+        inboxes = {client_order: manager.Queue() for client_order in range(1, num_clients + 1)}
+
+        # Define one shard per client, whose order starts at 1, along with its routes and the shards routing to it
+        shards = [{'client_order': client_order, 'num_clients': num_clients, 'port': port,
+                   'traffic_lights_ids': partition, 'sumo_conf': sumo_conf, 'time_pattern': time_pattern_file,
+                   'dates': dates, 'load_vehicles_dir': load_vehicles_dir, 'seed': seed,
+                   'components': components or {}, 'topology_database_params': topology_database_params,
+                   'simulator_params': simulator_params, 'inboxes': inboxes, 'routes': routes[client_order],
+                   'num_senders': sum(1 for sender_order, sender_routes in routes.items()
+                                      if any(client_order in orders for orders in sender_routes.values()))}
+                  for client_order, partition in enumerate(partitions, start=1)]
+
+        results = list(executor.map(run_shard, shards))
+    wall_time = time.perf_counter() - start_time
+
+    # Aggregate the shards summaries
+    waiting_time = sum(result['summary_info']['waiting_time'] for result in results)
+    veh_passed = sum(result['summary_info']['veh_passed'] for result in results)
+    simulation_time = max(result['simulation_time'] for result in results)
+
+    return {'num_clients': num_clients, 'num_traffic_lights': sum(result['num_traffic_lights'] for result in results),
+            'steps': results[0]['steps'], 'waiting_time': waiting_time, 'veh_passed': veh_passed,
+            'waiting_time_per_veh': waiting_time / veh_passed if veh_passed else 0.0,
+            'simulation_time': simulation_time, 'wall_time': wall_time,
+            'steps_per_second': results[0]['steps'] / simulation_time if simulation_time else 0.0,
+            'shards': results}
@@ -1,15 +1,23 @@
-import paho.mqtt.client as mqtt
-import traci
+import os
+import pickle
 
 from sumo_generators.network.net_topology import NetworkTopology
 from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, TRAFFIC_INFO_TOPIC, DEFAULT_TEMPORAL_WINDOW, \
-    POSSIBLE_CYCLES
+    POSSIBLE_CYCLES, PROFILING_TOPIC, PUBLISHER_TOPIC, DEFAULT_PAYLOAD_ENCODING
 from sumo_generators.time_patterns.time_patterns import TimePattern
 from sumo_generators.time_patterns.utils import retrieve_date_info
-from sumo_generators.utils.utils import parse_to_valid_schema
 from tdt.adaptation.context import TrafficLightAdapter
 from tdt.adaptation.strategy import *
+from tdt.providers.local_bus import LocalBus
+from tdt.providers.multiplexer import MQTTMultiplexer
+from tdt.providers.profiler import SimulationProfiler
+from tdt.providers.publisher import AsyncPublisher
+from tdt.providers.recorder import ObservationRecorder
+from tdt.providers.replay import ReplayBackend, ReplaySampler
+from tdt.providers.sampler import SimulationSampler
+from tdt.providers.scheduler import AdaptationScheduler
 from tdt.providers.utils import *
+from tdt.storage.spill import HistorySpillLog
 from tdt.static.constants import *
 from turns_predictor.providers.predictor import TurnPredictor
 
@@ -21,7 +29,20 @@ class TraCISimulator:
 
     def __init__(self, sumo_conf, time_pattern_file: str = '', dates: str = '',
                  mqtt_url: str = MQTT_URL, mqtt_port: int = MQTT_PORT, local: bool = False,
-                 temporal_window: int = DEFAULT_TEMPORAL_WINDOW):
+                 temporal_window: int = DEFAULT_TEMPORAL_WINDOW, subscriptions: bool = False,
+                 backend: str = DEFAULT_SIMULATION_BACKEND, label: str = DEFAULT_SIMULATION_LABEL,
+                 checkpoint_dir: str = '', checkpoint_period: int = DEFAULT_CHECKPOINT_PERIOD,
+                 profile_file: str = '', profile_publish: bool = False,
+                 publisher_policy: str = DEFAULT_PUBLISHER_POLICY,
+                 publisher_queue_size: int = DEFAULT_PUBLISHER_QUEUE_SIZE,
+                 payload_encoding: str = DEFAULT_PAYLOAD_ENCODING,
+                 record_dir: str = '', replay_dir: str = '', num_clients: int = DEFAULT_NUM_CLIENTS,
+                 client_order: int = 1, port: int = None, traffic_lights_ids: list = None, shard_bridge=None,
+                 adaptation_mode: str = DEFAULT_ADAPTATION_MODE, event_threshold: float = DEFAULT_EVENT_THRESHOLD,
+                 event_min_cycles: int = DEFAULT_EVENT_MIN_CYCLES, event_max_cycles: int = DEFAULT_EVENT_MAX_CYCLES,
+                 mesoscopic: bool = False, history_retention: int = DEFAULT_HISTORY_RETENTION,
+                 history_spill_file: str = '', storage_engine: str = DEFAULT_STORAGE_ENGINE,
+                 history_persist_dir: str = ''):
         """
         TraCISimulator initializer.
 
@@ -38,6 +59,78 @@ class TraCISimulator:
         :type local: bool
         :param temporal_window: number of TL cycles to gather information.
         :type temporal_window: int
+        :param subscriptions: flag to monitor the traffic lights using TraCI variable subscriptions. Default to False.
+        :type subscriptions: bool
+        :param backend: simulation backend, either 'traci' (TCP connection to SUMO) or 'libsumo' (in-process).
+        Default to 'traci'.
+        :type backend: str
+        :param label: TraCI connection label, it must be unique when several simulations are run at the same time.
+        Default to 'default'.
+        :type label: str
+        :param checkpoint_dir: directory where the simulation checkpoints are stored. Default to '', disabled.
+        :type checkpoint_dir: str
+        :param checkpoint_period: number of temporal windows between checkpoints. Default to 8.
+        :type checkpoint_period: int
+        :param profile_file: JSON file where the simulation phases timings are dumped. Default to '', not dumped.
+        :type profile_file: str
+        :param profile_publish: flag to publish the timings of each temporal window into the middleware.
+        Default to False.
+        :type profile_publish: bool
+        :param publisher_policy: backpressure policy of the asynchronous publisher when its queue is full, one of
+        'block', 'drop_oldest' or 'coalesce'. Default to 'block'.
+        :type publisher_policy: str
+        :param publisher_queue_size: maximum number of temporal windows queued on the asynchronous publisher.
+        Default to 4.
+        :type publisher_queue_size: int
+        :param payload_encoding: encoding of the published payloads, either 'json' or 'msgpack'. Default to 'json'.
+        :type payload_encoding: str
+        :param record_dir: directory where the observations read from TraCI on each step are recorded. Default to '',
+        disabled.
+        :type record_dir: str
+        :param replay_dir: directory of an observations recording to replay instead of running SUMO, replacing the
+        simulation backend. Default to '', disabled.
+        :type replay_dir: str
+        :param num_clients: number of TraCI clients connected to SUMO, each one controlling a partition of the traffic
+        lights. Default to 1.
+        :type num_clients: int
+        :param client_order: order of this client when several clients are connected, the first one starts SUMO.
+        Default to 1.
+        :type client_order: int
+        :param port: port where SUMO listens to the TraCI clients when several clients are connected. Default to None.
+        :type port: int
+        :param traffic_lights_ids: identifiers of the traffic lights monitored and adapted by this simulator. Default to
+        None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :param shard_bridge: bridge exchanging the local bus messages with the other shards when several clients are
+        connected, so the adjacent traffic lights information crosses the partitions. Default to None.
+        :type shard_bridge: ShardBridge
+        :param adaptation_mode: adaptation mode, either 'periodic' (all the traffic lights each temporal window) or
+        'event' (each traffic light when its occupancy changes or its information is stale). Default to 'periodic'.
+        :type adaptation_mode: str
+        :param event_threshold: relative change of the smoothed occupancy triggering the adaptation of a traffic light
+        on the event mode. Default to 0.5.
+        :type event_threshold: float
+        :param event_min_cycles: minimum number of traffic light cycles between adaptations on the event mode.
+        Default to 1.
+        :type event_min_cycles: int
+        :param event_max_cycles: maximum number of traffic light cycles between adaptations on the event mode.
+        Default to 10.
+        :type event_max_cycles: int
+        :param mesoscopic: flag to run the mesoscopic simulation, monitoring the lanes from its edges variables.
+        Default to False.
+        :type mesoscopic: bool
+        :param history_retention: number of temporal windows kept in memory by the traffic lights. Default to 0, all
+        of them.
+        :type history_retention: int
+        :param history_spill_file: append-only log where the temporal windows evicted from memory are spilled, so they
+        can still be retrieved. Default to '', they are discarded.
+        :type history_spill_file: str
+        :param storage_engine: storage engine of the traffic lights lanes information, either 'dict' or 'array'.
+        Default to 'dict'.
+        :type storage_engine: str
+        :param history_persist_dir: directory where each traffic light persists the metrics of its temporal windows
+        into a binary file, readable as memory-mapped arrays after the run. Default to '', they are not persisted.
+        :type history_persist_dir: str
         """
 
         # Define time pattern
@@ -57,41 +150,86 @@ class TraCISimulator:
         # Define temporal window based on number of cycles, currently all the TLs has a cycle of 90 seconds (urban)
         self._timesteps_monitor_info = POSSIBLE_CYCLES['urban'] * temporal_window
 
-        # Initialize TraCI simulation, topology info, traffic lights and date info to None
-        self._traci, self._net_topology, self._traffic_lights = None, None, None
+        # Initialize TraCI simulation, topology info, traffic lights and sampler to None
+        self._traci, self._net_topology, self._traffic_lights, self._sampler = None, None, None, None
+
+        # Store the simulation backend name, it is imported when the simulation starts, and its connection label
+        self._backend, self._label = backend, label
+
+        # Store the observations recording and replay directories and initialize the recorder to None
+        self._record_dir, self._replay_dir, self._recorder = record_dir, replay_dir, None
+
+        # Store the traffic lights history retention and create its spill log, shared by all the traffic lights
+        self._history_retention = history_retention or None
+        self._history_spill_log = HistorySpillLog(spill_file=history_spill_file) if history_spill_file else None
+
+        # Store the traffic lights storage engine
+        if storage_engine not in STORAGE_ENGINES:
+            raise Exception(f"Storage engine is not valid. It should be one of {STORAGE_ENGINES}")
+        self._storage_engine = storage_engine
+
+        # Store the traffic lights history persistence directory
+        self._history_persist_dir = history_persist_dir
+
+        # Store the multi-client parameters and the controlled traffic lights
+        self._num_clients, self._client_order, self._port = num_clients, client_order, port
+        self._traffic_lights_ids = traffic_lights_ids
+
+        # Store the adaptation mode and the event mode parameters, in timesteps, and initialize the scheduler to None
+        self._adaptation_mode, self._event_threshold = adaptation_mode, event_threshold
+        self._event_min_interval = POSSIBLE_CYCLES['urban'] * event_min_cycles
+        self._event_max_staleness = POSSIBLE_CYCLES['urban'] * event_max_cycles
+        self._scheduler = None
 
         # TL program to the middle one
         # self._tl_program = TL_PROGRAMS[int(len(TL_PROGRAMS) / 2)]
         # TL program to '0'
         self._tl_program = '0'
 
-        # Store local flag
-        self._local = local
+        # Store local, subscriptions and mesoscopic flags
+        self._local, self._subscriptions, self._mesoscopic = local, subscriptions, mesoscopic
 
         # Initialize current simulation step and temporal window
         self._cur_timestep, self._temporal_window = 0, 0
 
+        # Initialize the whole simulation summary information, along with the total emissions
+        self._summary_info = {'waiting_time': 0.0, 'veh_passed': 0, **{name: 0.0 for name in SUMMARY_EMISSIONS}}
+
+        # Initialize the summary of the traffic lights windows closed during the current temporal window on the event
+        # mode, published once per temporal window
+        self._window_summary_info = {'waiting_time': 0.0, 'veh_passed': 0}
+
+        # Store checkpoints directory and period
+        self._checkpoint_dir, self._checkpoint_period = checkpoint_dir, checkpoint_period
+
+        # Create the simulation phases profiler, only enabled if the timings are dumped or published
+        self._profile_file, self._profile_publish = profile_file, profile_publish and not local
+        self._profiler = SimulationProfiler(enabled=bool(self._profile_file or self._profile_publish))
+
         # Initialize date info
         self._date_info = retrieve_date_info(timestep=0, time_pattern=self._time_pattern)
 
-        # Execute locally
+        # Execute locally, exchanging the traffic lights information through an in-process bus
         if local:
-            self._mqtt_client = None
+            self._multiplexer, self._publisher = LocalBus(bridge=shard_bridge), None
         # Connect to middleware
         else:
-            # Create the MQTT client, its callbacks and its connection to the broker
-            self._mqtt_client = mqtt.Client()
-            self._mqtt_client.connect(mqtt_url, mqtt_port)
-            self._mqtt_url = mqtt_url
-            self._mqtt_port = mqtt_port
-            self._mqtt_client.loop_start()
+            # Create the MQTT connection shared with the traffic light adapters
+            self._multiplexer = MQTTMultiplexer(mqtt_url=mqtt_url, mqtt_port=mqtt_port, encoding=payload_encoding)
+
+            # Create the asynchronous publisher, so the simulation does not wait on the database and middleware I/O
+            self._publisher = AsyncPublisher(publish_function=self.publish_window_snapshot,
+                                             coalesce_function=coalesce_window_snapshots,
+                                             max_size=publisher_queue_size, policy=publisher_policy)
 
-    def retrieve_simulation_params(self, load_vehicles_dir: str = '') -> list:
+    def retrieve_simulation_params(self, load_vehicles_dir: str = '', seed: int = None) -> list:
         """
         Retrieve the simulation params
 
         :param load_vehicles_dir: directory to load the vehicles flows.
         :type load_vehicles_dir: str
+        :param seed: SUMO random number generator seed. Default to None, using the SUMO default seed.
+        :type seed: int
 
         :return: simulation parameters
         :rtype: list
@@ -105,6 +243,14 @@ class TraCISimulator:
         # Retrieve base params
         sumo_params = [self._sumo_binary, "-c", self._config_file, "--no-warnings"]
 
+        # Set the random seed
+        if seed is not None:
+            add_params.extend(["--seed", str(seed)])
+
+        # Enable the mesoscopic simulation
+        if self._mesoscopic:
+            add_params.extend(MESO_SIMULATION_PARAMS)
+
         # Extend with additional ones
         sumo_params.extend(add_params)
 
@@ -128,8 +274,9 @@ class TraCISimulator:
                     # Retrieve those traffic lights specified
                     component_traffic_lights = [v for k, v in self._traffic_lights.items() if k in component.split(',')]
                 else:
-                    # Single one traffic light
-                    component_traffic_lights = [self._traffic_lights[component]]
+                    # Single one traffic light, if it is controlled by this simulator
+                    component_traffic_lights = [self._traffic_lights[component]] \
+                        if component in self._traffic_lights else []
             else:
                 # Empty
                 component_traffic_lights = []
@@ -187,11 +334,33 @@ class TraCISimulator:
         :type traffic_predictor: str
         :return: None
         """
-        # SUMO is started as a subprocess and then the python script connects and runs.
-        traci.start(simulation_params)
-
-        # Store traci instance into the class
-        self._traci = traci
+        if self._replay_dir:
+            # Replay the recorded observations instead of running SUMO
+            self._traci = ReplayBackend(record_dir=self._replay_dir)
+        else:
+            # Import the simulation backend, it offers the same call surface for both TraCI and libsumo
+            backend = import_simulation_backend(backend=self._backend)
+
+            if self._backend == 'traci' and self._num_clients > 1:
+                # SUMO waits for all the clients, the first one starts it and the remaining ones connect to its port
+                if self._client_order == 1:
+                    backend.start(simulation_params + ['--num-clients', str(self._num_clients)], port=self._port,
+                                  label=self._label)
+                else:
+                    backend.init(port=self._port, numRetries=SHARDING_CONNECTION_RETRIES, label=self._label)
+                self._traci = backend.getConnection(self._label)
+
+                # Set the client order, the clients steps are executed in this order
+                self._traci.setOrder(self._client_order)
+            elif self._backend == 'traci':
+                # SUMO is started as a subprocess and then the python script connects and runs. The labeled connection
+                # is stored so several simulations can run at the same time
+                backend.start(simulation_params, label=self._label)
+                self._traci = backend.getConnection(self._label)
+            else:
+                # SUMO is loaded in the same process
+                backend.start(simulation_params)
+                self._traci = backend
 
         # Create Network Topology and connection to database
         self._net_topology = NetworkTopology(ip_address=topology_database_params['ip_address'],
@@ -199,17 +368,28 @@ class TraCISimulator:
                                              user=topology_database_params['user'], traci=self._traci)
 
         # Get traffic light names from database
-        traffic_lights_names = traci.trafficlight.getIDList()
+        traffic_lights_names = self._traci.trafficlight.getIDList()
+
+        # Keep only the traffic lights controlled by this simulator
+        if self._traffic_lights_ids is not None:
+            controlled_traffic_lights = set(self._traffic_lights_ids)
+            traffic_lights_names = [traffic_light for traffic_light in traffic_lights_names
+                                    if traffic_light in controlled_traffic_lights]
 
         # Load TL programs
         for traffic_light in traffic_lights_names:
             self._traci.trafficlight.setProgram(traffic_light, self._tl_program)
 
         # Initialize Traffic Lights with the static adaptation strategy by default
-        self._traffic_lights = {traffic_light: TrafficLightAdapter(tl_id=traffic_light, traci=traci, local=self._local,
+        self._traffic_lights = {traffic_light: TrafficLightAdapter(tl_id=traffic_light, traci=self._traci,
+                                                                   local=self._local,
                                                                    adaptation_strategy=StaticAS(traffic_light),
                                                                    net_topology=self._net_topology,
-                                                                   mqtt_url=self._mqtt_url, mqtt_port=self._mqtt_port)
+                                                                   multiplexer=self._multiplexer,
+                                                                   history_retention=self._history_retention,
+                                                                   history_spill_log=self._history_spill_log,
+                                                                   storage_engine=self._storage_engine,
+                                                                   history_persist_dir=self._history_persist_dir)
                                 for traffic_light in traffic_lights_names}
 
         # "install" traffic analyzers, traffic and turn predictors on all the traffic lights
@@ -218,6 +398,40 @@ class TraCISimulator:
 
         self.install_traffic_component(components=components)
 
+        # Create the sampler of the union of the lanes and detectors monitored by all the traffic lights, reading them from
+        # the recording when it is replayed
+        sampler_class = ReplaySampler if self._replay_dir else SimulationSampler
+        self._sampler = sampler_class(traci=self._traci,
+                                      lanes=[lane for traffic_light in self._traffic_lights.values()
+                                             for lane in traffic_light.inbound_lanes_names],
+                                      detectors=[detector for traffic_light in self._traffic_lights.values()
+                                                 for detector in traffic_light.traffic_light_detectors],
+                                      subscriptions=self._subscriptions, mesoscopic=self._mesoscopic)
+
+        # Subscribe once to the monitored lanes and detectors variables
+        if self._subscriptions:
+            self._sampler.subscribe()
+
+        # Attach the sampler to each traffic light
+        for traffic_light in self._traffic_lights.values():
+            traffic_light.attach_sampler(sampler=self._sampler)
+
+        # Create the adaptation scheduler of the event mode
+        if self._adaptation_mode == 'event':
+            self._scheduler = AdaptationScheduler(sampler=self._sampler, traffic_lights=self._traffic_lights,
+                                                  min_interval=self._event_min_interval,
+                                                  max_staleness=self._event_max_staleness,
+                                                  threshold=self._event_threshold)
+
+        # Create the observations recorder, storing the initial traffic lights programs
+        if self._record_dir:
+            self._recorder = ObservationRecorder(record_dir=self._record_dir, lanes=self._sampler.lanes,
+                                                 detectors=self._sampler.detectors)
+            self._recorder.record_programs(
+                programs={traffic_light: {'program_id': self._traci.trafficlight.getProgram(traffic_light),
+                                          'logics': self._traci.trafficlight.getAllProgramLogics(traffic_light)}
+                          for traffic_light in self._traffic_lights})
+
         # Initialize date info on each traffic light
         for traffic_light_id, traffic_light in self._traffic_lights.items():
             # Get actual program
@@ -230,14 +444,30 @@ class TraCISimulator:
             # Store date info and temporal window
             traffic_light.insert_date_info(temporal_window=self._temporal_window, date_info=self._date_info)
 
-    def adapt_traffic_lights(self) -> None:
+    def retrieve_traffic_lights(self, traffic_lights_ids: list = None) -> dict:
+        """
+        Retrieve the traffic light adapters of the given identifiers
+
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :return: traffic light adapters by traffic light identifier
+        :rtype: dict
+        """
+        if traffic_lights_ids is None:
+            return self._traffic_lights
+        else:
+            return {traffic_light_id: self._traffic_lights[traffic_light_id] for traffic_light_id in traffic_lights_ids}
+
+    def adapt_traffic_lights(self, traffic_lights_ids: list = None) -> None:
         """
         Adapt and update traffic lights program based on contextual information
 
+        :param traffic_lights_ids: traffic lights identifiers to adapt. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
         :return: None
         """
         # Global controller signalises the traffic lights to perform  its own adaptation process
-        for traffic_light_id, traffic_light in self._traffic_lights.items():
+        for traffic_light_id, traffic_light in self.retrieve_traffic_lights(traffic_lights_ids).items():
             # Update the traffic light program based on the adapter
             traffic_light.update_tl_program(timestep=self._cur_timestep)
 
@@ -247,6 +477,20 @@ class TraCISimulator:
 
         :return: None
         """
+        # Retrieve the monitored variables of the current simulation step once for all the traffic lights
+        self._sampler.sample()
+
+        # Retrieve the roads of the vehicles tracked by the traffic lights once, instead of once per traffic light
+        self._sampler.sample_vehicles_roads(
+            vehicles=set().union(*(traffic_light.turning_vehicles_passed
+                                   for traffic_light in self._traffic_lights.values())))
+
+        # Record the observations
+        if self._recorder:
+            self._recorder.record(lane_values=self._sampler.lane_values,
+                                  detector_vehicles=self._sampler.detector_vehicles,
+                                  vehicles_roads=self._sampler.vehicles_roads)
+
         # Monitor traffic lights contextual information
         for traffic_light_id, traffic_light in self._traffic_lights.items():
             # Remove previous passing vehicles
@@ -261,71 +505,211 @@ class TraCISimulator:
             # Calculate emissions per lane on each junction
             traffic_light.calculate_emissions_per_lane()
 
-    def process_publish_traffic_information(self) -> None:
+    def retrieve_summary_info(self, traffic_lights_ids: list = None) -> dict:
         """
-        Gather all the information related to the traffic lights and publish them.
+        Retrieve the summary of waiting time and vehicles passed of the traffic lights at its current temporal window
 
-        :return: None
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :return: summary waiting time and vehicles passed
+        :rtype: dict
         """
         # Initialize summary variables
         summary_waiting_time, summary_veh_passed = 0, 0
-        # Iterate over each traffic light, retrieve its information using the current timestamp and signalize to
-        # publish them
-        for traffic_light_id, traffic_light in self._traffic_lights.items():
-            # Retrieve traffic light information
-            traffic_light_info = traffic_light.get_traffic_info_by_temporal_window(self._temporal_window)
+
+        # Iterate over each traffic light and retrieve its information using its current temporal window
+        for traffic_light in self.retrieve_traffic_lights(traffic_lights_ids).values():
+            # Retrieve the traffic light waiting time and vehicles passed over its lanes
+            lanes_totals = traffic_light.get_lanes_totals()
 
             # Store summary of waiting time and vehicles passed
-            summary_waiting_time += sum([v['waiting_time_veh'] for k, v in
-                                         traffic_light_info['contextual_info'].items()])
+            summary_waiting_time += lanes_totals['waiting_time']
+            summary_veh_passed += lanes_totals['veh_passed']
 
-            summary_veh_passed += sum([v['num_passing_veh'] for k, v in
-                                       traffic_light_info['contextual_info'].items()])
+        return {'waiting_time': summary_waiting_time, 'veh_passed': summary_veh_passed}
+
+    def retrieve_emissions_info(self, traffic_lights_ids: list = None) -> dict:
+        """
+        Retrieve the total emissions of the traffic lights lanes at its current temporal window, adding up the emissions
+        of each step
+
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :return: total emissions by name
+        :rtype: dict
+        """
+        emissions_info = {name: 0.0 for name in SUMMARY_EMISSIONS}
 
+        # Iterate over each traffic light and retrieve its information using its current temporal window
+        for traffic_light in self.retrieve_traffic_lights(traffic_lights_ids).values():
+            lane_metrics_totals = traffic_light.get_lane_metrics_totals()
+
+            for name in SUMMARY_EMISSIONS:
+                emissions_info[name] += lane_metrics_totals[name]
+
+        return emissions_info
+
+    def update_summary_info(self, traffic_lights_ids: list = None) -> None:
+        """
+        Accumulate the summary information of the current temporal window into the whole simulation summary
+
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :return: None
+        """
+        traffic_info = self.retrieve_summary_info(traffic_lights_ids)
+        summary_info = dict(traffic_info, **self.retrieve_emissions_info(traffic_lights_ids))
+
+        # Checkpoints may not have all the summary keys
+        for k, v in summary_info.items():
+            self._summary_info[k] = self._summary_info.get(k, 0) + v
+
+        # Accumulate the closed windows summary until it is published on the event mode
+        if self._scheduler:
+            for k, v in traffic_info.items():
+                self._window_summary_info[k] += v
+
+    def retrieve_window_snapshot(self, traffic_lights_ids: list = None, summary: bool = True) -> dict:
+        """
+        Retrieve a snapshot of the information to publish at the current temporal window: the traffic lights lanes
+        information and programs to store into the topology database and the middleware messages. As the snapshot is
+        not modified afterwards, it can be published while the simulation continues.
+
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :param summary: flag to include the traffic lights summary information message. Default to True.
+        :type summary: bool
+        :return: traffic lights database information and list of (topic, payload) messages
+        :rtype: dict
+        """
+        snapshot = {'traffic_lights': {}, 'messages': []}
+
+        # Iterate over each traffic light and retrieve its information using its current temporal window
+        for traffic_light_id, traffic_light in self.retrieve_traffic_lights(traffic_lights_ids).items():
             # Append date information
-            traffic_light.insert_date_info(temporal_window=self._temporal_window, date_info=self._date_info)
+            traffic_light.insert_date_info(temporal_window=traffic_light.temporal_window, date_info=self._date_info)
 
             # Retrieve contextual info
             contextual_tl_info = traffic_light.get_processed_contextual_info()
 
-            # Store traffic light lanes contextual into the net topology database
-            self._net_topology.update_lanes_info(traffic_light_id, contextual_lane_info=contextual_tl_info['info'])
+            # Store the lanes contextual info and the program, retrieved here as TraCI is used by the simulation thread
+            snapshot['traffic_lights'][traffic_light_id] = {'lanes_info': contextual_tl_info['info'],
+                                                            'tl_program': traffic_light.get_tl_program()}
 
-            # Store traffic light program info
-            self._net_topology.update_traffic_light_program(tl_id=traffic_light_id,
-                                                            tl_program=traffic_light.get_tl_program())
+            # Store the contextual info and the components information messages
+            snapshot['messages'].extend(traffic_light.retrieve_publish_messages(contextual_tl_info=contextual_tl_info))
 
-            # Publish the contextual information
-            traffic_light.publish_contextual_info(contextual_tl_info=contextual_tl_info)
+        # Process summary information
+        if summary:
+            traffic_info_payload = process_payload(traffic_info=self.retrieve_summary_info(traffic_lights_ids),
+                                                   date_info=self._date_info)
+            snapshot['messages'].append((TRAFFIC_INFO_TOPIC, traffic_info_payload))
 
-            # Next components have the inner check if is available
+        # Publisher and multiplexer metrics, so the queue depth and the routed messages can be monitored
+        if self._publisher:
+            snapshot['messages'].append((PUBLISHER_TOPIC, {'publisher': self._publisher.retrieve_metrics(),
+                                                           'multiplexer': dict(self._multiplexer.metrics)}))
 
-            # Publish traffic analyzer information
-            traffic_light.publish_analyzer_info()
+        return snapshot
 
-            # Publish turn predictors information
-            traffic_light.publish_turn_predictions()
+    def process_publish_traffic_information(self, traffic_lights_ids: list = None, summary: bool = True) -> None:
+        """
+        Gather all the information related to the traffic lights and hand it to the asynchronous publisher. On the
+        local mode, its messages are queued on the local bus instead, without storing it into the topology database.
 
-            # Publish traffic type predictors information
-            traffic_light.publish_traffic_type_prediction()
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
+        :param summary: flag to publish the traffic lights summary information. Default to True.
+        :type summary: bool
+        :return: None
+        """
+        # Retrieve the temporal window snapshot
+        with self._profiler.measure('publish_snapshot'):
+            snapshot = self.retrieve_window_snapshot(traffic_lights_ids, summary=summary)
 
-        # Process summary information
-        traffic_info_payload = process_payload(traffic_info={'waiting_time': summary_waiting_time,
-                                                             'veh_passed': summary_veh_passed},
-                                               date_info=self._date_info)
+        self.submit_window_snapshot(snapshot=snapshot)
+
+    def process_publish_summary_info(self) -> None:
+        """
+        Publish the summary of the traffic lights windows closed during the current temporal window on the event mode,
+        so the summary information is published once per temporal window over all the traffic lights as on the periodic
+        mode, and start a new one
+
+        :return: None
+        """
+        traffic_info_payload = process_payload(traffic_info=dict(self._window_summary_info), date_info=self._date_info)
+        self.submit_window_snapshot(snapshot={'traffic_lights': {},
+                                              'messages': [(TRAFFIC_INFO_TOPIC, traffic_info_payload)]})
+
+        self._window_summary_info = {'waiting_time': 0.0, 'veh_passed': 0}
+
+    def submit_window_snapshot(self, snapshot: dict) -> None:
+        """
+        Hand a temporal window snapshot to the asynchronous publisher or, on the local mode, queue its messages on the
+        local bus
+
+        :param snapshot: temporal window snapshot
+        :type snapshot: dict
+        :return: None
+        """
+        # Submit the snapshot, only waiting if the publisher queue is full with the block policy
+        with self._profiler.measure('publish_submit'):
+            if self._publisher:
+                self._publisher.submit(snapshot)
+            else:
+                self._multiplexer.publish_batch(messages=snapshot['messages'])
+
+    def publish_window_snapshot(self, snapshot: dict) -> None:
+        """
+        Store the traffic lights information of a temporal window snapshot into the topology database and publish its
+        messages into the middleware. It is called by the asynchronous publisher worker, whose phases are also
+        profiled.
+
+        :param snapshot: temporal window snapshot
+        :type snapshot: dict
+        :return: None
+        """
+        for traffic_light_id, traffic_light_info in snapshot['traffic_lights'].items():
+            # Store traffic light lanes contextual into the net topology database
+            with self._profiler.measure('db_update_lanes'):
+                self._net_topology.update_lanes_info(traffic_light_id,
+                                                     contextual_lane_info=traffic_light_info['lanes_info'])
+
+            # Store traffic light program info
+            with self._profiler.measure('db_update_program'):
+                self._net_topology.update_traffic_light_program(tl_id=traffic_light_id,
+                                                                tl_program=traffic_light_info['tl_program'])
+
+        # Publish all the messages of the temporal window at once
+        with self._profiler.measure('mqtt_publish'):
+            self._multiplexer.publish_batch(messages=snapshot['messages'])
+
+    def publish_profiling_info(self, window_timings: dict) -> None:
+        """
+        Publish the time spent on each simulation phase during the last temporal window into the middleware
+
+        :param window_timings: time per simulation phase in seconds
+        :type window_timings: dict
+        :return: None
+        """
+        # Create a list with the phases timings, so they are parsed as different items
+        profiling_payload = {'timings': [{'phase': phase, 'temporal_window': self._temporal_window,
+                                          'window_time': elapsed_time}
+                                         for phase, elapsed_time in window_timings.items()]}
 
         # Publish data
-        self._mqtt_client.publish(topic=TRAFFIC_INFO_TOPIC,
-                                  payload=parse_to_valid_schema(traffic_info_payload))
+        self._multiplexer.publish(topic=PROFILING_TOPIC, payload=profiling_payload)
 
-    def clean_traffic_lights(self) -> None:
+    def clean_traffic_lights(self, traffic_lights_ids: list = None) -> None:
         """
         Clean and initialize traffic lights info such as date info and create new instance of historical info
 
+        :param traffic_lights_ids: traffic lights identifiers. Default to None, all the traffic lights.
+        :type traffic_lights_ids: list
         :return: None
         """
         # Update new date to the traffic lights, store new temporal window and road related info into the net db
-        for traffic_light_id, traffic_light in self._traffic_lights.items():
+        for traffic_light_id, traffic_light in self.retrieve_traffic_lights(traffic_lights_ids).items():
             # Increase temporal window
             traffic_light.increase_temporal_window()
 
@@ -333,11 +717,115 @@ class TraCISimulator:
             actual_program = traffic_light.get_tl_program()
 
             # Create new historical traffic info
-            traffic_light.create_historical_traffic_info(temporal_window=self._temporal_window,
+            traffic_light.create_historical_traffic_info(temporal_window=traffic_light.temporal_window,
                                                          actual_program=actual_program)
 
             # Insert date info and temporal window
-            traffic_light.insert_date_info(temporal_window=self._temporal_window, date_info=self._date_info)
+            traffic_light.insert_date_info(temporal_window=traffic_light.temporal_window, date_info=self._date_info)
+
+    def process_due_traffic_lights(self) -> None:
+        """
+        Adapt, publish and clean the traffic lights due on the current step on the event mode, each one closing its
+        own temporal window, and reschedule them
+
+        :return: None
+        """
+        # Update the scheduler with the current step and retrieve the due traffic lights
+        with self._profiler.measure('scheduling'):
+            self._scheduler.update(timestep=self._cur_timestep)
+            due_traffic_lights = self._scheduler.retrieve_due_traffic_lights(timestep=self._cur_timestep)
+
+        if due_traffic_lights:
+            # Adapt the due traffic lights programs
+            with self._profiler.measure('adaptation'):
+                self.adapt_traffic_lights(traffic_lights_ids=due_traffic_lights)
+
+            # Accumulate its temporal windows information into the simulation summary
+            self.update_summary_info(traffic_lights_ids=due_traffic_lights)
+
+            # Publish its information, whose summary is published along with the other traffic lights once per
+            # temporal window
+            self.process_publish_traffic_information(traffic_lights_ids=due_traffic_lights, summary=False)
+
+            # Clean its information, starting a new temporal window
+            with self._profiler.measure('clean'):
+                self.clean_traffic_lights(traffic_lights_ids=due_traffic_lights)
+
+            # Schedule them at its staleness deadline
+            self._scheduler.reschedule(traffic_lights_ids=due_traffic_lights, timestep=self._cur_timestep)
+
+        # Deliver the local messages, received on the new temporal window as on the distributed deployment. It is done
+        # on every step, as the shards bridges exchange its messages on the same steps
+        if self._local:
+            self._multiplexer.flush()
+
+    def save_checkpoint(self) -> str:
+        """
+        Save a checkpoint of the simulation: the SUMO simulation state along with the traffic lights information,
+        the current temporal window and the date info
+
+        :return: checkpoint information file
+        :rtype: str
+        """
+        # Create the checkpoint directory if it does not exist
+        os.makedirs(self._checkpoint_dir, exist_ok=True)
+
+        # Retrieve checkpoint files
+        state_file = os.path.join(self._checkpoint_dir, CHECKPOINT_STATE_FILE.format(timestep=self._cur_timestep))
+        info_file = os.path.join(self._checkpoint_dir, CHECKPOINT_INFO_FILE.format(timestep=self._cur_timestep))
+
+        # Save the SUMO simulation state
+        self._traci.simulation.saveState(state_file)
+
+        # Write the spilled temporal windows, referenced by the traffic lights storages offsets
+        if self._history_spill_log:
+            self._history_spill_log.flush()
+
+        # Save the simulator and the traffic lights information
+        checkpoint_info = {'state_file': os.path.basename(state_file), 'timestep': self._cur_timestep,
+                           'temporal_window': self._temporal_window, 'date_info': self._date_info,
+                           'summary_info': self._summary_info, 'window_summary_info': self._window_summary_info,
+                           'sampler': self._sampler.retrieve_checkpoint_info(),
+                           'scheduler': self._scheduler.retrieve_checkpoint_info() if self._scheduler else None,
+                           'traffic_lights': {traffic_light_id: traffic_light.retrieve_checkpoint_info()
+                                              for traffic_light_id, traffic_light in self._traffic_lights.items()}}
+
+        with open(info_file, 'wb') as checkpoint_file:
+            pickle.dump(checkpoint_info, checkpoint_file)
+
+        return info_file
+
+    def load_checkpoint(self, checkpoint_file: str) -> None:
+        """
+        Load a simulation checkpoint so the simulation resumes from it. It must be called once the simulation topology
+        is initialized. The traffic light components and adaptation strategies are not stored, so a checkpoint can be
+        used to fork several adaptation approaches from the same state.
+
+        :param checkpoint_file: checkpoint information file
+        :type checkpoint_file: str
+        :return: None
+        """
+        # Load the simulator and the traffic lights information
+        with open(checkpoint_file, 'rb') as checkpoint:
+            checkpoint_info = pickle.load(checkpoint)
+
+        # Load the SUMO simulation state, stored along with the information file
+        self._traci.simulation.loadState(os.path.join(os.path.dirname(checkpoint_file),
+                                                      checkpoint_info['state_file']))
+
+        # Restore the simulator information
+        self._cur_timestep, self._temporal_window = checkpoint_info['timestep'], checkpoint_info['temporal_window']
+        self._date_info, self._summary_info = checkpoint_info['date_info'], checkpoint_info['summary_info']
+        self._window_summary_info = checkpoint_info.get('window_summary_info', {'waiting_time': 0.0, 'veh_passed': 0})
+        self._sampler.restore_checkpoint_info(checkpoint_info['sampler'])
+
+        # Restore the scheduler information, if both the checkpoint and the simulation use the event mode
+        if self._scheduler and checkpoint_info.get('scheduler'):
+            self._scheduler.restore_checkpoint_info(checkpoint_info['scheduler'])
+
+        # Restore the traffic lights information
+        for traffic_light_id, traffic_light_checkpoint_info in checkpoint_info['traffic_lights'].items():
+            self._traffic_lights[traffic_light_id].restore_checkpoint_info(traffic_light_checkpoint_info)
 
     def simulate(self):
         """
@@ -347,25 +835,44 @@ class TraCISimulator:
         """
 
         """ Initialize the simulation variables """
-        # Define initial timestep and maximum timestep
-        self._cur_timestep, max_timestep = 0, len(self._time_pattern.pattern) * TIMESTEPS_PER_HOUR
+        # Define maximum timestep, the initial one is 0 unless the simulation is resumed from a checkpoint
+        max_timestep = len(self._time_pattern.pattern) * TIMESTEPS_PER_HOUR
+
+        # A replay ends with its recording
+        if self._replay_dir:
+            max_timestep = min(max_timestep, self._traci.num_steps)
 
         # Traci simulation. Iterate until simulation is ended
         while self._cur_timestep < max_timestep:
 
             # Monitor the traffic light contextual information
-            self.monitor_traffic_lights()
+            with self._profiler.measure('monitoring'):
+                self.monitor_traffic_lights()
+
+            # Initialize the checkpoint flag
+            save_checkpoint = False
+
+            # Adapt each traffic light when it is due on the event mode
+            if self._scheduler:
+                self.process_due_traffic_lights()
 
             # Store info each time interval
             if self._cur_timestep % self._timesteps_monitor_info == 0:
 
-                # Adapt traffic light programs
-                self.adapt_traffic_lights()
+                # Adapt all the traffic lights on the periodic mode
+                if not self._scheduler:
+                    # Adapt traffic light programs
+                    with self._profiler.measure('adaptation'):
+                        self.adapt_traffic_lights()
+
+                    # Accumulate the temporal window information into the simulation summary
+                    self.update_summary_info()
 
-                # Publish the information
-                if not self._local:
                     # Gather all the traffic lights information and publish them, along with its summary info
                     self.process_publish_traffic_information()
+                # Publish the summary of the traffic lights windows closed during the temporal window on the event mode
+                else:
+                    self.process_publish_summary_info()
 
                 # Increase the temporal window
                 self._temporal_window += 1
@@ -373,19 +880,92 @@ class TraCISimulator:
                 # Calculate new date info
                 self._date_info = retrieve_date_info(timestep=self._cur_timestep, time_pattern=self._time_pattern)
 
-                # Clean traffic lights info
-                self.clean_traffic_lights()
+                # Clean traffic lights info on the periodic mode
+                if not self._scheduler:
+                    with self._profiler.measure('clean'):
+                        self.clean_traffic_lights()
+
+                    # Deliver the local messages, received on the new temporal window as on the distributed deployment
+                    if self._local:
+                        self._multiplexer.flush()
+
+                # Save a checkpoint each checkpoint period
+                save_checkpoint = self._checkpoint_dir and self._temporal_window % self._checkpoint_period == 0
+
+                # Close the profiler temporal window and publish its timings
+                if self._profiler.enabled:
+                    window_timings = self._profiler.end_window()
+                    if self._profile_publish:
+                        self.publish_profiling_info(window_timings=window_timings)
 
             # Simulate a step
-            self._traci.simulationStep()
+            with self._profiler.measure('simulation_step'):
+                self._traci.simulationStep()
 
             # Increase simulation step
             self._cur_timestep += 1
 
+            # Save the checkpoint once the step is simulated, so the simulation is resumed on the next step
+            if save_checkpoint:
+                self.save_checkpoint()
+
+        # Accumulate the information of the last temporal window
+        self.update_summary_info()
+
+        # Store the last observations recorded
+        if self._recorder:
+            self._recorder.close()
+
+        # Close the traffic lights storages, persisting its last temporal window, and the history spill log
+        for traffic_light in self._traffic_lights.values():
+            traffic_light.close_history()
+        if self._history_spill_log:
+            self._history_spill_log.close()
+
         # Close TraCI simulation, the adapters connection and the MQTT client
         self._traci.close()
-        # If it is deployed
-        if not self._local:
+        # If it is deployed, wait for the queued temporal windows to be published, raising its first publishing error
+        # once the connections are closed and the timings dumped
+        try:
+            if not self._local:
+                self._publisher.close()
+        finally:
             for traffic_light_id, traffic_light in self._traffic_lights.items():
                 traffic_light.close_connection()
-            self._mqtt_client.loop_stop()
+            self._multiplexer.close()
+
+            # Dump the simulation phases timings, once the publisher worker has published the queued temporal windows
+            if self._profile_file:
+                self._profiler.dump(output_file=self._profile_file)
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def cur_timestep(self) -> int:
+        """
+        TraCISimulator current simulation timestep getter
+
+        :return: current simulation timestep
+        :rtype: int
+        """
+        return self._cur_timestep
+
+    @property
+    def traffic_lights(self) -> dict:
+        """
+        TraCISimulator traffic light adapters getter
+
+        :return: traffic light adapters by traffic light identifier
+        :rtype: dict
+        """
+        return self._traffic_lights
+
+    @property
+    def summary_info(self) -> dict:
+        """
+        TraCISimulator whole simulation summary information getter
+
+        :return: total waiting time and vehicles passed
+        :rtype: dict
+        """
+        return self._summary_info
@@ -1,11 +1,12 @@
 # UTILS
 import copy
-import math
+import glob
+import importlib
+import os
+import re
+import xml.etree.ElementTree as ElementTree
 
-import pandas as pd
-
-from sumo_generators.static.constants import DEFAULT_DATE_MONTH, DEFAULT_DATE_YEAR, DEFAULT_DATE_DAY, DEFAULT_DAY, \
-    DATE_FIELDS, TIMESTEPS_PER_HOUR
+from tdt.static.constants import SIMULATION_BACKENDS, CHECKPOINT_INFO_FILE
 
 
 # Simulation related utils
@@ -33,37 +34,90 @@ def process_payload(traffic_info: dict, date_info: dict) -> dict:
     return traffic_info_payload
 
 
-def retrieve_date_info(timestep: int, time_pattern: pd.DataFrame) -> dict:
+def coalesce_window_snapshots(oldest_snapshot: dict, newest_snapshot: dict) -> dict:
     """
-    Retrieve the date information for a given timestep (day, date_day, date_month and date_year)
-    
-    :param timestep: simulation timestep
-    :type timestep: int
-    :param time_pattern: simulation traffic time pattern
-    :type time_pattern: pandas Dataframe
-    :return: information related to the traffic simulation date.
-    :rtype: dict  
+    Coalesce two temporal window snapshots. Both the topology database information and the middleware messages are
+    overwritten by the newest ones, keeping only the newest payload per topic, as only the latest state is stored, so
+    the coalesced snapshot does not grow with the number of snapshots coalesced.
+
+    :param oldest_snapshot: oldest temporal window snapshot
+    :type oldest_snapshot: dict
+    :param newest_snapshot: newest temporal window snapshot
+    :type newest_snapshot: dict
+    :return: coalesced snapshot
+    :rtype: dict
+    """
+    return {'traffic_lights': {**oldest_snapshot['traffic_lights'], **newest_snapshot['traffic_lights']},
+            'messages': list({**dict(oldest_snapshot['messages']), **dict(newest_snapshot['messages'])}.items())}
+
+
+def import_simulation_backend(backend: str):
+    """
+    Import the simulation backend module. Both TraCI and libsumo offer the same call surface (start, close,
+    simulationStep and the domains such as trafficlight, lane or inductionloop). libsumo is an optional requirement,
+    only imported when it is used.
+
+    :param backend: simulation backend name, either 'traci' or 'libsumo'
+    :type backend: str
+    :return: simulation backend module
+    """
+    if backend not in SIMULATION_BACKENDS:
+        raise Exception(f"Simulation backend is not valid. It should be one of {SIMULATION_BACKENDS}")
+
+    try:
+        return importlib.import_module(backend)
+    except ImportError:
+        raise Exception(f"Simulation backend '{backend}' is not installed. The libsumo backend is optional, install it "
+                        f"with 'pip install -r requirements-libsumo.txt'")
+
+
+def find_latest_checkpoint(checkpoint_dir: str) -> str:
+    """
+    Find the latest checkpoint information file, the one with the greatest simulation timestep, on a given directory
+
+    :param checkpoint_dir: directory where the checkpoints are stored
+    :type checkpoint_dir: str
+    :return: latest checkpoint information file. Empty if there are not any checkpoints
+    :rtype: str
+    """
+    # Retrieve all the checkpoint information files
+    checkpoint_files = glob.glob(os.path.join(checkpoint_dir, CHECKPOINT_INFO_FILE.format(timestep='*')))
+
+    # Get the simulation timestep from the file name
+    timestep_pattern = re.compile(CHECKPOINT_INFO_FILE.format(timestep=r'(\d+)').replace('.', r'\.'))
+    checkpoints = {int(timestep_pattern.search(file).group(1)): file for file in checkpoint_files
+                   if timestep_pattern.search(file)}
+
+    return checkpoints[max(checkpoints)] if checkpoints else ''
+
+
+
+def retrieve_config_files(config_file: str) -> dict:
+    """
+    Retrieve the input files referenced by a SUMO configuration file: the network, routes and additional files, with
+    its paths relative to the configuration file directory
+
+    :param config_file: SUMO configuration file
+    :type config_file: str
+    :return: files paths by input option name, such as 'net-file' or 'route-files'
+    :rtype: dict
+    """
+    config_files = {}
+    for option in ElementTree.parse(config_file).getroot().findall('input/*'):
+        config_files[option.tag] = [os.path.join(os.path.dirname(config_file), file_name.strip())
+                                    for file_name in option.get('value', '').split(',') if file_name.strip()]
+
+    return config_files
+
+
+def retrieve_network_traffic_lights(config_file: str) -> set:
+    """
+    Retrieve the traffic lights identifiers defined on the network file of a SUMO configuration file
+
+    :param config_file: SUMO configuration file
+    :type config_file: str
+    :return: traffic lights identifiers
+    :rtype: set
     """
-    # Calculate the simulation timestep
-    simulation_timestep = math.floor(timestep / TIMESTEPS_PER_HOUR)
-    # Create the dict to store the information
-    simulation_date_info = dict()
-
-    # If simulation is not ended
-    if simulation_timestep < len(time_pattern.pattern):
-
-        # Obtain all the date information
-        simulation_date_info = time_pattern.get_pattern_info(simulation_timestep=simulation_timestep,
-                                                             fields=DATE_FIELDS)
-
-        # Store default values if there are not defined
-        if 'day' not in simulation_date_info:
-            simulation_date_info['day'] = DEFAULT_DAY
-        if 'date_day' not in simulation_date_info:
-            simulation_date_info['date_day'] = DEFAULT_DATE_DAY
-        if 'date_month' not in simulation_date_info:
-            simulation_date_info['date_month'] = DEFAULT_DATE_MONTH
-        if 'date_year' not in simulation_date_info:
-            simulation_date_info['date_year'] = DEFAULT_DATE_YEAR
-
-    return simulation_date_info
\ No newline at end of file
+    return {element.get('id') for network_file in retrieve_config_files(config_file).get('net-file', [])
+            for _, element in ElementTree.iterparse(network_file) if element.tag == 'tlLogic'}
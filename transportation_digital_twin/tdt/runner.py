@@ -0,0 +1,398 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tdt.static.constants as cnt
+from sumolib import checkBinary
+
+from sumo_generators.generators.utils import generate_flow_file
+from sumo_generators.network.net_topology import NetworkTopology
+from sumo_generators.static.constants import DB_USER, DB_PASSWORD, DB_IP_ADDRESS, DEFAULT_TEMPORAL_WINDOW
+from tdt.main import import_required_libs
+from tdt.providers.traci_sim import TraCISimulator
+from tdt.providers.utils import retrieve_config_files
+from tdt.static.argparse_types import check_file, check_valid_format
+
+
+def get_options():
+    """
+    Get options for the executable script.
+
+    :return: Arguments options
+    """
+    # Create the Argument Parser
+    arg_parser = argparse.ArgumentParser(description='Script to run several local simulations in parallel over the '
+                                                     'same network, one per adaptation approach and seed, and '
+                                                     'collect their results into one summary.')
+
+    # Simulation group params
+    simulation_group = arg_parser.add_argument_group("Simulation options", description="Parameters related to the "
+                                                                                       "simulations")
+    simulation_group.add_argument("-c", "--config", dest="config_file", action='store', default=cnt.DEFAULT_CONFIG_FILE,
+                                  type=check_file, help=f"sumo configuration file location. Default is "
+                                                        f"{cnt.DEFAULT_CONFIG_FILE}")
+    simulation_group.add_argument("-t", "--time-pattern", dest="time_pattern", metavar='FILE', action="store",
+                                  default='', help="time pattern input file. Do not use it with the dates parameter.")
+    simulation_group.add_argument("-d", "--dates", dest="dates", action="store", type=check_valid_format, default='',
+                                  help="calendar dates from start to end to simulate. Format is dd/mm/yyyy-dd/mm/yyyy.")
+    simulation_group.add_argument("-l", "--load-vehicles", action="store", default='', dest="load_vehicles_dir",
+                                  type=check_file, help="directory from where the vehicles routes will be load.")
+    simulation_group.add_argument("--temporal-window", action="store", default=DEFAULT_TEMPORAL_WINDOW, type=int,
+                                  dest="temporal_window", help="temporal window used to gather contextual information"
+                                                               "and adaptation process. Default to "
+                                                               f"{DEFAULT_TEMPORAL_WINDOW}")
+    simulation_group.add_argument("--subscriptions", action="store_true", default=False, dest="subscriptions",
+                                  help="monitor the traffic lights using TraCI variable subscriptions.")
+    simulation_group.add_argument("--mesosim", action="store_true", default=False, dest="mesoscopic",
+                                  help="run the mesoscopic simulation, faster but less accurate.")
+    simulation_group.add_argument("--backend", action="store", default=cnt.DEFAULT_SIMULATION_BACKEND, dest="backend",
+                                  choices=cnt.SIMULATION_BACKENDS, help="simulation backend. Default to "
+                                                                        f"{cnt.DEFAULT_SIMULATION_BACKEND}")
+
+    # Runner group params
+    runner_group = arg_parser.add_argument_group("Runner options", description="Parameters related to the parallel "
+                                                                               "execution")
+    runner_group.add_argument("-a", "--approaches", dest="approaches", action="store", type=str, default='all',
+                              help="adaptation approaches to run. Can be 'all' or the names of the approaches split by "
+                                   f"','. Available ones are: {', '.join(cnt.ADAPTATION_APPROACHES.keys())}.")
+    runner_group.add_argument("-s", "--seeds", dest="seeds", action="store", type=str, default='0',
+                              help="SUMO random seeds split by ','. Each approach is run once per seed. Default to 0.")
+    runner_group.add_argument("-r", "--num-seeds", dest="num_seeds", action="store", type=int, default=0,
+                              help="run an ensemble of the given number of seeds, from 0 to NUM_SEEDS - 1, instead of "
+                                   "the --seeds parameter. Default to 0, disabled.")
+    runner_group.add_argument("--seeded-flows", dest="seeded_flows", action="store_true", default=False,
+                              help="generate the flows and routes of each seed with that same seed, instead of loading "
+                                   "the same vehicles routes on all the runs. It requires a time pattern.")
+    runner_group.add_argument("--flows-dir", dest="flows_dir", action="store", type=str,
+                              default=cnt.DEFAULT_RUNNER_FLOWS_DIR,
+                              help="directory where the seeded flows are generated, they are reused if they exist. "
+                                   f"Default to {cnt.DEFAULT_RUNNER_FLOWS_DIR}")
+    runner_group.add_argument("--cache-dir", dest="cache_dir", action="store", type=str, default='',
+                              help="directory where the result of each run is cached by scenario and seed, so only the "
+                                   "new runs are executed when the seeds are extended. Default to '', disabled.")
+    runner_group.add_argument("-w", "--workers", dest="workers", action="store", type=int,
+                              default=cnt.DEFAULT_NUM_WORKERS,
+                              help=f"number of parallel simulations. Default to {cnt.DEFAULT_NUM_WORKERS}")
+    runner_group.add_argument("--resume-from", action="store", default='', dest="resume_from", type=check_file,
+                              help="checkpoint file all the simulations are forked from, for example a shared warm-up "
+                                   "state. Default to '', starting from the beginning.")
+    runner_group.add_argument("-o", "--output-file", dest="output_file", action="store",
+                              default=cnt.DEFAULT_RUNNER_OUTPUT_FILE,
+                              help=f"summary output JSON file. Default to {cnt.DEFAULT_RUNNER_OUTPUT_FILE}")
+
+    # Network topology database params
+    network_topology_group = arg_parser.add_argument_group("Network topology database options",
+                                                           description="Parameters related to the network topology "
+                                                                       "database connection")
+    network_topology_group.add_argument("--topology-db-ip", action="store", dest="topology_db_ip",
+                                        type=str, default=DB_IP_ADDRESS,
+                                        help=f"topology database ip address with port. Default to {DB_IP_ADDRESS}")
+    network_topology_group.add_argument("--topology-db-user", action="store", dest="topology_db_user",
+                                        type=str, default=DB_USER, help=f"topology database user. Default to {DB_USER}")
+    network_topology_group.add_argument("--topology-db-password", action="store", dest="topology_db_password",
+                                        type=str, default=DB_PASSWORD,
+                                        help=f"topology database user password. Default to {DB_PASSWORD}")
+
+    # Retrieve the arguments parsed
+    args = arg_parser.parse_args()
+
+    # One of the time pattern or the dates is required
+    if not args.time_pattern and not args.dates:
+        arg_parser.error("either --time-pattern or --dates is required")
+
+    # The seeded flows are generated from the time pattern
+    if args.seeded_flows and not args.time_pattern:
+        arg_parser.error("--seeded-flows requires the --time-pattern parameter")
+
+    # Check the adaptation approaches are valid
+    if args.approaches != 'all' and not set(args.approaches.split(',')).issubset(cnt.ADAPTATION_APPROACHES.keys()):
+        arg_parser.error(f"invalid approaches. Available ones are: {', '.join(cnt.ADAPTATION_APPROACHES.keys())}")
+
+    return args
+
+
+def run_scenario(scenario: dict) -> dict:
+    """
+    Run a local simulation of a given scenario (adaptation approach and seed) in the current process
+
+    :param scenario: scenario parameters: approach, seed, sumo configuration, simulation and database params
+    :type scenario: dict
+    :return: scenario summary
+    :rtype: dict
+    """
+    # Label the TraCI connection with the approach and seed, so each SUMO instance has its own connection
+    label = f"{scenario['approach']}_{scenario['seed']}"
+
+    # Create the local simulator
+    traci_sim = TraCISimulator(sumo_conf=scenario['sumo_conf'], time_pattern_file=scenario['time_pattern'],
+                               dates=scenario['dates'], local=True, temporal_window=scenario['temporal_window'],
+                               subscriptions=scenario['subscriptions'], mesoscopic=scenario['mesoscopic'],
+                               backend=scenario['backend'], label=label)
+
+    # Get simulation params with the scenario seed
+    simulation_params = traci_sim.retrieve_simulation_params(load_vehicles_dir=scenario['load_vehicles_dir'],
+                                                             seed=scenario['seed'])
+
+    start_time = time.perf_counter()
+
+    # Initialize the simulation topology with the approach components
+    traci_sim.initialize_simulation_topology(simulation_params=simulation_params,
+                                             topology_database_params=scenario['topology_database_params'],
+                                             **cnt.ADAPTATION_APPROACHES[scenario['approach']])
+
+    # Fork the simulation from the shared checkpoint
+    if scenario['resume_from']:
+        traci_sim.load_checkpoint(checkpoint_file=scenario['resume_from'])
+
+    # Start the simulation process
+    traci_sim.simulate()
+
+    # Retrieve summary information
+    summary_info = traci_sim.summary_info
+
+    result = {'approach': scenario['approach'], 'seed': scenario['seed'],
+              'waiting_time': summary_info['waiting_time'], 'veh_passed': summary_info['veh_passed'],
+              'waiting_time_per_veh': summary_info['waiting_time'] / summary_info['veh_passed']
+              if summary_info['veh_passed'] else 0.0,
+              **{name: summary_info[name] for name in cnt.SUMMARY_EMISSIONS},
+              'steps': traci_sim.cur_timestep, 'wall_time': time.perf_counter() - start_time}
+
+    # Cache the result of the run
+    if scenario['cache_file']:
+        with open(scenario['cache_file'], 'w') as cache_file:
+            json.dump(result, cache_file, indent=4)
+
+    return result
+
+
+def run_scenarios(scenarios: list, workers: int) -> list:
+    """
+    Run the scenarios in a process pool, one SUMO instance per worker. The scenarios whose result is cached are not run.
+
+    :param scenarios: scenarios parameters
+    :type scenarios: list
+    :param workers: number of parallel workers
+    :type workers: int
+    :return: summary per scenario, sorted by approach and seed
+    :rtype: list
+    """
+    results = []
+
+    # Load the cached results
+    pending_scenarios = []
+    for scenario in scenarios:
+        if scenario['cache_file'] and os.path.isfile(scenario['cache_file']):
+            with open(scenario['cache_file'], 'r') as cache_file:
+                results.append(json.load(cache_file))
+        else:
+            pending_scenarios.append(scenario)
+
+    print(f"Running {len(pending_scenarios)} scenarios, {len(results)} loaded from the cache")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submit all the pending scenarios
+        futures = [executor.submit(run_scenario, scenario) for scenario in pending_scenarios]
+
+        # Gather the results as they are finished
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"Finished {result['approach']} (seed {result['seed']}) in {result['wall_time']:.2f} seconds")
+            results.append(result)
+
+    return sorted(results, key=lambda item: (item['approach'], item['seed']))
+
+
+def retrieve_file_hash(file_path: str) -> str:
+    """
+    Retrieve the SHA-256 hash of a file content, or of the path if it is not a file (for example, empty)
+
+    :param file_path: file path
+    :type file_path: str
+    :return: hexadecimal hash
+    :rtype: str
+    """
+    file_hash = hashlib.sha256()
+    if file_path and os.path.isfile(file_path):
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(65536), b''):
+                file_hash.update(block)
+    else:
+        file_hash.update(str(file_path).encode('utf-8'))
+
+    return file_hash.hexdigest()
+
+
+def retrieve_scenario_hash(scenario: dict) -> str:
+    """
+    Retrieve the hash of the scenario parameters that change its results, without the seed: the approach, the input
+    files contents, the dates and the temporal window. The input files are the configuration file, the network and
+    additional files it references and the routes file loaded, as it replaces the configuration one. The backend and
+    the subscriptions only change the performance.
+
+    :param scenario: scenario parameters
+    :type scenario: dict
+    :return: hexadecimal hash
+    :rtype: str
+    """
+    # Files referenced by the configuration file, but its routes files, replaced by the loaded ones
+    config_files = {option: [retrieve_file_hash(file_path) for file_path in files_paths]
+                    for option, files_paths in retrieve_config_files(scenario['sumo_conf']['config_file']).items()
+                    if option != 'route-files'}
+
+    # Routes file loaded by the simulator, the default flows file if no one is provided. The seeded flows are generated
+    # from the other input files and the seed, so they are not hashed.
+    routes_file = '' if scenario['seeded_flows'] else scenario['load_vehicles_dir'] or cnt.FLOWS_OUTPUT_DIR
+
+    scenario_key = {'approach': scenario['approach'],
+                    'config_file': retrieve_file_hash(scenario['sumo_conf']['config_file']),
+                    'config_files': config_files,
+                    'time_pattern': retrieve_file_hash(scenario['time_pattern']), 'dates': scenario['dates'],
+                    'load_vehicles': retrieve_file_hash(routes_file),
+                    'seeded_flows': scenario['seeded_flows'], 'temporal_window': scenario['temporal_window'],
+                    'mesoscopic': scenario['mesoscopic'], 'resume_from': retrieve_file_hash(scenario['resume_from'])}
+
+    return hashlib.sha256(json.dumps(scenario_key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def generate_seeded_flows(config_file: str, time_pattern_file: str, topology_database_params: dict, seed: int,
+                          routes_file: str) -> None:
+    """
+    Generate the flows of the time pattern and its routes with the given seed, both for the flows generator and the
+    router
+
+    :param config_file: SUMO configuration file, where the network file is retrieved from
+    :type config_file: str
+    :param time_pattern_file: time pattern input file
+    :type time_pattern_file: str
+    :param topology_database_params: topology database connection parameters
+    :type topology_database_params: dict
+    :param seed: random seed
+    :type seed: int
+    :param routes_file: output routes file, the flows are stored along with the '.flows' extension
+    :type routes_file: str
+    :return: None
+    """
+    # Retrieve the network file, relative to the configuration file
+    network_file = ElementTree.parse(config_file).getroot().find('input/net-file').get('value')
+    network_file = os.path.join(os.path.dirname(config_file), network_file)
+
+    # Generate the flows with the seed
+    net_topology = NetworkTopology(ip_address=topology_database_params['ip_address'],
+                                   user=topology_database_params['user'],
+                                   password=topology_database_params['password'], traci=None)
+    random.seed(seed)
+    generate_flow_file(flows_path=routes_file, time_pattern_path=time_pattern_file, net_topology=net_topology)
+
+    # Generate the routes from the flows with the default turn ratios and the same seed
+    subprocess.run(['jtrrouter', f'--route-files={routes_file}.flows', f'--net-file={network_file}',
+                    f'--output-file={routes_file}', '--accept-all-destinations', '--seed', str(seed)], check=True)
+
+
+def aggregate_ensembles(results: list) -> dict:
+    """
+    Aggregate the runs of each approach into the mean, standard deviation and 95% confidence interval (Student's t)
+    of each ensemble metric
+
+    :param results: summary per run
+    :type results: list
+    :return: aggregated metrics by approach
+    :rtype: dict
+    """
+    ensembles = {}
+    for approach in dict.fromkeys(result['approach'] for result in results):
+        approach_results = [result for result in results if result['approach'] == approach]
+        ensembles[approach] = {'runs': len(approach_results)}
+
+        for metric in cnt.ENSEMBLE_METRICS:
+            values = [result[metric] for result in approach_results if metric in result]
+            if not values:
+                continue
+
+            # Half width of the confidence interval, only defined with more than one run
+            mean = statistics.mean(values)
+            std = statistics.stdev(values) if len(values) > 1 else 0.0
+            critical_value = cnt.T_CRITICAL_VALUES.get(len(values) - 1, cnt.NORMAL_CRITICAL_VALUE)
+            half_width = critical_value * std / len(values) ** 0.5 if len(values) > 1 else 0.0
+
+            ensembles[approach][metric] = {'mean': mean, 'std': std, 'ci_low': mean - half_width,
+                                           'ci_high': mean + half_width}
+
+    return ensembles
+
+
+if __name__ == "__main__":
+
+    # Import required libraries
+    import_required_libs()
+
+    # Retrieve execution options (parameters)
+    exec_options = get_options()
+
+    # Retrieve the adaptation approaches
+    if exec_options.approaches == 'all':
+        approaches = list(cnt.ADAPTATION_APPROACHES.keys())
+    else:
+        approaches = exec_options.approaches.split(',')
+
+    # Retrieve the seeds
+    if exec_options.num_seeds:
+        seeds = list(range(exec_options.num_seeds))
+    else:
+        seeds = [int(seed) for seed in exec_options.seeds.split(',')]
+
+    # Define one scenario per approach and seed
+    scenarios = [{'approach': approach, 'seed': seed, 'seeded_flows': exec_options.seeded_flows,
+                  'sumo_conf': {'config_file': exec_options.config_file, 'sumo_binary': checkBinary('sumo')},
+                  'time_pattern': exec_options.time_pattern, 'dates': exec_options.dates,
+                  'load_vehicles_dir': exec_options.load_vehicles_dir,
+                  'temporal_window': exec_options.temporal_window, 'subscriptions': exec_options.subscriptions,
+                  'mesoscopic': exec_options.mesoscopic, 'backend': exec_options.backend,
+                  'resume_from': exec_options.resume_from,
+                  'topology_database_params': {'ip_address': exec_options.topology_db_ip,
+                                               'user': exec_options.topology_db_user,
+                                               'password': exec_options.topology_db_password}}
+                 for approach in approaches for seed in seeds]
+
+    # Create the cache directory
+    if exec_options.cache_dir:
+        os.makedirs(exec_options.cache_dir, exist_ok=True)
+
+    for scenario in scenarios:
+        scenario_hash = retrieve_scenario_hash(scenario)
+
+        # Cache file of the run
+        scenario['cache_file'] = os.path.join(exec_options.cache_dir, cnt.RUNNER_CACHE_FILE.format(
+            scenario_hash=scenario_hash, seed=scenario['seed'])) if exec_options.cache_dir else ''
+
+        # Routes file of the seed, shared by all the approaches as it does not depend on them
+        if exec_options.seeded_flows:
+            flows_hash = retrieve_scenario_hash(dict(scenario, approach=''))
+            scenario['load_vehicles_dir'] = os.path.join(exec_options.flows_dir, cnt.RUNNER_FLOWS_FILE.format(
+                scenario_hash=flows_hash, seed=scenario['seed']))
+
+    # Generate the seeded flows of the runs that are not cached, unless they exist
+    if exec_options.seeded_flows:
+        os.makedirs(exec_options.flows_dir, exist_ok=True)
+        for routes_file, scenario in {scenario['load_vehicles_dir']: scenario for scenario in scenarios
+                                      if not (scenario['cache_file'] and os.path.isfile(scenario['cache_file']))}.items():
+            if not os.path.isfile(routes_file):
+                print(f"Generating the flows of seed {scenario['seed']}")
+                generate_seeded_flows(config_file=exec_options.config_file, time_pattern_file=exec_options.time_pattern,
+                                      topology_database_params=scenario['topology_database_params'],
+                                      seed=scenario['seed'], routes_file=routes_file)
+
+    # Run all the scenarios
+    start = time.perf_counter()
+    summary = run_scenarios(scenarios=scenarios, workers=exec_options.workers)
+
+    # Store the summary
+    with open(exec_options.output_file, 'w') as output_file:
+        json.dump({'wall_time': time.perf_counter() - start, 'ensembles': aggregate_ensembles(summary),
+                   'runs': summary}, output_file, indent=4)
@@ -1,7 +1,20 @@
+import traci.constants as tc
+
+from sumo_generators.static.constants import ADAPTATION_APPROACHES
+
 # Options default values
 DEFAULT_GUI_FLAG = False
 DEFAULT_CONFIG_FILE = '../../sumo-utils/config/simulation.sumocfg'
 
+# Simulation backends: TraCI connects to SUMO through a TCP socket while libsumo runs SUMO in the same process
+SIMULATION_BACKENDS = ['traci', 'libsumo']
+DEFAULT_SIMULATION_BACKEND = 'traci'
+# Default TraCI connection label
+DEFAULT_SIMULATION_LABEL = 'default'
+
+# Mesoscopic simulation parameters, keeping the traffic lights control on the junctions so the adaptation is applied
+MESO_SIMULATION_PARAMS = ['--mesosim', 'true', '--meso-junction-control', 'true']
+
 # Default flows file
 FLOWS_OUTPUT_DIR = '../../sumo-utils/config/flows.rou.xml'
 
@@ -19,3 +32,132 @@ TRAFFIC_PREDICTOR_MODEL_BASE_DIR = '../../traffic_predictor/classifier_models/'
 TRAFFIC_PREDICTOR_PARSED_VALUES_FILE = '../../traffic_predictor/output/parsed_values_dict.json'
 TRAFFIC_PREDICTOR_PERFORMANCE_FILE = '../../traffic_predictor/classifier_models/ml_performance.json'
 
+# Default number of parallel simulations workers
+DEFAULT_NUM_WORKERS = 4
+# Default runner summary output file
+DEFAULT_RUNNER_OUTPUT_FILE = './runner_summary.json'
+# Runner ensembles: directory of the seeded flows, flows and cached runs files names by scenario hash and seed,
+# aggregated metrics and two-sided 95% Student's t critical values by degrees of freedom, the normal one above them
+DEFAULT_RUNNER_FLOWS_DIR = './runner_flows/'
+RUNNER_FLOWS_FILE = 'flows_{scenario_hash}_{seed}.rou.xml'
+RUNNER_CACHE_FILE = 'run_{scenario_hash}_{seed}.json'
+ENSEMBLE_METRICS = ['waiting_time_per_veh', 'veh_passed', 'CO2_emission', 'CO_emission', 'HC_emission', 'PMx_emission',
+                    'NOx_emission']
+T_CRITICAL_VALUES = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+                     10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101,
+                     19: 2.093, 20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052,
+                     28: 2.048, 29: 2.045, 30: 2.042}
+NORMAL_CRITICAL_VALUE = 1.960
+
+# Traffic lights history: number of temporal windows kept in memory, 0 keeps all of them
+DEFAULT_HISTORY_RETENTION = 0
+# Traffic lights storage engines: lanes information as dicts or as NumPy arrays (windows x lanes), along with the
+# initial number of windows rows of the arrays
+STORAGE_ENGINES = ['dict', 'array']
+DEFAULT_STORAGE_ENGINE = 'dict'
+DEFAULT_STORAGE_CAPACITY = 64
+# Traffic lights window aggregates: lanes metrics whose prefix sums over the closed temporal windows are kept
+AGGREGATES_METRICS = ['num_passing_veh', 'waiting_time_veh']
+
+# Checkpoints: number of temporal windows between checkpoints and checkpoint files names by simulation timestep
+DEFAULT_CHECKPOINT_PERIOD = 8
+CHECKPOINT_STATE_FILE = 'checkpoint_{timestep}.state.xml'
+CHECKPOINT_INFO_FILE = 'checkpoint_{timestep}.pkl'
+
+# Scaling benchmark: grid sizes (rows and cols without the outer edges), random seed, working directory and results
+DEFAULT_SCALING_MIN_SIZE = 1
+DEFAULT_SCALING_MAX_SIZE = 10
+DEFAULT_SCALING_SEED = 0
+DEFAULT_SCALING_OUTPUT_DIR = './scaling_benchmark/'
+DEFAULT_SCALING_OUTPUT_FILE = './scaling_benchmark.json'
+
+# Asynchronous publisher backpressure policies when its queue is full and default queue size in temporal windows
+PUBLISHER_POLICIES = ['block', 'drop_oldest', 'coalesce']
+DEFAULT_PUBLISHER_POLICY = 'block'
+DEFAULT_PUBLISHER_QUEUE_SIZE = 4
+
+# Observations recordings: number of steps per compressed chunk and recording files names
+DEFAULT_RECORD_CHUNK_SIZE = 3600
+RECORD_HEADER_FILE = 'header.json'
+RECORD_PROGRAMS_FILE = 'programs.pkl'
+RECORD_CHUNK_FILE = 'chunk_{index}.npz'
+
+# Profiler histograms buckets upper bounds in seconds, the last bucket gathers greater values
+PROFILER_HISTOGRAM_BOUNDS = [0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 100.0]
+
+# Multi-client sharding: default number of TraCI clients, connection retries of the clients that do not start SUMO,
+# seconds waiting for the other shards messages on each exchange, maximum number of clients of the sharding benchmark
+# and its results
+DEFAULT_NUM_CLIENTS = 1
+SHARDING_CONNECTION_RETRIES = 60
+SHARDING_EXCHANGE_TIMEOUT = 600
+DEFAULT_SHARDING_MAX_CLIENTS = 8
+DEFAULT_SHARDING_OUTPUT_FILE = './sharding_benchmark.json'
+
+# Codec benchmark: number of lanes of the synthetic traffic information payload and encode/decode iterations
+DEFAULT_CODEC_NUM_LANES = 100
+DEFAULT_CODEC_ITERATIONS = 1000
+
+# Aggregates benchmark: number of closed temporal windows, lanes, windows of each range query and queries
+DEFAULT_AGGREGATES_NUM_WINDOWS = 10000
+DEFAULT_AGGREGATES_NUM_LANES = 12
+DEFAULT_AGGREGATES_RANGE = 96
+DEFAULT_AGGREGATES_QUERIES = 1000
+
+# Adaptation modes: all the traffic lights each temporal window (periodic) or each one when its traffic changes or its
+# information is stale (event)
+ADAPTATION_MODES = ['periodic', 'event']
+DEFAULT_ADAPTATION_MODE = 'periodic'
+# Event-driven adaptation: relative change of the smoothed occupancy triggering the adaptation, minimum and maximum
+# number of traffic light cycles between adaptations, smoothing factor per step and occupancy floor of the change
+DEFAULT_EVENT_THRESHOLD = 0.5
+DEFAULT_EVENT_MIN_CYCLES = 1
+DEFAULT_EVENT_MAX_CYCLES = 10
+DEFAULT_EVENT_SMOOTHING = 0.01
+EVENT_OCCUPANCY_FLOOR = 0.05
+
+# TraCI subscriptions and per step sampling
+# Lane metrics retrieved on each simulation step along with its TraCI variable identifier
+LANE_METRICS_VARIABLES = {'occupancy': tc.LAST_STEP_OCCUPANCY,
+                          'CO2_emission': tc.VAR_CO2EMISSION,
+                          'CO_emission': tc.VAR_COEMISSION,
+                          'HC_emission': tc.VAR_HCEMISSION,
+                          'PMx_emission': tc.VAR_PMXEMISSION,
+                          'NOx_emission': tc.VAR_NOXEMISSION,
+                          'noise_emission': tc.VAR_NOISEEMISSION}
+# Lane waiting time TraCI variable identifier
+LANE_WAITING_TIME_VARIABLE = tc.VAR_WAITING_TIME
+# Variables subscribed per inbound lane
+LANE_SUBSCRIPTION_VARIABLES = [LANE_WAITING_TIME_VARIABLE, *LANE_METRICS_VARIABLES.values()]
+# TraCI getters of the lane variables, also of the edge ones, used when the subscriptions are disabled
+LANE_VARIABLES_GETTERS = {tc.VAR_WAITING_TIME: 'getWaitingTime',
+                          tc.LAST_STEP_OCCUPANCY: 'getLastStepOccupancy',
+                          tc.VAR_CO2EMISSION: 'getCO2Emission',
+                          tc.VAR_COEMISSION: 'getCOEmission',
+                          tc.VAR_HCEMISSION: 'getHCEmission',
+                          tc.VAR_PMXEMISSION: 'getPMxEmission',
+                          tc.VAR_NOXEMISSION: 'getNOxEmission',
+                          tc.VAR_NOISEEMISSION: 'getNoiseEmission'}
+# Lane metrics fields published per lane, as the topology database lane attributes, prefixed by each statistic of the
+# metric values over the steps of the temporal window
+LANE_METRICS_FIELDS = ['lane_' + name if name == 'occupancy' else name for name in LANE_METRICS_VARIABLES]
+LANE_METRICS_STATISTICS = ['avg', 'min', 'max', 'std']
+# Traffic lights history persistence: metrics persisted per temporal window and lane (the window aggregates metrics and
+# the lane metrics averages), its dtype and the data and header files names per traffic light
+HISTORY_PERSIST_METRICS = [*AGGREGATES_METRICS, *('avg_' + field for field in LANE_METRICS_FIELDS)]
+HISTORY_PERSIST_DTYPE = 'float64'
+HISTORY_PERSIST_DATA_FILE = '{tl_id}.bin'
+HISTORY_PERSIST_HEADER_FILE = '{tl_id}.json'
+# Emissions accumulated into the simulation summary, from the lanes emissions of each step
+SUMMARY_EMISSIONS = ['CO2_emission', 'CO_emission', 'HC_emission', 'PMx_emission', 'NOx_emission']
+# Lane variables that are sums over the vehicles, so on the mesoscopic mode the edge value is split among its lanes,
+# while the remaining ones (occupancy and noise) are taken as they are
+MESO_ADDITIVE_VARIABLES = [tc.VAR_WAITING_TIME, tc.VAR_CO2EMISSION, tc.VAR_COEMISSION, tc.VAR_HCEMISSION,
+                           tc.VAR_PMXEMISSION, tc.VAR_NOXEMISSION]
+# Detector passing vehicles TraCI variable identifier
+DETECTOR_VEHICLES_VARIABLE = tc.LAST_STEP_VEHICLE_ID_LIST
+# Variables subscribed per detector
+DETECTOR_SUBSCRIPTION_VARIABLES = [DETECTOR_VEHICLES_VARIABLE]
+# Vehicle road TraCI variable identifier, subscribed per tracked vehicle
+VEHICLE_ROAD_VARIABLE = tc.VAR_ROAD_ID
+VEHICLE_SUBSCRIPTION_VARIABLES = [VEHICLE_ROAD_VARIABLE]
@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class RunningStatistics:
+    """
+    Running count, mean, variance, minimum and maximum of several series updated at once, one value per series on each
+    update, following the Welford algorithm. Its memory does not depend on the number of updates.
+
+    :param shape: shape of the series, such as (metrics, lanes)
+    :type shape: tuple
+    """
+
+    def __init__(self, shape: tuple) -> None:
+        """
+        RunningStatistics initializer
+        """
+        # Number of updates, mean and sum of squared differences from the mean per series
+        self._count = 0
+        self._mean, self._m2 = np.zeros(shape), np.zeros(shape)
+
+        # Minimum and maximum values per series
+        self._min, self._max = np.full(shape, np.inf), np.full(shape, -np.inf)
+
+        # Buffer of the differences from the mean, so the updates do not allocate
+        self._delta = np.zeros(shape)
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Update the statistics with one value per series
+
+        :param values: values with the series shape
+        :type values: np.ndarray
+        :return: None
+        """
+        self._count += 1
+
+        # Welford update: the mean with the difference from the previous mean, and the sum of squares with the product
+        # of the differences from the previous and the updated mean
+        np.subtract(values, self._mean, out=self._delta)
+        self._mean += self._delta / self._count
+        self._m2 += self._delta * (values - self._mean)
+
+        np.minimum(self._min, values, out=self._min)
+        np.maximum(self._max, values, out=self._max)
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def count(self) -> int:
+        """
+        Number of updates getter
+
+        :return: number of updates
+        :rtype: int
+        """
+        return self._count
+
+    @property
+    def mean(self) -> np.ndarray:
+        """
+        Mean per series getter, 0 if there are no updates
+
+        :return: mean per series
+        :rtype: np.ndarray
+        """
+        return self._mean
+
+    @property
+    def std(self) -> np.ndarray:
+        """
+        Population standard deviation per series getter, 0 if there are no updates
+
+        :return: standard deviation per series
+        :rtype: np.ndarray
+        """
+        return np.sqrt(self._m2 / self._count) if self._count else np.zeros_like(self._m2)
+
+    @property
+    def min(self) -> np.ndarray:
+        """
+        Minimum per series getter, 0 if there are no updates
+
+        :return: minimum per series
+        :rtype: np.ndarray
+        """
+        return self._min if self._count else np.zeros_like(self._min)
+
+    @property
+    def max(self) -> np.ndarray:
+        """
+        Maximum per series getter, 0 if there are no updates
+
+        :return: maximum per series
+        :rtype: np.ndarray
+        """
+        return self._max if self._count else np.zeros_like(self._max)
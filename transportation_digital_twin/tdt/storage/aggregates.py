@@ -0,0 +1,276 @@
+import numpy as np
+
+from tdt.static.constants import AGGREGATES_METRICS, DEFAULT_STORAGE_CAPACITY
+
+
+class WindowAggregates:
+    """
+    Range-aggregate queries per lane over the closed temporal windows of a traffic light. The prefix sums of each
+    metric (windows x lanes) are extended once per window when it is closed, so any window range sum or mean per lane is
+    answered in O(1). The windows ranges are [start_window, end_window), as Python ranges. With a retention, the oldest
+    windows are discarded once there are twice as many as retained, so the memory is bounded.
+
+    :param lanes: lanes names, in the order of the values columns
+    :type lanes: list
+    :param retention: number of closed temporal windows that can be queried. Default to None, all of them.
+    :type retention: int
+    :param capacity: initial number of windows of the prefix sums arrays. Default to 64.
+    :type capacity: int
+    """
+
+    def __init__(self, lanes: list, retention: int = None, capacity: int = DEFAULT_STORAGE_CAPACITY) -> None:
+        """
+        WindowAggregates initializer
+        """
+        self._retention = retention
+
+        # Lanes columns
+        self._lanes_indices = {lane: index for index, lane in enumerate(lanes)}
+
+        # Prefix sums per metric, whose row i is the sum of the first i windows stored, so the first row is 0
+        self._prefix_sums = {metric: np.zeros((capacity + 1, len(lanes))) for metric in AGGREGATES_METRICS}
+
+        # First closed temporal window stored and number of windows stored
+        self._first_window, self._num_windows = None, 0
+
+    def append(self, temporal_window: int, values: dict) -> None:
+        """
+        Append the values of a closed temporal window, the next one of the previous window appended
+
+        :param temporal_window: temporal window identifier
+        :type temporal_window: int
+        :param values: values per lane (in lanes order) by metric name
+        :type values: dict
+        :return: None
+        """
+        if self._first_window is None:
+            self._first_window = temporal_window
+
+        # Discard the oldest windows beyond the retention, keeping the prefix sums relative to the first one kept
+        if self._retention and self._num_windows >= 2 * self._retention:
+            for metric, prefix_sums in self._prefix_sums.items():
+                prefix_sums[:self._retention + 1] = prefix_sums[self._retention:2 * self._retention + 1] - \
+                    prefix_sums[self._retention]
+            self._first_window += self._retention
+            self._num_windows -= self._retention
+
+        # Double the prefix sums arrays if they are full
+        if self._num_windows + 1 >= next(iter(self._prefix_sums.values())).shape[0]:
+            self._prefix_sums = {metric: np.concatenate([prefix_sums, np.zeros_like(prefix_sums)])
+                                 for metric, prefix_sums in self._prefix_sums.items()}
+
+        for metric, prefix_sums in self._prefix_sums.items():
+            np.add(prefix_sums[self._num_windows], values[metric], out=prefix_sums[self._num_windows + 1])
+
+        self._num_windows += 1
+
+    def retrieve_rows(self, start_window: int, end_window: int) -> tuple:
+        """
+        Retrieve the prefix sums rows of a windows range, checking it is stored
+
+        :param start_window: first temporal window of the range
+        :type start_window: int
+        :param end_window: temporal window following the last one of the range
+        :type end_window: int
+        :return: start and end rows
+        :rtype: tuple
+        """
+        start_row, end_row = start_window - (self._first_window or 0), end_window - (self._first_window or 0)
+
+        if not 0 <= start_row <= end_row <= self._num_windows:
+            raise Exception(f"Temporal windows range [{start_window}, {end_window}) is not stored. The closed "
+                            f"windows stored are [{self._first_window}, {self.end_window})")
+
+        return start_row, end_row
+
+    def sum(self, metric: str, start_window: int, end_window: int, lane: str = None):
+        """
+        Sum of a metric per lane over a windows range
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param start_window: first temporal window of the range
+        :type start_window: int
+        :param end_window: temporal window following the last one of the range
+        :type end_window: int
+        :param lane: lane name. Default to None, all the lanes.
+        :type lane: str
+        :return: sum per lane (in lanes order), or of the given lane
+        """
+        start_row, end_row = self.retrieve_rows(start_window=start_window, end_window=end_window)
+        prefix_sums = self._prefix_sums[metric]
+
+        if lane is not None:
+            column = self._lanes_indices[lane]
+            return float(prefix_sums[end_row, column] - prefix_sums[start_row, column])
+
+        return prefix_sums[end_row] - prefix_sums[start_row]
+
+    def mean(self, metric: str, start_window: int, end_window: int, lane: str = None):
+        """
+        Mean of a metric per window and lane over a windows range, 0 if the range is empty
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param start_window: first temporal window of the range
+        :type start_window: int
+        :param end_window: temporal window following the last one of the range
+        :type end_window: int
+        :param lane: lane name. Default to None, all the lanes.
+        :type lane: str
+        :return: mean per lane (in lanes order), or of the given lane
+        """
+        num_windows = max(end_window - start_window, 1)
+        return self.sum(metric=metric, start_window=start_window, end_window=end_window, lane=lane) / num_windows
+
+    def last_sum(self, metric: str, num_windows: int, lane: str = None):
+        """
+        Sum of a metric per lane over the last closed windows
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param num_windows: number of windows
+        :type num_windows: int
+        :param lane: lane name. Default to None, all the lanes.
+        :type lane: str
+        :return: sum per lane (in lanes order), or of the given lane
+        """
+        return self.sum(metric=metric, start_window=self.end_window - num_windows, end_window=self.end_window,
+                        lane=lane)
+
+    def last_mean(self, metric: str, num_windows: int, lane: str = None):
+        """
+        Mean of a metric per window and lane over the last closed windows
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param num_windows: number of windows
+        :type num_windows: int
+        :param lane: lane name. Default to None, all the lanes.
+        :type lane: str
+        :return: mean per lane (in lanes order), or of the given lane
+        """
+        return self.mean(metric=metric, start_window=self.end_window - num_windows, end_window=self.end_window,
+                         lane=lane)
+
+    def values(self, metric: str, start_window: int, end_window: int) -> np.ndarray:
+        """
+        Values of a metric per window and lane over a windows range, recovered from the prefix sums
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param start_window: first temporal window of the range
+        :type start_window: int
+        :param end_window: temporal window following the last one of the range
+        :type end_window: int
+        :return: values per window and lane
+        :rtype: np.ndarray
+        """
+        start_row, end_row = self.retrieve_rows(start_window=start_window, end_window=end_window)
+        return np.diff(self._prefix_sums[metric][start_row:end_row + 1], axis=0)
+
+    def sliding_extreme(self, metric: str, size: int, function: np.ufunc, start_window: int = None,
+                        end_window: int = None) -> np.ndarray:
+        """
+        Extreme (maximum or minimum) of a metric per lane on each sliding window of the given number of temporal
+        windows, with the van Herk/Gil-Werman algorithm: the values are split into blocks of the sliding window size,
+        and each sliding window extreme is the one of the suffix of its first block and the prefix of the next block.
+        Thus, it takes three vectorized passes over the values, whatever the sliding window size.
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param size: number of temporal windows of each sliding window
+        :type size: int
+        :param function: extreme function, either np.maximum or np.minimum
+        :type function: np.ufunc
+        :param start_window: first temporal window. Default to None, the first one stored.
+        :type start_window: int
+        :param end_window: temporal window following the last one. Default to None, following the last one closed.
+        :type end_window: int
+        :return: extreme per sliding window (ending at each window from the start one plus size - 1) and lane, empty
+            if there are less windows than its size
+        :rtype: np.ndarray
+        """
+        if size < 1:
+            raise Exception(f"Sliding window size must be 1 or greater, but it is {size}")
+
+        values = self.values(metric=metric,
+                             start_window=self.end_window - self._num_windows if start_window is None else start_window,
+                             end_window=self.end_window if end_window is None else end_window)
+        num_values, num_lanes = values.shape
+
+        # No sliding window fits on the range
+        if num_values < size:
+            return np.zeros((0, num_lanes))
+
+        # Split the values into blocks of the sliding window size, padded with the extreme function identity
+        num_blocks = -(-num_values // size)
+        blocks = np.full((num_blocks * size, num_lanes), -np.inf if function is np.maximum else np.inf)
+        blocks[:num_values] = values
+        blocks = blocks.reshape(num_blocks, size, num_lanes)
+
+        # Extreme of each block prefix and suffix
+        prefixes = function.accumulate(blocks, axis=1).reshape(-1, num_lanes)
+        suffixes = function.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, num_lanes)
+
+        # Each sliding window starting at i spans the suffix of its block from i and the prefix of the next one
+        num_sliding = num_values - size + 1
+        return function(suffixes[:num_sliding], prefixes[size - 1:size - 1 + num_sliding])
+
+    def sliding_max(self, metric: str, size: int, start_window: int = None, end_window: int = None) -> np.ndarray:
+        """
+        Maximum of a metric per lane on each sliding window of the given number of temporal windows
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param size: number of temporal windows of each sliding window
+        :type size: int
+        :param start_window: first temporal window. Default to None, the first one stored.
+        :type start_window: int
+        :param end_window: temporal window following the last one. Default to None, following the last one closed.
+        :type end_window: int
+        :return: maximum per sliding window (ending at each window from the start one plus size - 1) and lane
+        :rtype: np.ndarray
+        """
+        return self.sliding_extreme(metric=metric, size=size, function=np.maximum, start_window=start_window,
+                                    end_window=end_window)
+
+    def sliding_min(self, metric: str, size: int, start_window: int = None, end_window: int = None) -> np.ndarray:
+        """
+        Minimum of a metric per lane on each sliding window of the given number of temporal windows
+
+        :param metric: metric name, one of 'num_passing_veh' or 'waiting_time_veh'
+        :type metric: str
+        :param size: number of temporal windows of each sliding window
+        :type size: int
+        :param start_window: first temporal window. Default to None, the first one stored.
+        :type start_window: int
+        :param end_window: temporal window following the last one. Default to None, following the last one closed.
+        :type end_window: int
+        :return: minimum per sliding window (ending at each window from the start one plus size - 1) and lane
+        :rtype: np.ndarray
+        """
+        return self.sliding_extreme(metric=metric, size=size, function=np.minimum, start_window=start_window,
+                                    end_window=end_window)
+
+    """ SETTERS AND GETTERS """
+
+    @property
+    def end_window(self) -> int:
+        """
+        Temporal window following the last closed one stored getter
+
+        :return: temporal window identifier
+        :rtype: int
+        """
+        return (self._first_window or 0) + self._num_windows
+
+    @property
+    def lanes_indices(self) -> dict:
+        """
+        Lanes columns getter
+
+        :return: column by lane name
+        :rtype: dict
+        """
+        return self._lanes_indices
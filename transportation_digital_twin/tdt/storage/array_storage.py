@@ -0,0 +1,259 @@
+import numpy as np
+from traci._trafficlight import Logic
+
+from sumo_generators.utils.utils import parse_traffic_light_logic_to_str
+from tdt.static.constants import LANE_METRICS_VARIABLES, DEFAULT_STORAGE_CAPACITY
+from tdt.storage.accumulator import RunningStatistics
+from tdt.storage.spill import HistorySpillLog
+from tdt.storage.storage import TrafficLightInfoStorage
+
+
+class ArrayTrafficLightInfoStorage(TrafficLightInfoStorage):
+    """
+    Traffic Light Info Storage keeping the passing vehicles and waiting time of each temporal window and lane on
+    preallocated 2-D NumPy arrays (windows x lanes), with the lane column fixed at construction. Each temporal window is
+    assigned a row, reused once the window is evicted with a retention, otherwise the arrays grow by doubling. The
+    remaining historical info (lane metrics statistics, date info and program) is stored as on the dict storage.
+
+    :param tl_id: traffic light identifier
+    :type tl_id: str
+    :param lanes: lanes names list
+    :type lanes: list
+    :param retention: number of temporal windows kept in memory. Default to None, all of them.
+    :type retention: int
+    :param spill_log: log where the temporal windows evicted from memory are spilled. Default to None, they are
+        discarded.
+    :type spill_log: HistorySpillLog
+    :param persist_dir: directory where the metrics of each closed temporal window are persisted. Default to '', they
+        are not persisted.
+    :type persist_dir: str
+    :param capacity: initial number of temporal windows rows without retention. Default to 64.
+    :type capacity: int
+    """
+
+    def __init__(self, tl_id: str, lanes: list = None, retention: int = None, spill_log: HistorySpillLog = None,
+                 persist_dir: str = '', capacity: int = DEFAULT_STORAGE_CAPACITY) -> None:
+        """
+        ArrayTrafficLightInfoStorage initializer
+        """
+        # Lanes columns, fixed at construction
+        self._lanes_indices = {lane: index for index, lane in enumerate(lanes or [])}
+
+        # Number of rows, with a retention one more than the retained windows as the eviction follows the insertion
+        num_rows = retention + 1 if retention else capacity
+
+        # Passing vehicles and waiting time per temporal window row and lane
+        self._passing_vehicles = np.zeros((num_rows, len(self._lanes_indices)), dtype=np.int64)
+        self._waiting_time = np.zeros((num_rows, len(self._lanes_indices)))
+
+        # Row of each temporal window in memory and number of rows assigned
+        self._window_rows, self._num_assigned_rows = {}, 0
+
+        super().__init__(tl_id=tl_id, lanes=lanes, retention=retention, spill_log=spill_log, persist_dir=persist_dir)
+
+    def create_historical_traffic_info(self, temporal_window: int, lane_info: dict = None,
+                                       actual_program: Logic = None) -> None:
+        """
+        Creates a new entry for the historical info for the timestep, assigning it a row of the lanes arrays
+
+        :param temporal_window: current info temporal window
+        :type temporal_window: int
+        :param lane_info: number of passing vehicles and waiting time per lane.
+        :type lane_info: dict
+        :param actual_program: actual traffic light program
+        :type actual_program: Logic
+
+        :return: None
+        """
+        # Assign a row to the new temporal windows
+        if temporal_window not in self._window_rows:
+            self._window_rows[temporal_window] = self.assign_row()
+        row = self._window_rows[temporal_window]
+
+        # Initialize passing vehicles and waiting time per lane
+        self._passing_vehicles[row] = 0
+        self._waiting_time[row] = 0.0
+
+        # Store the given lanes information, only of the storage lanes
+        for lane, info in (lane_info or {}).items():
+            if lane in self._lanes_indices:
+                self._passing_vehicles[row, self._lanes_indices[lane]] = info['num_passing_veh']
+                self._waiting_time[row, self._lanes_indices[lane]] = info['waiting_time_veh']
+
+        # Store information into the dict, along with the running statistics of the lane metrics per metric and lane
+        self._historical_info[temporal_window] = {'lane_statistics': RunningStatistics(
+                                                      shape=(len(LANE_METRICS_VARIABLES), len(self._lanes))),
+                                                  'date_info': None,
+                                                  'actual_program': actual_program}
+
+        # Evict the oldest temporal windows beyond the retention
+        if self._retention and len(self._historical_info) > self._retention:
+            self.evict_historical_traffic_info()
+
+    def assign_row(self) -> int:
+        """
+        Assign a row to a new temporal window: the next one of the ring with a retention, otherwise the next one,
+        doubling the arrays if they are full
+
+        :return: row index
+        :rtype: int
+        """
+        num_rows = self._passing_vehicles.shape[0]
+
+        if self._retention:
+            row = self._num_assigned_rows % num_rows
+        else:
+            row = self._num_assigned_rows
+            if row >= num_rows:
+                self._passing_vehicles = np.concatenate([self._passing_vehicles,
+                                                         np.zeros_like(self._passing_vehicles)])
+                self._waiting_time = np.concatenate([self._waiting_time, np.zeros_like(self._waiting_time)])
+
+        self._num_assigned_rows += 1
+        return row
+
+    def pop_historical_traffic_info(self, temporal_window: int) -> dict:
+        """
+        Remove a temporal window from the historical info in memory, releasing its row
+
+        :param temporal_window: temporal window identifier
+        :type temporal_window: int
+        :return: removed historical traffic information, without its lanes information
+        :rtype: dict
+        """
+        del self._window_rows[temporal_window]
+
+        return self._historical_info.pop(temporal_window)
+
+    """ EXTERNAL TRAFFIC COMPONENTS UTILS """
+
+    def get_lanes_values(self, temporal_window: int) -> tuple:
+        """
+        Get the passing vehicles and waiting time of all the lanes of a temporal window in memory, as views of its
+        rows, so they are not copied nor converted
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: views of the passing vehicles and waiting time per lane (in lanes order)
+        :rtype: tuple
+        """
+        row = self._window_rows[temporal_window]
+        return self._passing_vehicles[row], self._waiting_time[row]
+
+    def get_processed_contextual_info(self, temporal_window: int) -> dict:
+        """
+        Process the values of contextual info with the sum values and the average, minimum, maximum and standard
+        deviation of the lane metrics, from the lanes arrays. The values are converted per lane here, as it is the
+        published information.
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: dict with passing vehicles on NS and EW direction
+        :rtype: dict
+        """
+        # Lanes values and lane metrics statistics by field name, as lists of lanes values
+        passing_vehicles, waiting_time = self.get_lanes_values(temporal_window=temporal_window)
+        lanes_fields = {'waiting_time_veh': waiting_time.tolist(), 'num_passing_veh': passing_vehicles.tolist(),
+                        **self.get_lane_metrics_fields(temporal_window=temporal_window)}
+
+        # Create a list based on lane information
+        contextual_lane_info = [{'tl_id': self._tl_id, 'lane': lane_name,
+                                 **{field: values[index] for field, values in lanes_fields.items()}}
+                                for lane_name, index in self._lanes_indices.items()]
+
+        # Append to contextual info the actual program with empty lane field as it is required on the simulation
+        contextual_lane_info.append({'tl_id': self._tl_id, 'lane': '',
+                                     'actual_program':
+                                         parse_traffic_light_logic_to_str(self.get_traffic_light_program())})
+
+        return {'info': contextual_lane_info}
+
+    def get_lanes_totals(self, temporal_window: int) -> dict:
+        """
+        Get the waiting time and the vehicles passed added up over the lanes of a temporal window
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: total waiting time and vehicles passed
+        :rtype: dict
+        """
+        # Spilled windows are read back from the log
+        if temporal_window not in self._window_rows:
+            return super().get_lanes_totals(temporal_window=temporal_window)
+
+        passing_vehicles, waiting_time = self.get_lanes_values(temporal_window=temporal_window)
+        return {'waiting_time': float(waiting_time.sum()), 'veh_passed': int(passing_vehicles.sum())}
+
+    def get_traffic_analyzer_info(self, temporal_window: int) -> dict:
+        """
+        Get the traffic analyzer required information (only passing vehicles), per lane as it is handed to the traffic
+        analyzer. The callers indexing the lanes by column read its passing vehicles row with get_lanes_columns.
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: dict with passing vehicles on NS and EW direction
+        :rtype: dict
+        """
+        passing_vehicles = self.get_lanes_values(temporal_window=temporal_window)[0].tolist()
+        return {lane_name: {'num_passing_veh': num_passing_veh}
+                for lane_name, num_passing_veh in zip(self._lanes_indices, passing_vehicles)}
+
+    def get_traffic_predictor_info(self, temporal_window: int) -> dict:
+        """
+        Get the traffic predictor required information based on the type of traffic predictor
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: dict with date info
+        :rtype: dict
+        """
+        date_info = self._historical_info[temporal_window]['date_info']
+        return {lane_name: date_info for lane_name in self._lanes_indices}
+
+    """ CLASS ATTRIBUTES UTILS """
+
+    def increase_passing_vehicles(self, lane: str, num_veh: int) -> None:
+        """
+        Increase the number of passing vehicles on the lane given at the current temporal window
+
+        :param lane: input lane which is the name of the road.
+        :type lane: str
+        :param num_veh: number of vehicles
+        :type num_veh: int
+        :return: None
+        """
+        self._passing_vehicles[self._window_rows[self._cur_temporal_window], self._lanes_indices[lane]] += num_veh
+
+    def increase_waiting_time(self, lane: str, waiting_time: float) -> None:
+        """
+        Increase the waiting time on the given direction at the current temporal window
+
+        :param lane: input lane which is the name of the road.
+        :type lane: str
+        :param waiting_time: waiting time
+        :type waiting_time: float
+        :return: None
+        """
+        self._waiting_time[self._window_rows[self._cur_temporal_window], self._lanes_indices[lane]] += waiting_time
+
+    def get_traffic_info_by_temporal_window(self, temporal_window: int) -> dict:
+        """
+        Get traffic info related to a given temporal window, with its lanes information built per lane from the lanes
+        arrays, as the dict storage schema used by the spill log, or read from the spill log if it has been evicted from
+        memory. The callers indexing the lanes by column read the arrays rows with get_lanes_columns instead.
+
+        :param temporal_window: temporal window to retrieve the information
+        :type temporal_window: int
+        :return: historical traffic information
+        :rtype: dict
+        """
+        if temporal_window not in self._window_rows:
+            return super().get_traffic_info_by_temporal_window(temporal_window=temporal_window)
+
+        passing_vehicles, waiting_time = self.get_lanes_values(temporal_window=temporal_window)
+        passing_vehicles, waiting_time = passing_vehicles.tolist(), waiting_time.tolist()
+
+        return {'contextual_info': {lane_name: {'num_passing_veh': passing_vehicles[index],
+                                                'waiting_time_veh': waiting_time[index]}
+                                    for lane_name, index in self._lanes_indices.items()},
+                **self._historical_info[temporal_window]}
@@ -0,0 +1,129 @@
+import json
+import os
+
+import numpy as np
+
+from tdt.static.constants import HISTORY_PERSIST_METRICS, HISTORY_PERSIST_DTYPE, HISTORY_PERSIST_DATA_FILE, \
+    HISTORY_PERSIST_HEADER_FILE
+
+
+class HistoryMetricsFile:
+    """
+    Binary file where a traffic light persists the metrics of each temporal window once it is closed, so its history is
+    available after the run without the database. Each window is appended as a row of metrics by lanes of a fixed
+    dtype, so the file is opened zero-copy as a (windows, metrics, lanes) memory-mapped array. A small JSON header
+    describes its lanes, metrics, dtype and number of windows; the readers take the number of windows from the file
+    size, so a file whose run was interrupted is still readable. The file is created on the first window appended, so
+    the storages replaced when a checkpoint is restored do not overwrite the persisted history.
+
+    :param persist_dir: directory where the file and its header are stored, created if it does not exist
+    :type persist_dir: str
+    :param tl_id: traffic light identifier
+    :type tl_id: str
+    :param lanes: lanes names, in the order of the values columns
+    :type lanes: list
+    """
+
+    def __init__(self, persist_dir: str, tl_id: str, lanes: list) -> None:
+        """
+        HistoryMetricsFile initializer
+        """
+        self._persist_dir, self._tl_id, self._lanes = persist_dir, tl_id, list(lanes)
+
+        # First temporal window and number of windows persisted, the data file is opened on the first window
+        self._first_window, self._num_windows, self._file = None, 0, None
+
+    def open(self, mode: str) -> None:
+        """
+        Open the data file and write the header
+
+        :param mode: data file open mode
+        :type mode: str
+        :return: None
+        """
+        os.makedirs(self._persist_dir, exist_ok=True)
+        self._file = open(os.path.join(self._persist_dir, HISTORY_PERSIST_DATA_FILE.format(tl_id=self._tl_id)), mode)
+        self.write_header()
+
+    def append(self, temporal_window: int, values: np.ndarray) -> None:
+        """
+        Append the metrics of a temporal window, the next one of the previous window appended
+
+        :param temporal_window: temporal window identifier
+        :type temporal_window: int
+        :param values: values per metric (in HISTORY_PERSIST_METRICS order) and lane (in lanes order)
+        :type values: np.ndarray
+        :return: None
+        """
+        if self._first_window is None:
+            self._first_window = temporal_window
+
+        # Create the data file on the first window
+        if self._file is None:
+            self.open(mode='wb')
+
+        self._file.write(np.ascontiguousarray(values, dtype=HISTORY_PERSIST_DTYPE).tobytes())
+        self._num_windows += 1
+
+    def write_header(self) -> None:
+        """
+        Write the JSON header describing the data file
+
+        :return: None
+        """
+        with open(os.path.join(self._persist_dir, HISTORY_PERSIST_HEADER_FILE.format(tl_id=self._tl_id)),
+                  'w') as header_file:
+            json.dump({'tl_id': self._tl_id, 'data_file': HISTORY_PERSIST_DATA_FILE.format(tl_id=self._tl_id),
+                       'lanes': self._lanes, 'metrics': HISTORY_PERSIST_METRICS, 'dtype': HISTORY_PERSIST_DTYPE,
+                       'first_window': self._first_window or 0, 'num_windows': self._num_windows},
+                      header_file, indent=4)
+
+    def close(self) -> None:
+        """
+        Close the data file and update the header with the number of windows
+
+        :return: None
+        """
+        if self._file is not None:
+            self._file.close()
+            self.write_header()
+
+    """ CHECKPOINTS """
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle the file description and the windows persisted, as the storages are stored on the checkpoints
+
+        :return: file state
+        :rtype: dict
+        """
+        if self._file is not None:
+            self._file.flush()
+        return {key: value for key, value in self.__dict__.items() if key != '_file'}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Reopen the data file once unpickled, discarding the windows persisted after the checkpoint, as they are
+        simulated again. The file must keep all the windows persisted before the checkpoint.
+
+        :param state: file state
+        :type state: dict
+        :return: None
+        """
+        self.__dict__.update(state)
+        self._file = None
+
+        # No window was persisted before the checkpoint, so the data file is created on the first one
+        if not self._num_windows:
+            return
+
+        data_file = os.path.join(self._persist_dir, HISTORY_PERSIST_DATA_FILE.format(tl_id=self._tl_id))
+        data_size = self._num_windows * len(HISTORY_PERSIST_METRICS) * len(self._lanes) * \
+            np.dtype(HISTORY_PERSIST_DTYPE).itemsize
+        if not os.path.exists(data_file) or os.path.getsize(data_file) < data_size:
+            raise Exception(f"History file {data_file} does not keep the {self._num_windows} temporal windows "
+                            f"persisted before the checkpoint")
+
+        self.open(mode='r+b')
+        self._file.truncate(data_size)
+        self._file.seek(0, os.SEEK_END)
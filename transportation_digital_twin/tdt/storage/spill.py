@@ -0,0 +1,103 @@
+import os
+import pickle
+import threading
+
+
+class HistorySpillLog:
+    """
+    Append-only log where the traffic lights storages spill the temporal windows evicted from memory. Each window is
+    appended as a record with its lanes information by columns (one list per field, in lanes order), and the storages
+    keep the offset of their records, so a spilled window is read back with a single seek. The log is shared by all
+    the storages of a simulator, also from the middleware thread, so its accesses are locked. It is not stored on the
+    checkpoints: the simulator log is attached to the restored storages.
+
+    :param spill_file: log file, created if it does not exist
+    :type spill_file: str
+    """
+
+    def __init__(self, spill_file: str) -> None:
+        """
+        HistorySpillLog initializer
+        """
+        self._spill_file = spill_file
+        self.open()
+
+    def open(self) -> None:
+        """
+        Open the log file to append the records, creating its directory if it does not exist
+
+        :return: None
+        """
+        spill_dir = os.path.dirname(self._spill_file)
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self._file, self._lock = open(self._spill_file, 'ab'), threading.Lock()
+
+    def append(self, temporal_window: int, historical_info: dict) -> int:
+        """
+        Append a temporal window historical information to the log
+
+        :param temporal_window: temporal window identifier
+        :type temporal_window: int
+        :param historical_info: temporal window historical information, as stored on the traffic light storage
+        :type historical_info: dict
+        :return: record offset on the log
+        :rtype: int
+        """
+        # Lanes information by columns
+        contextual_info = historical_info['contextual_info']
+        lanes = list(contextual_info)
+        fields = list(contextual_info[lanes[0]]) if lanes else []
+        columns = {field: [contextual_info[lane][field] for lane in lanes] for field in fields}
+
+        record = {'temporal_window': temporal_window, 'lanes': lanes, 'columns': columns,
+                  **{key: value for key, value in historical_info.items() if key != 'contextual_info'}}
+
+        with self._lock:
+            offset = self._file.tell()
+            pickle.dump(record, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return offset
+
+    def read(self, offset: int) -> dict:
+        """
+        Read a temporal window historical information from the log
+
+        :param offset: record offset on the log
+        :type offset: int
+        :return: temporal window historical information, as stored on the traffic light storage
+        :rtype: dict
+        """
+        with self._lock:
+            # Write the buffered records before reading
+            self._file.flush()
+            with open(self._spill_file, 'rb') as spill_file:
+                spill_file.seek(offset)
+                record = pickle.load(spill_file)
+
+        # Lanes information by lane
+        lanes, columns = record.pop('lanes'), record.pop('columns')
+        record.pop('temporal_window')
+        record['contextual_info'] = {lane: {field: values[index] for field, values in columns.items()}
+                                     for index, lane in enumerate(lanes)}
+
+        return record
+
+    def flush(self) -> None:
+        """
+        Write the buffered records into the log file, so the records referenced by a checkpoint are stored
+
+        :return: None
+        """
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Close the log file
+
+        :return: None
+        """
+        with self._lock:
+            self._file.close()
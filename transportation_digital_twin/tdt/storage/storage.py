@@ -1,8 +1,14 @@
-from statistics import mean
+import itertools
 
+import numpy as np
 from traci._trafficlight import Logic
 
 from sumo_generators.utils.utils import parse_traffic_light_logic_to_str
+from tdt.static.constants import LANE_METRICS_VARIABLES, LANE_METRICS_FIELDS, LANE_METRICS_STATISTICS
+from tdt.storage.accumulator import RunningStatistics
+from tdt.storage.aggregates import WindowAggregates
+from tdt.storage.persistence import HistoryMetricsFile
+from tdt.storage.spill import HistorySpillLog
 
 
 class TrafficLightInfoStorage:
@@ -10,7 +16,8 @@ class TrafficLightInfoStorage:
     Traffic Light Info Storage  class to gather all the traffic related information 
     """
 
-    def __init__(self, tl_id: str, lanes: list = None) -> None:
+    def __init__(self, tl_id: str, lanes: list = None, retention: int = None,
+                 spill_log: HistorySpillLog = None, persist_dir: str = '') -> None:
         """
         TrafficInfoStorage initializer
 
@@ -18,19 +25,37 @@ class TrafficLightInfoStorage:
         :type tl_id: str
         :param lanes: lanes names list
         :type lanes: list
+        :param retention: number of temporal windows kept in memory. Default to None, all of them.
+        :type retention: int
+        :param spill_log: log where the temporal windows evicted from memory are spilled. Default to None, they are
+            discarded.
+        :type spill_log: HistorySpillLog
+        :param persist_dir: directory where the metrics of each closed temporal window are persisted. Default to '',
+            they are not persisted.
+        :type persist_dir: str
         :return: None
         """
         # Initialize non-default values
         self._lanes = [] if not lanes else lanes
 
-        # Vehicles passed and turning vehicles passed on the traffic light
-        self._vehicles_passed, self._turning_vehicles_passed = set(), set()
+        # Turning vehicles passed on the traffic light, the passing vehicles are counted per detector by the sampler
+        self._turning_vehicles_passed = set()
         # Traffic light id
         self._tl_id = tl_id
 
         # Initialize the historical dictionary and current temporal window
         self._historical_info, self._cur_temporal_window = {}, 0
 
+        # Retention of the historical info in memory, the spill log and the offsets of the spilled windows on it
+        self._retention, self._spill_log, self._spilled_windows = retention, spill_log, {}
+
+        # Range-aggregate queries per lane over the closed temporal windows
+        self._window_aggregates = WindowAggregates(lanes=self._lanes, retention=retention)
+
+        # Binary file where the metrics of the closed temporal windows are persisted
+        self._metrics_file = HistoryMetricsFile(persist_dir=persist_dir, tl_id=tl_id, lanes=self._lanes) \
+            if persist_dir else None
+
         # Initialize the first historical info
         self.create_historical_traffic_info(self._cur_temporal_window)
 
@@ -50,16 +75,51 @@ class TrafficLightInfoStorage:
         """
         # If lane info does not have information
         if not lane_info:
-            # Initialize passing vehicles, waiting time and turning vehicles per lane
-            lane_info = {lane: {'num_passing_veh': 0, 'waiting_time_veh': 0.0, 'occupancy': [], 'CO2_emission': [],
-                                'CO_emission': [], 'HC_emission': [], 'PMx_emission': [], 'NOx_emission': [],
-                                'noise_emission': []} for lane in self._lanes} if not lane_info else lane_info
+            # Initialize passing vehicles and waiting time per lane
+            lane_info = {lane: {'num_passing_veh': 0, 'waiting_time_veh': 0.0} for lane in self._lanes}
 
-        # Store information into the dict
+        # Store information into the dict, along with the running statistics of the lane metrics per metric and lane
         self._historical_info[temporal_window] = {'contextual_info': lane_info,
+                                                  'lane_statistics': RunningStatistics(
+                                                      shape=(len(LANE_METRICS_VARIABLES), len(self._lanes))),
                                                   'date_info': None,
                                                   'actual_program': actual_program}
 
+        # Evict the oldest temporal windows beyond the retention
+        if self._retention and len(self._historical_info) > self._retention:
+            self.evict_historical_traffic_info()
+
+    def evict_historical_traffic_info(self) -> None:
+        """
+        Evict the oldest temporal windows beyond the retention from memory, spilling them to the log if any. The
+        current temporal window is never evicted.
+
+        :return: None
+        """
+        # The historical info keeps the insertion order, so the oldest windows are the first ones
+        expired_windows = [temporal_window for temporal_window in
+                           itertools.islice(self._historical_info, len(self._historical_info) - self._retention)
+                           if temporal_window != self._cur_temporal_window]
+
+        for temporal_window in expired_windows:
+            # The lanes information is only built by lane when it is spilled
+            if self._spill_log:
+                self._spilled_windows[temporal_window] = self._spill_log.append(
+                    temporal_window=temporal_window,
+                    historical_info=self.get_traffic_info_by_temporal_window(temporal_window))
+            self.pop_historical_traffic_info(temporal_window)
+
+    def pop_historical_traffic_info(self, temporal_window: int) -> dict:
+        """
+        Remove a temporal window from the historical info in memory
+
+        :param temporal_window: temporal window identifier
+        :type temporal_window: int
+        :return: removed historical traffic information
+        :rtype: dict
+        """
+        return self._historical_info.pop(temporal_window)
+
     def increase_turning_vehicles(self, turn: str) -> None:
         """
         Increase the number of turning vehicles by 1 on the given turn
@@ -117,33 +177,95 @@ class TrafficLightInfoStorage:
         self._historical_info[temporal_window]['date_info'] = date_info
 
     def increase_temporal_window(self):
+        """
+        Close the current temporal window, appending its lanes values to the window aggregates and persisting its
+        metrics if enabled, and move to the next one
+        """
+        passing_vehicles, waiting_time = self.get_lanes_values(temporal_window=self._cur_temporal_window)
+        self._window_aggregates.append(temporal_window=self._cur_temporal_window,
+                                       values={'num_passing_veh': passing_vehicles, 'waiting_time_veh': waiting_time})
+
+        if self._metrics_file:
+            self.persist_temporal_window(passing_vehicles=passing_vehicles, waiting_time=waiting_time)
+
         self._cur_temporal_window += 1
 
+    def persist_temporal_window(self, passing_vehicles: np.ndarray, waiting_time: np.ndarray) -> None:
+        """
+        Persist the metrics of the current temporal window: its passing vehicles and waiting time and the lane metrics
+        averages per lane
+
+        :param passing_vehicles: passing vehicles per lane (in lanes order)
+        :type passing_vehicles: np.ndarray
+        :param waiting_time: waiting time per lane (in lanes order)
+        :type waiting_time: np.ndarray
+        :return: None
+        """
+        lane_statistics = self._historical_info[self._cur_temporal_window]['lane_statistics']
+        self._metrics_file.append(temporal_window=self._cur_temporal_window,
+                                  values=np.vstack([passing_vehicles, waiting_time, lane_statistics.mean]))
+
+    def close(self) -> None:
+        """
+        Persist the current temporal window, although it is not closed, as it is the last one of the simulation, and
+        close the metrics file
+
+        :return: None
+        """
+        if self._metrics_file:
+            self.persist_temporal_window(*self.get_lanes_values(temporal_window=self._cur_temporal_window))
+            self._metrics_file.close()
+
     """ EXTERNAL TRAFFIC COMPONENTS UTILS """
 
+    def get_lanes_values(self, temporal_window: int) -> tuple:
+        """
+        Get the passing vehicles and waiting time of all the lanes of a temporal window in memory
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: passing vehicles and waiting time per lane (in lanes order)
+        :rtype: tuple
+        """
+        contextual_info = self._historical_info[temporal_window]['contextual_info']
+        return (np.array([contextual_info[lane]['num_passing_veh'] for lane in self._lanes], dtype=np.int64),
+                np.array([contextual_info[lane]['waiting_time_veh'] for lane in self._lanes], dtype=float))
+
+    def get_lanes_columns(self, temporal_window: int) -> dict:
+        """
+        Get the lanes information of a temporal window in memory by columns, for the callers that index the lanes by
+        its column (in lanes order) instead of building the information per lane
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: passing vehicles and waiting time arrays per lane (in lanes order) by field name
+        :rtype: dict
+        """
+        passing_vehicles, waiting_time = self.get_lanes_values(temporal_window=temporal_window)
+        return {'num_passing_veh': passing_vehicles, 'waiting_time_veh': waiting_time}
+
     def get_processed_contextual_info(self, temporal_window: int) -> dict:
         """
-        Process the values of contextual info calculating the average and sum values
+        Process the values of contextual info with the sum values and the average, minimum, maximum and standard
+        deviation of the lane metrics
 
         :param temporal_window: temporal window
         :type temporal_window: int
         :return: dict with passing vehicles on NS and EW direction
         :rtype: dict
         """
+        historical_info = self._historical_info[temporal_window]
+
+        # Lane metrics statistics by field name, as lists of lanes values
+        metrics_fields = self.get_lane_metrics_fields(temporal_window=temporal_window)
 
         # Create a list based on lane information
         contextual_lane_info = [{'tl_id': self._tl_id, 'lane': lane_name,
                                  'waiting_time_veh': lane_info['waiting_time_veh'],
                                  'num_passing_veh': lane_info['num_passing_veh'],
-                                 'avg_lane_occupancy': mean(lane_info['occupancy']),
-                                 'avg_CO2_emission': mean(lane_info['CO2_emission']),
-                                 'avg_CO_emission': mean(lane_info['CO_emission']),
-                                 'avg_HC_emission': mean(lane_info['HC_emission']),
-                                 'avg_PMx_emission': mean(lane_info['PMx_emission']),
-                                 'avg_NOx_emission': mean(lane_info['NOx_emission']),
-                                 'avg_noise_emission': mean(lane_info['noise_emission'])}
-                                for lane_name, lane_info in self._historical_info[temporal_window]
-                                ['contextual_info'].items()]
+                                 **{field: values[index] for field, values in metrics_fields.items()}}
+                                for index, (lane_name, lane_info) in
+                                enumerate(historical_info['contextual_info'].items())]
 
         # Append to contextual info the actual program with empty lane field as it is required on the simulation
         contextual_lane_info.append({'tl_id': self._tl_id, 'lane': '',
@@ -152,6 +274,54 @@ class TrafficLightInfoStorage:
 
         return {'info': contextual_lane_info}
 
+    def get_lane_metrics_fields(self, temporal_window: int) -> dict:
+        """
+        Get the average, minimum, maximum and standard deviation of the lane metrics of a temporal window
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: lanes values (in lanes order) by published field name, such as 'avg_lane_occupancy'
+        :rtype: dict
+        """
+        lane_statistics = self._historical_info[temporal_window]['lane_statistics']
+        statistics_values = {'avg': lane_statistics.mean, 'min': lane_statistics.min, 'max': lane_statistics.max,
+                             'std': lane_statistics.std}
+
+        return {f'{statistic}_{field}': values.tolist()
+                for statistic in LANE_METRICS_STATISTICS
+                for field, values in zip(LANE_METRICS_FIELDS, statistics_values[statistic])}
+
+    def get_lanes_totals(self, temporal_window: int) -> dict:
+        """
+        Get the waiting time and the vehicles passed added up over the lanes of a temporal window
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: total waiting time and vehicles passed
+        :rtype: dict
+        """
+        contextual_info = self.get_traffic_info_by_temporal_window(temporal_window)['contextual_info']
+        return {'waiting_time': sum(lane_info['waiting_time_veh'] for lane_info in contextual_info.values()),
+                'veh_passed': sum(lane_info['num_passing_veh'] for lane_info in contextual_info.values())}
+
+    def get_lane_metrics_totals(self, temporal_window: int) -> dict:
+        """
+        Get the lane metrics added up over the lanes and the steps of a temporal window
+
+        :param temporal_window: temporal window
+        :type temporal_window: int
+        :return: total of each lane metric by name
+        :rtype: dict
+        """
+        # Only the spilled windows are read back with its lanes information
+        historical_info = self._historical_info.get(temporal_window) or \
+            self.get_traffic_info_by_temporal_window(temporal_window)
+        lane_statistics = historical_info['lane_statistics']
+
+        # The sum over the steps is the mean times the number of steps
+        totals = lane_statistics.mean.sum(axis=1) * lane_statistics.count
+        return dict(zip(LANE_METRICS_VARIABLES, totals.tolist()))
+
     def get_traffic_analyzer_info(self, temporal_window: int) -> dict:
         """
         Get the traffic analyzer required information (only passing vehicles)
@@ -211,51 +381,75 @@ class TrafficLightInfoStorage:
         """
         self._historical_info[self._cur_temporal_window]['contextual_info'][lane]['waiting_time_veh'] += waiting_time
 
-    def update_passing_vehicles(self, passing_veh: set) -> None:
-        """
-        Append new passing vehicles
-
-        :param passing_veh: new passing vehicles
-        :type passing_veh: set
-        :return: None
-        """
-        self._vehicles_passed.update(passing_veh)
-
     def remove_passed_vehicles(self, vehicles: set) -> None:
         """
-        Remove passed vehicles from both "vehicles_passed" and "turning_vehicles_passed"
+        Remove passed vehicles from "turning_vehicles_passed"
 
         :param vehicles: vehicles that has passed
         :type vehicles: str
         :return: None
         """
-        self._vehicles_passed.difference_update(vehicles)
         self._turning_vehicles_passed.difference_update(vehicles)
 
     def get_traffic_info_by_temporal_window(self, temporal_window: int) -> dict:
         """
-        Get traffic info related to a given temporal window
+        Get traffic info related to a given temporal window, read from the spill log if it has been evicted from memory
 
         :param temporal_window: temporal window to retrieve the information
         :type temporal_window: int
         :return: historical traffic information
         :rtype: dict
         """
+        if temporal_window not in self._historical_info and temporal_window in self._spilled_windows:
+            return self._spill_log.read(offset=self._spilled_windows[temporal_window])
+
         return self._historical_info[temporal_window]
 
-    def append_item_on_list_lane(self, lane: str, name: str, value: float) -> None:
+    def update_lane_metrics(self, values: np.ndarray) -> None:
         """
-        Append a new value into a list with the given name on the lane historical info
+        Update the running statistics of the lane metrics at the current temporal window with the values of a step
 
-        :param lane: lane name
-        :type lane: str
-        :param name: value name
-        :type name: str
-        :param value: item value
-        :type value: str
+        :param values: lane metrics values per metric (in LANE_METRICS_VARIABLES order) and lane (in lanes order)
+        :type values: np.ndarray
+        :return: None
+        """
+        self._historical_info[self._cur_temporal_window]['lane_statistics'].update(values)
+
+    """ CHECKPOINTS """
+
+    def attach_spill_log(self, spill_log: HistorySpillLog) -> None:
+        """
+        Attach the spill log of the simulator to a storage restored from a checkpoint
+
+        :param spill_log: log where the temporal windows evicted from memory are spilled
+        :type spill_log: HistorySpillLog
+        :return: None
+        """
+        if self._spilled_windows and not spill_log:
+            raise Exception(f"Traffic light {self._tl_id} history has spilled temporal windows, but no spill log is "
+                            f"provided")
+
+        self._spill_log = spill_log
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle the storage without its spill log, shared by all the storages of the simulator
+
+        :return: storage state
+        :rtype: dict
+        """
+        return {key: value for key, value in self.__dict__.items() if key != '_spill_log'}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restore the storage once unpickled, whose spill log is attached afterwards
+
+        :param state: storage state
+        :type state: dict
         :return: None
         """
-        self._historical_info[self._cur_temporal_window]['contextual_info'][lane][name].append(value)
+        self.__dict__.update(state)
+        self._spill_log = None
 
     """ SETTERS AND GETTERS """
 
@@ -291,14 +485,14 @@ class TrafficLightInfoStorage:
         return self._historical_info
 
     @property
-    def vehicles_passed(self) -> set:
+    def window_aggregates(self) -> WindowAggregates:
         """
-        Traffic Light Info Storage  vehicles passed getter
+        Traffic Light Info Storage range-aggregate queries over the closed temporal windows getter
 
-        :return: vehicles passed
-        :rtype: set
+        :return: window aggregates
+        :rtype: WindowAggregates
         """
-        return self._vehicles_passed
+        return self._window_aggregates
 
     @property
     def turning_vehicles_passed(self) -> set:
@@ -1,11 +1,10 @@
-import ast
 import copy
 
 import paho.mqtt.client as mqtt
 import pandas as pd
 from sumo_generators.static.constants import MQTT_URL, MQTT_PORT, TRAFFIC_INFO_TOPIC, \
     TURN_PREDICTION_TOPIC
-from sumo_generators.utils.utils import parse_to_valid_schema
+from sumo_generators.utils.codec import encode_payload, decode_payload
 from turns_predictor.ml.model_predictor import ModelPredictor
 from turns_predictor.static.constants import DEFAULT_NUM_MODELS, MODEL_PARSED_VALUES_FILE, MODEL_BASE_DIR, \
     MODEL_PERFORMANCE_FILE, DEFAULT_TURN_DICT
@@ -86,7 +85,7 @@ class TurnPredictor:
         :return: None
         """
         # Parse to message input dict
-        traffic_info = ast.literal_eval(msg.payload.decode('utf-8'))
+        traffic_info = decode_payload(msg.payload)
 
         # Retrieve junction id
         junction_id = str(msg.topic).split('/')[1] if '/' in msg.topic else ''
@@ -98,7 +97,7 @@ class TurnPredictor:
 
             # Publish the message
             self._mqtt_client.publish(topic=TURN_PREDICTION_TOPIC + '/' + junction_id,
-                                      payload=parse_to_valid_schema(self._turn_probabilities))
+                                      payload=encode_payload(self._turn_probabilities))
 
     def predict_turn_probabilities(self, traffic_info: dict) -> dict:
         """